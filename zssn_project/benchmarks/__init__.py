@@ -0,0 +1,14 @@
+"""
+Benchmarks da API do Apocalipse Zumbi
+Execute a partir de zssn_project/: python -m benchmarks.<modulo>
+"""
+
+import os
+
+
+def configurar_django():
+    """Configura o Django para rodar os benchmarks fora do manage.py"""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zssn_project.settings')
+    django.setup()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Suíte de carga e benchmark da API
+
+Execute a partir de zssn_project/:
+
+    python -m benchmarks gerar --sobreviventes 100000 --semente 42
+    python -m benchmarks carga --carga mista --requisicoes 2000 --saida base.json
+    python -m benchmarks carga --carga mista --requisicoes 2000 --comparar base.json
+    python -m benchmarks carga --url http://localhost:8000 --concorrencia 8
+    python -m benchmarks comparar base.json atual.json
+
+As cargas alteram o banco (escambos, reportes...). Para comparar execuções,
+parta da mesma população: recrie o banco e gere com a mesma semente.
+"""
+
+import argparse
+import time
+
+from benchmarks import configurar_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    gerar = subcomandos.add_parser('gerar', help='Gera uma população sintética determinística.')
+    gerar.add_argument('--sobreviventes', type=int, default=10000)
+    gerar.add_argument('--semente', type=int, default=42)
+    gerar.add_argument('--fracao-infectados', type=float, default=0.1)
+    gerar.add_argument('--lote', type=int, default=10000)
+
+    carga = subcomandos.add_parser('carga', help='Executa uma carga roteirizada e gera o relatório.')
+    carga.add_argument('--carga', default='mista')
+    carga.add_argument('--requisicoes', type=int, default=1000)
+    carga.add_argument('--semente', type=int, default=42)
+    carga.add_argument('--url', help='Servidor HTTP local; sem ele, usa o Client do Django no processo.')
+    carga.add_argument('--concorrencia', type=int, default=1, help='Threads (apenas com --url).')
+    carga.add_argument('--saida', help='Salva o relatório JSON neste arquivo.')
+    carga.add_argument('--comparar', help='Relatório JSON de base para comparação.')
+
+    comparar = subcomandos.add_parser('comparar', help='Compara dois relatórios salvos.')
+    comparar.add_argument('base')
+    comparar.add_argument('atual')
+
+    args = parser.parse_args()
+
+    from benchmarks import relatorio
+
+    if args.comando == 'comparar':
+        print(relatorio.comparar(relatorio.carregar(args.base), relatorio.carregar(args.atual)))
+        return
+
+    configurar_django()
+
+    if args.comando == 'gerar':
+        from benchmarks.gerador import gerar_populacao
+
+        print(f"🧟 Gerando {args.sobreviventes} sobreviventes (semente {args.semente})...")
+        inicio = time.perf_counter()
+        contagem = gerar_populacao(args.sobreviventes, args.semente, args.fracao_infectados, args.lote, saida=print)
+        print(f"\n✅ {contagem['sobreviventes']} sobreviventes, {contagem['itens']} itens e "
+              f"{contagem['reportes']} reportes em {time.perf_counter() - inicio:.1f} s")
+        return
+
+    from benchmarks.cargas import CARGAS, ClienteHTTP, ClienteLocal, executar_carga
+
+    if args.carga not in CARGAS:
+        parser.error(f"Carga desconhecida: {args.carga}. Opções: {', '.join(CARGAS)}")
+
+    cliente = ClienteHTTP(args.url, args.concorrencia) if args.url else ClienteLocal()
+    print(f"🏃 Carga '{args.carga}' com {args.requisicoes} requisições "
+          f"({'HTTP ' + args.url if args.url else 'Client do Django'})\n")
+    amostras, duracao = executar_carga(cliente, args.carga, args.requisicoes, args.semente)
+
+    resultado = relatorio.montar_relatorio(amostras, duracao, {
+        'carga': args.carga, 'requisicoes': args.requisicoes, 'semente': args.semente,
+        'url': args.url, 'concorrencia': args.concorrencia if args.url else 1,
+    })
+    print(relatorio.formatar(resultado))
+
+    if args.saida:
+        relatorio.salvar(resultado, args.saida)
+        print(f"\n💾 Relatório salvo em {args.saida}")
+    if args.comparar:
+        print(f"\n📊 Comparação com {args.comparar}:")
+        print(relatorio.comparar(relatorio.carregar(args.comparar), resultado))
+
+
+if __name__ == '__main__':
+    main()
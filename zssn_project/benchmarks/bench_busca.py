@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Mede a latência da busca por nome sobre a população do banco
+Execute: python -m benchmarks.bench_busca [--repeticoes 20]
+
+Gere antes uma população grande (ex.: python -m benchmarks gerar --sobreviventes 1000000).
+"""
+
+import argparse
+import time
+
+from benchmarks import configurar_django
+
+configurar_django()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from Sobrevivente.busca import buscar_sobreviventes, trigrama_disponivel  # noqa: E402
+from Sobrevivente.models import Sobreviventes  # noqa: E402
+
+# Prefixo curto, prefixo longo, acentuado, sobrenome (aproximada), erro de digitação (aproximada)
+TERMOS = ['a', 'gabriela s', 'Fábio', 'oliveira', 'marnia', 'quiteria rocha 12']
+
+
+def medir(termo, pagina, repeticoes):
+    """Retorna (melhor tempo, consultas, resultados) de uma página da busca"""
+    melhor = float('inf')
+    resultados = []
+    consultas = 0
+    for _ in range(repeticoes):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            resultados, _tem_proxima = buscar_sobreviventes(termo, pagina=pagina)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        consultas = len(capturadas.captured_queries)
+    return melhor, consultas, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--pagina', type=int, default=1)
+    args = parser.parse_args()
+
+    total = Sobreviventes.objects.count()
+    if not total:
+        print("⚠️  Nenhum sobrevivente no banco. Popule os dados antes de medir.")
+        return
+
+    aproximada = 'pg_trgm' if trigrama_disponivel(connection.alias) else 'início de palavra'
+    print(f"📦 {total} sobreviventes, busca aproximada: {aproximada}, melhor de {args.repeticoes} execuções\n")
+
+    for termo in TERMOS:
+        tempo, consultas, resultados = medir(termo, args.pagina, args.repeticoes)
+        primeiro = resultados[0]['nome'] if resultados else '-'
+        print(f"{termo!r:>20}: {tempo * 1000:8.2f} ms  {consultas} consultas  "
+              f"{len(resultados):3d} resultados  primeiro: {primeiro}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Mede a vazão de requisições com e sem reaproveitamento de conexões
+Execute: python -m benchmarks.bench_conexoes [--requisicoes 500] [--threads 4]
+
+Cada modo roda em um processo separado com o perfil de produção
+(zssn_project.settings_producao), passando as requisições pelo
+WSGIHandler para que as conexões sejam abertas e fechadas como em
+produção:
+
+    sem_reuso    CONN_MAX_AGE=0 (uma conexão nova por requisição)
+    persistente  CONN_MAX_AGE=60
+    pool         pool do psycopg 3 (ZSSN_DB_POOL=1)
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+MODOS = {
+    'sem_reuso': {'ZSSN_DB_CONN_MAX_AGE': '0', 'ZSSN_DB_POOL': '0'},
+    'persistente': {'ZSSN_DB_CONN_MAX_AGE': '60', 'ZSSN_DB_POOL': '0'},
+    'pool': {'ZSSN_DB_POOL': '1'},
+}
+
+CAMINHO = '/Sobrevivente/sobreviventes/relatorios/'
+
+
+def executar_modo(requisicoes, threads):
+    """Roda as requisições no processo atual e imprime requisições/s"""
+    from benchmarks import configurar_django
+
+    configurar_django()
+
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+
+    def requisicao(_):
+        environ = {'PATH_INFO': CAMINHO, 'REQUEST_METHOD': 'GET', 'HTTP_HOST': 'localhost'}
+        setup_testing_defaults(environ)
+        resposta = handler(environ, lambda status, headers: None)
+        resposta.close()  # dispara request_finished, que devolve/fecha a conexão
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(requisicao, range(threads)))  # aquecimento
+        inicio = time.perf_counter()
+        list(executor.map(requisicao, range(requisicoes)))
+        duracao = time.perf_counter() - inicio
+
+    print(f"{requisicoes / duracao:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requisicoes', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--modo', choices=MODOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        executar_modo(args.requisicoes, args.threads)
+        return
+
+    print(f"🔌 {args.requisicoes} requisições GET {CAMINHO} com {args.threads} threads\n")
+    for modo, variaveis in MODOS.items():
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'zssn_project.settings_producao',
+            'DJANGO_SECRET_KEY': os.environ.get('DJANGO_SECRET_KEY', 'benchmark'),
+            'ZSSN_ALLOWED_HOSTS': 'localhost',
+            **variaveis,
+        }
+        resultado = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_conexoes', '--modo', modo,
+             '--requisicoes', str(args.requisicoes), '--threads', str(args.threads)],
+            env=env, capture_output=True, text=True,
+        )
+        if resultado.returncode != 0:
+            print(f"{modo:>12}: ❌ falhou\n{resultado.stderr.strip()}")
+            continue
+        print(f"{modo:>12}: {float(resultado.stdout.strip().splitlines()[-1]):10.1f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Mede o solucionador de escambo circular sobre intenções sintéticas
+Execute: python -m benchmarks.bench_escambo [--participantes 100000] [--tamanho-maximo 4]
+
+As intenções são geradas em memória (sem banco), uma por participante, com
+lotes de 12, 24 ou 36 pontos. Um ciclo de três participantes (água →
+munição → comida → água) com um valor que nenhum outro usa é plantado para
+conferir que o solucionador o encontra.
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from benchmarks import configurar_django
+
+configurar_django()
+
+from Sobrevivente.escambo_circular import Intencao, encontrar_ciclos  # noqa: E402
+from Sobrevivente.models import ItemInventario, TipoItem  # noqa: E402
+
+
+def gerar_intencoes(participantes, semente):
+    """Uma intenção de saldo zero por participante, mais o ciclo plantado"""
+    rng = random.Random(semente)
+    pontos = ItemInventario.PONTOS_ITENS
+    tipos = list(pontos)
+    intencoes = []
+    for participante in range(participantes):
+        oferecido, desejado = rng.sample(tipos, 2)
+        valor = 12 * rng.randint(1, 3)
+        intencoes.append(Intencao(
+            participante, participante, oferecido, valor // pontos[oferecido], desejado, valor // pontos[desejado]
+        ))
+
+    base = participantes
+    anel = [(TipoItem.AGUA, 15, TipoItem.MUNICAO, 60), (TipoItem.MUNICAO, 60, TipoItem.COMIDA, 20),
+            (TipoItem.COMIDA, 20, TipoItem.AGUA, 15)]
+    for deslocamento, (oferecido, quantidade_oferecida, desejado, quantidade_desejada) in enumerate(anel):
+        intencoes.append(Intencao(
+            base + deslocamento, base + deslocamento, oferecido, quantidade_oferecida, desejado, quantidade_desejada
+        ))
+    return intencoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--participantes', type=int, default=100000)
+    parser.add_argument('--tamanho-maximo', type=int, default=4)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    intencoes = gerar_intencoes(args.participantes, args.semente)
+    print(f"📦 {len(intencoes)} intenções de {len(intencoes)} participantes\n")
+
+    inicio = time.perf_counter()
+    ciclos = encontrar_ciclos(intencoes, args.tamanho_maximo)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+
+    por_tamanho = Counter(len(ciclo) for ciclo in ciclos)
+    atendidos = sum(por_tamanho[tamanho] * tamanho for tamanho in por_tamanho)
+    print(f"      busca: {duracao_ms:9.1f} ms")
+    print(f"     ciclos: {len(ciclos)} ({', '.join(f'{n} de {t}' for t, n in sorted(por_tamanho.items()))})")
+    print(f"  atendidos: {atendidos} participantes ({atendidos / len(intencoes):.1%})\n")
+
+    plantado = {args.participantes, args.participantes + 1, args.participantes + 2}
+    encontrado = any({intencao.sobrevivente_id for intencao in ciclo} == plantado for ciclo in ciclos)
+    print(f"{'✅' if encontrado else '❌'} ciclo plantado")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Compara tamanho e velocidade de codificação entre JSON e MessagePack
+Execute: python -m benchmarks.bench_formatos [--repeticoes 5]
+"""
+
+import argparse
+import time
+
+from benchmarks import configurar_django
+
+configurar_django()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from Sobrevivente.mensagem_compacta import msgpack  # noqa: E402
+from Sobrevivente.models import Sobreviventes  # noqa: E402
+from Sobrevivente.renderers import JSONRapidoRenderer, MessagePackRenderer  # noqa: E402
+from Sobrevivente.serializers import SobreviventeLeituraRapidaSerializer  # noqa: E402
+
+RENDERERS = (
+    ('json (drf)', JSONRenderer),
+    ('json (rápido)', JSONRapidoRenderer),
+    ('msgpack', MessagePackRenderer),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    dados = SobreviventeLeituraRapidaSerializer().serializar(Sobreviventes.objects.all())
+    if not dados:
+        print("⚠️  Nenhum sobrevivente no banco. Popule os dados antes de medir.")
+        return
+
+    implementacao = 'msgpack (C)' if msgpack is not None else 'Python puro'
+    print(f"📦 {len(dados)} sobreviventes, MessagePack via {implementacao}\n")
+
+    tamanho_base = None
+    for nome, renderer_class in RENDERERS:
+        renderer = renderer_class()
+        melhor = float('inf')
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            saida = renderer.render(dados)
+            melhor = min(melhor, time.perf_counter() - inicio)
+
+        tamanho_base = tamanho_base or len(saida)
+        print(f"{nome:>14}: {len(saida):10d} bytes ({len(saida) / tamanho_base:6.1%})  "
+              f"{melhor * 1000:9.1f} ms  {len(dados) / melhor:12.0f} linhas/s")
+
+
+if __name__ == '__main__':
+    main()
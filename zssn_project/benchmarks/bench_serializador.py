@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Compara o SobreviventeSerializer com o serializer de leitura rápida
+Execute: python -m benchmarks.bench_serializador [--repeticoes 5]
+"""
+
+import argparse
+import time
+
+from benchmarks import configurar_django
+
+configurar_django()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from Sobrevivente.models import Sobreviventes  # noqa: E402
+from Sobrevivente.renderers import JSONRapidoRenderer  # noqa: E402
+from Sobrevivente.serializers import SobreviventeSerializer, SobreviventeLeituraRapidaSerializer  # noqa: E402
+
+
+def caminho_drf(queryset):
+    """Caminho atual: ModelSerializer + JSONRenderer"""
+    return JSONRenderer().render(SobreviventeSerializer(queryset, many=True).data)
+
+
+def caminho_rapido(queryset):
+    """Caminho otimizado: linhas .values() + JSONRapidoRenderer"""
+    return JSONRapidoRenderer().render(SobreviventeLeituraRapidaSerializer().serializar(queryset))
+
+
+def medir(funcao, queryset, repeticoes):
+    """Executa a função várias vezes e retorna (melhor tempo, consultas, saída)"""
+    melhor = float('inf')
+    saida = b''
+    consultas = 0
+    for _ in range(repeticoes):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            saida = funcao(queryset)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        consultas = len(capturadas.captured_queries)
+    return melhor, consultas, saida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    queryset = Sobreviventes.objects.filter(infectado=False)
+    total = queryset.count()
+    if not total:
+        print("⚠️  Nenhum sobrevivente saudável no banco. Popule os dados antes de medir.")
+        return
+
+    print(f"📦 {total} sobreviventes, melhor de {args.repeticoes} execuções\n")
+
+    resultados = {}
+    for nome, funcao in (('drf', caminho_drf), ('rapido', caminho_rapido)):
+        tempo, consultas, saida = medir(funcao, queryset, args.repeticoes)
+        resultados[nome] = saida
+        print(f"{nome:>7}: {tempo * 1000:9.1f} ms  {total / tempo:12.0f} linhas/s  "
+              f"{consultas:6d} consultas  {len(saida)} bytes")
+
+    if resultados['drf'] == resultados['rapido']:
+        print("\n✅ Saídas idênticas.")
+    else:
+        print("\n❌ As saídas diferem!")
+
+
+if __name__ == '__main__':
+    main()
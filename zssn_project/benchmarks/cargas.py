@@ -0,0 +1,157 @@
+"""
+Cargas de trabalho roteirizadas contra a API
+
+Cada carga é uma mistura ponderada de operações (listar, detalhar, escambo,
+reportar infecção, atualizar localização, relatórios...). A sequência de
+operações e parâmetros vem de uma semente, então duas execuções sobre a
+mesma população fazem exatamente as mesmas chamadas.
+
+As chamadas podem ir pelo Client de testes do Django (no processo, com
+contagem de consultas SQL) ou para um servidor HTTP local.
+"""
+
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from Sobrevivente.models import Sobreviventes, TipoItem
+
+PREFIXO = '/Sobrevivente/sobreviventes/'
+
+# Pesos relativos de cada operação por carga
+CARGAS = {
+    'leitura': {'listar': 5, 'detalhar': 70, 'relatorios': 10, 'atualizar_localizacao': 15},
+    'escrita': {'atualizar_localizacao': 40, 'adicionar_item': 25, 'escambo': 20, 'reportar_infeccao': 15},
+    'mista': {
+        'listar': 2, 'detalhar': 40, 'relatorios': 3, 'atualizar_localizacao': 30,
+        'adicionar_item': 10, 'escambo': 10, 'reportar_infeccao': 5,
+    },
+}
+
+
+class Amostra:
+    """Resultado de uma chamada"""
+
+    __slots__ = ('operacao', 'status', 'duracao', 'consultas', 'bytes')
+
+    def __init__(self, operacao, status, duracao, consultas, tamanho):
+        self.operacao = operacao
+        self.status = status
+        self.duracao = duracao
+        self.consultas = consultas
+        self.bytes = tamanho
+
+
+class ClienteLocal:
+    """Executa as chamadas no processo, pelo Client de testes do Django"""
+
+    concorrencia = 1
+
+    def __init__(self):
+        if 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        # Todas as chamadas saem do mesmo "cliente"; o throttle mediria só a si mesmo
+        settings.ZSSN_THROTTLE = {}
+        self.client = Client()
+
+    def chamar(self, metodo, caminho, dados=None):
+        kwargs = {'content_type': 'application/json'} if dados is not None else {}
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            resposta = getattr(self.client, metodo.lower())(caminho, json.dumps(dados) if dados is not None else None, **kwargs)
+            conteudo = resposta.content
+            duracao = time.perf_counter() - inicio
+        return resposta.status_code, duracao, len(consultas.captured_queries), len(conteudo)
+
+
+class ClienteHTTP:
+    """Executa as chamadas contra um servidor HTTP (sem contagem de consultas)"""
+
+    def __init__(self, url_base, concorrencia=1):
+        self.url_base = url_base.rstrip('/')
+        self.concorrencia = concorrencia
+
+    def chamar(self, metodo, caminho, dados=None):
+        corpo = json.dumps(dados).encode('utf-8') if dados is not None else None
+        requisicao = urllib.request.Request(
+            self.url_base + caminho, data=corpo, method=metodo.upper(),
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
+        )
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(requisicao) as resposta:
+                conteudo = resposta.read()
+                status = resposta.status
+        except urllib.error.HTTPError as erro:
+            conteudo = erro.read()
+            status = erro.code
+        return status, time.perf_counter() - inicio, None, len(conteudo)
+
+
+def roteiro(carga, requisicoes, semente, ids):
+    """Sequência determinística de chamadas (operação, método, caminho, dados)"""
+    if len(ids) < 2:
+        raise ValueError('A carga precisa de pelo menos 2 sobreviventes saudáveis.')
+
+    rng = random.Random(semente)
+    operacoes, pesos = zip(*CARGAS[carga].items())
+    tipos = [tipo.value for tipo in TipoItem]
+
+    for operacao in rng.choices(operacoes, weights=pesos, k=requisicoes):
+        alvo, outro = rng.sample(ids, 2)
+        if operacao == 'listar':
+            yield operacao, 'GET', PREFIXO, None
+        elif operacao == 'detalhar':
+            yield operacao, 'GET', f'{PREFIXO}{alvo}/', None
+        elif operacao == 'relatorios':
+            yield operacao, 'GET', f'{PREFIXO}relatorios/', None
+        elif operacao == 'atualizar_localizacao':
+            yield operacao, 'PATCH', f'{PREFIXO}{alvo}/atualizar_localizacao/', {
+                'latitude': f'{rng.uniform(-33, 5):.7f}', 'longitude': f'{rng.uniform(-73, -35):.7f}',
+            }
+        elif operacao == 'adicionar_item':
+            yield operacao, 'POST', f'{PREFIXO}{alvo}/adicionar_item/', {
+                'tipo_item': rng.choice(tipos), 'quantidade': rng.randint(1, 5),
+            }
+        elif operacao == 'escambo':
+            # 1 água (4 pontos) por 4 munições (4 pontos)
+            yield operacao, 'POST', f'{PREFIXO}{alvo}/escambo/', {
+                'sobrevivente_destino_id': outro,
+                'itens_oferecidos': [{'tipo_item': TipoItem.AGUA.value, 'quantidade': 1}],
+                'itens_desejados': [{'tipo_item': TipoItem.MUNICAO.value, 'quantidade': 4}],
+            }
+        elif operacao == 'reportar_infeccao':
+            yield operacao, 'POST', f'{PREFIXO}{alvo}/reportar_infeccao/', {'sobrevivente_reportador': outro}
+
+
+def ids_saudaveis(limite=10000, semente=42):
+    """Amostra determinística de ids de sobreviventes saudáveis"""
+    ids = list(Sobreviventes.objects.filter(infectado=False).order_by('id').values_list('id', flat=True))
+    if len(ids) > limite:
+        ids = sorted(random.Random(semente).sample(ids, limite))
+    return ids
+
+
+def executar_carga(cliente, carga, requisicoes, semente=42):
+    """Executa a carga e retorna (amostras, duração total em segundos)"""
+    chamadas = list(roteiro(carga, requisicoes, semente, ids_saudaveis(semente=semente)))
+
+    def executar(chamada):
+        operacao, metodo, caminho, dados = chamada
+        return Amostra(operacao, *cliente.chamar(metodo, caminho, dados))
+
+    inicio = time.perf_counter()
+    if cliente.concorrencia > 1:
+        with ThreadPoolExecutor(max_workers=cliente.concorrencia) as executor:
+            amostras = list(executor.map(executar, chamadas))
+    else:
+        amostras = [executar(chamada) for chamada in chamadas]
+    return amostras, time.perf_counter() - inicio
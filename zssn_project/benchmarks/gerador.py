@@ -0,0 +1,177 @@
+"""
+Gerador determinístico de populações sintéticas
+
+Cria N sobreviventes com localização, inventário e reportes de infecção a
+partir de uma semente: a mesma semente gera sempre a mesma população. No
+PostgreSQL os dados entram via COPY; nos demais bancos, via bulk_create.
+"""
+
+import io
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from Sobrevivente.models import Sobreviventes, ItemInventario, ReporteInfeccao, SexoChoices, TipoItem
+from Sobrevivente.normalizacao import normalizar_nome
+
+NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Heitor', 'Isabela', 'João',
+    'Karina', 'Lucas', 'Marina', 'Nicolas', 'Olívia', 'Paulo', 'Quitéria', 'Rafael', 'Sofia', 'Tiago',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Araújo', 'Melo', 'Barbosa', 'Rocha', 'Dias', 'Nunes',
+]
+
+# Caixa aproximada do território brasileiro
+LATITUDES = (-33.0, 5.0)
+LONGITUDES = (-73.0, -35.0)
+
+DATA_BASE = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def gerar_populacao(total, semente=42, fracao_infectados=0.1, lote=10000, saida=None):
+    """Gera ``total`` sobreviventes e retorna a contagem de linhas criadas por tabela"""
+    rng = random.Random(semente)
+    primeiro_id = (Sobreviventes.objects.aggregate(maximo=Max('id'))['maximo'] or 0) + 1
+    escritor = _EscritorCopy() if connection.vendor == 'postgresql' else _EscritorBulk()
+    contagem = {'sobreviventes': 0, 'itens': 0, 'reportes': 0}
+
+    with transaction.atomic():
+        for inicio in range(0, total, lote):
+            ids = range(primeiro_id + inicio, primeiro_id + min(inicio + lote, total))
+            sobreviventes, itens, reportes = _gerar_lote(rng, ids, primeiro_id, fracao_infectados)
+            escritor.escrever(sobreviventes, itens, reportes)
+
+            contagem['sobreviventes'] += len(sobreviventes)
+            contagem['itens'] += len(itens)
+            contagem['reportes'] += len(reportes)
+            if saida:
+                saida(f"  {contagem['sobreviventes']}/{total} sobreviventes")
+
+        escritor.finalizar()
+
+    return contagem
+
+
+def _gerar_lote(rng, ids, primeiro_id, fracao_infectados):
+    """Gera as linhas de um lote; reportadores são sempre ids já gerados"""
+    sobreviventes, itens, reportes = [], [], []
+    tipos = [tipo.value for tipo in TipoItem]
+    sexos = [sexo.value for sexo in SexoChoices]
+
+    for sobrevivente_id in ids:
+        infectado = rng.random() < fracao_infectados
+        data = DATA_BASE + timedelta(seconds=rng.randrange(90 * 24 * 3600))
+        nome = f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {sobrevivente_id}'
+        sobreviventes.append({
+            'id': sobrevivente_id,
+            'nome': nome,
+            # COPY e bulk_create não passam por Sobreviventes.save()
+            'nome_normalizado': normalizar_nome(nome),
+            'idade': rng.randint(0, 100),
+            'sexo': rng.choice(sexos),
+            'latitude': Decimal(f'{rng.uniform(*LATITUDES):.7f}'),
+            'longitude': Decimal(f'{rng.uniform(*LONGITUDES):.7f}'),
+            'infectado': infectado,
+            'data_criacao': data,
+            'data_atualizacao': data,
+        })
+
+        for tipo_item in rng.sample(tipos, rng.randint(0, len(tipos))):
+            itens.append({'sobrevivente_id': sobrevivente_id, 'tipo_item': tipo_item, 'quantidade': rng.randint(1, 30)})
+
+        # Infectados têm 3+ reportes; saudáveis ficam abaixo do limite
+        candidatos = sobrevivente_id - primeiro_id
+        quantidade = rng.randint(3, 5) if infectado else rng.choice((0, 0, 0, 1, 2))
+        quantidade = min(quantidade, candidatos)
+        for reportador_id in rng.sample(range(primeiro_id, sobrevivente_id), quantidade):
+            reportes.append({
+                'sobrevivente_reportado_id': sobrevivente_id,
+                'sobrevivente_reportador_id': reportador_id,
+                'data_reporte': data + timedelta(minutes=rng.randrange(1, 7 * 24 * 60)),
+            })
+
+    return sobreviventes, itens, reportes
+
+
+class _EscritorBulk:
+    """Insere os lotes com bulk_create (SQLite e outros bancos)"""
+
+    # Campos auto_now/auto_now_add: bulk_create grava a hora atual no lugar das datas geradas
+    DATAS = {
+        Sobreviventes: ['data_criacao', 'data_atualizacao'],
+        ReporteInfeccao: ['data_reporte'],
+    }
+
+    def escrever(self, sobreviventes, itens, reportes):
+        self._inserir(Sobreviventes, sobreviventes)
+        self._inserir(ItemInventario, itens)
+        self._inserir(ReporteInfeccao, reportes)
+
+    def finalizar(self):
+        pass
+
+    def _inserir(self, modelo, linhas):
+        objetos = modelo.objects.bulk_create([modelo(**linha) for linha in linhas])
+        campos = self.DATAS.get(modelo)
+        if not campos or not objetos:
+            return
+        # bulk_update não passa por pre_save: restaura as datas geradas
+        for objeto, linha in zip(objetos, linhas):
+            for campo in campos:
+                setattr(objeto, campo, linha[campo])
+        modelo.objects.bulk_update(objetos, campos, batch_size=500)
+
+
+class _EscritorCopy:
+    """Insere os lotes com COPY ... FROM STDIN (PostgreSQL, psycopg 2 ou 3)"""
+
+    def escrever(self, sobreviventes, itens, reportes):
+        self._copiar(Sobreviventes, sobreviventes)
+        self._copiar(ItemInventario, itens)
+        self._copiar(ReporteInfeccao, reportes)
+
+    def finalizar(self):
+        # Os ids dos sobreviventes foram informados no COPY: ajusta a sequência
+        tabela = Sobreviventes._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), (SELECT MAX(id) FROM {connection.ops.quote_name(tabela)}))",
+                [tabela],
+            )
+
+    def _copiar(self, modelo, linhas):
+        if not linhas:
+            return
+        colunas = list(linhas[0])
+        dados = io.StringIO()
+        for linha in linhas:
+            dados.write('\t'.join(self._texto(linha[coluna]) for coluna in colunas))
+            dados.write('\n')
+
+        comando = 'COPY {} ({}) FROM STDIN'.format(
+            connection.ops.quote_name(modelo._meta.db_table),
+            ', '.join(connection.ops.quote_name(coluna) for coluna in colunas),
+        )
+        with connection.cursor() as cursor:
+            bruto = cursor.cursor
+            if hasattr(bruto, 'copy'):  # psycopg 3
+                with bruto.copy(comando) as copia:
+                    copia.write(dados.getvalue())
+            else:  # psycopg 2
+                dados.seek(0)
+                bruto.copy_expert(comando, dados)
+
+    @staticmethod
+    def _texto(valor):
+        if valor is None:
+            return '\\N'
+        if isinstance(valor, bool):
+            return 't' if valor else 'f'
+        if isinstance(valor, datetime):
+            return valor.isoformat()
+        return str(valor).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
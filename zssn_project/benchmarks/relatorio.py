@@ -0,0 +1,107 @@
+"""
+Relatório de latência, vazão e consultas de uma execução de carga
+
+O relatório é um JSON que pode ser salvo e comparado com o de outra
+execução (ex.: antes e depois de uma otimização).
+"""
+
+import json
+import math
+import platform
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+
+def percentil(valores_ordenados, p):
+    """Percentil pelo método do posto mais próximo"""
+    if not valores_ordenados:
+        return 0.0
+    posto = min(len(valores_ordenados), max(1, math.ceil(p / 100 * len(valores_ordenados)))) - 1
+    return valores_ordenados[posto]
+
+
+def _estatisticas(amostras, duracao_total):
+    duracoes = sorted(amostra.duracao for amostra in amostras)
+    consultas = [amostra.consultas for amostra in amostras if amostra.consultas is not None]
+    return {
+        'requisicoes': len(amostras),
+        'vazao_rps': round(len(amostras) / duracao_total, 2) if duracao_total else 0.0,
+        'p50_ms': round(percentil(duracoes, 50) * 1000, 3),
+        'p90_ms': round(percentil(duracoes, 90) * 1000, 3),
+        'p99_ms': round(percentil(duracoes, 99) * 1000, 3),
+        'max_ms': round(duracoes[-1] * 1000, 3) if duracoes else 0.0,
+        'media_ms': round(sum(duracoes) / len(duracoes) * 1000, 3) if duracoes else 0.0,
+        'consultas_por_requisicao': round(sum(consultas) / len(consultas), 2) if consultas else None,
+        'bytes_por_requisicao': round(sum(amostra.bytes for amostra in amostras) / len(amostras), 1) if amostras else 0,
+        'status': {str(status): quantidade for status, quantidade in sorted(Counter(a.status for a in amostras).items())},
+    }
+
+
+def montar_relatorio(amostras, duracao_total, parametros):
+    """Consolida as amostras no total e por operação"""
+    por_operacao = defaultdict(list)
+    for amostra in amostras:
+        por_operacao[amostra.operacao].append(amostra)
+
+    return {
+        'data': datetime.now(timezone.utc).isoformat(),
+        'ambiente': {'python': platform.python_version(), 'plataforma': platform.platform()},
+        'parametros': parametros,
+        'duracao_s': round(duracao_total, 3),
+        'total': _estatisticas(amostras, duracao_total),
+        # A vazão por operação usa a duração total da carga
+        'operacoes': {
+            operacao: _estatisticas(lista, duracao_total)
+            for operacao, lista in sorted(por_operacao.items())
+        },
+    }
+
+
+def salvar(relatorio, caminho):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+
+def carregar(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def formatar(relatorio):
+    """Tabela de texto com o total e cada operação"""
+    linhas = [
+        f"{'operação':<22} {'req':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'sql/req':>8}  status",
+    ]
+    for nome, estatisticas in [('TOTAL', relatorio['total']), *relatorio['operacoes'].items()]:
+        consultas = estatisticas['consultas_por_requisicao']
+        linhas.append(
+            f"{nome:<22} {estatisticas['requisicoes']:>6} {estatisticas['vazao_rps']:>9.1f} "
+            f"{estatisticas['p50_ms']:>9.2f} {estatisticas['p99_ms']:>9.2f} "
+            f"{'-' if consultas is None else f'{consultas:.1f}':>8}  "
+            + ' '.join(f'{status}:{quantidade}' for status, quantidade in estatisticas['status'].items())
+        )
+    return '\n'.join(linhas)
+
+
+def comparar(base, atual):
+    """Tabela com a variação de p50, p99, vazão e consultas entre dois relatórios"""
+
+    def variacao(antes, depois):
+        if antes in (None, 0) or depois is None:
+            return '     -'
+        return f'{(depois - antes) / antes:+6.1%}'
+
+    linhas = [f"{'operação':<22} {'p50':>7} {'p99':>7} {'req/s':>7} {'sql/req':>7}"]
+    pares = [('TOTAL', base['total'], atual['total'])]
+    pares += [
+        (operacao, base['operacoes'][operacao], atual['operacoes'][operacao])
+        for operacao in sorted(set(base['operacoes']) & set(atual['operacoes']))
+    ]
+    for nome, antes, depois in pares:
+        linhas.append(
+            f"{nome:<22} {variacao(antes['p50_ms'], depois['p50_ms']):>7} "
+            f"{variacao(antes['p99_ms'], depois['p99_ms']):>7} "
+            f"{variacao(antes['vazao_rps'], depois['vazao_rps']):>7} "
+            f"{variacao(antes['consultas_por_requisicao'], depois['consultas_por_requisicao']):>7}"
+        )
+    return '\n'.join(linhas)
@@ -1,14 +1,69 @@
+import json
+
 from django.contrib import admin
-from .models import Sobreviventes, ItemInventario, ReporteInfeccao
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import (
+    Sobreviventes, ItemInventario, IntencaoEscambo, ReporteInfeccao, SobreviventeArquivado, Tarefa, HistoricoRelatorio
+)
+
+
+class PaginadorContagemEstimada(Paginator):
+    """Paginador que usa a estimativa do PostgreSQL no lugar de COUNT(*) em tabelas grandes
+
+    Sem filtros, a estimativa vem de ``pg_class.reltuples``; com filtros, do
+    número de linhas previsto pelo planejador (EXPLAIN). Quando a estimativa
+    fica abaixo de LIMITE_CONTAGEM_EXATA, faz a contagem exata, que é barata.
+    """
+
+    LIMITE_CONTAGEM_EXATA = 10000
+
+    @cached_property
+    def count(self):
+        estimativa = self._estimar()
+        if estimativa is None or estimativa < self.LIMITE_CONTAGEM_EXATA:
+            return super().count
+        return estimativa
+
+    def _estimar(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                linha = cursor.fetchone()
+                return int(linha[0]) if linha and linha[0] >= 0 else None
+
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plano = cursor.fetchone()[0]
+            if isinstance(plano, str):
+                plano = json.loads(plano)
+            return int(plano[0]['Plan']['Plan Rows'])
+
+
+class TabelaGrandeAdmin(admin.ModelAdmin):
+    """Configurações comuns aos admins de tabelas com muitas linhas"""
+
+    paginator = PaginadorContagemEstimada
+    # Evita o segundo COUNT(*) da tabela inteira ao filtrar ou buscar
+    show_full_result_count = False
 
 
 @admin.register(Sobreviventes)
-class SobreviventeAdmin(admin.ModelAdmin):
+class SobreviventeAdmin(TabelaGrandeAdmin):
     """Configuração do admin para Sobreviventes"""
 
     list_display = ['nome', 'idade', 'sexo', 'infectado', 'data_criacao']
     list_filter = ['infectado', 'sexo', 'data_criacao']
-    search_fields = ['nome']
+    # Busca por prefixo, atendida pelo índice em UPPER(nome)
+    search_fields = ['^nome']
     readonly_fields = ['data_criacao', 'data_atualizacao']
 
     fieldsets = (
@@ -29,19 +84,80 @@ class SobreviventeAdmin(admin.ModelAdmin):
 
 
 @admin.register(ItemInventario)
-class ItemInventarioAdmin(admin.ModelAdmin):
+class ItemInventarioAdmin(TabelaGrandeAdmin):
     """Configuração do admin para Itens do Inventário"""
 
     list_display = ['sobrevivente', 'tipo_item', 'quantidade', 'calcular_pontos']
     list_filter = ['tipo_item', 'sobrevivente__infectado']
-    search_fields = ['sobrevivente__nome']
+    list_select_related = ['sobrevivente']
+    search_fields = ['^sobrevivente__nome']
+    autocomplete_fields = ['sobrevivente']
+
+
+@admin.register(IntencaoEscambo)
+class IntencaoEscamboAdmin(TabelaGrandeAdmin):
+    """Configuração do admin para Intenções de Escambo"""
+
+    list_display = [
+        'sobrevivente', 'quantidade_oferecida', 'tipo_oferecido', 'quantidade_desejada', 'tipo_desejado',
+        'ativa', 'data_criacao'
+    ]
+    list_filter = ['ativa', 'tipo_oferecido', 'tipo_desejado']
+    list_select_related = ['sobrevivente']
+    search_fields = ['^sobrevivente__nome']
+    readonly_fields = ['data_criacao', 'data_conclusao']
+    autocomplete_fields = ['sobrevivente']
 
 
 @admin.register(ReporteInfeccao)
-class ReporteInfeccaoAdmin(admin.ModelAdmin):
+class ReporteInfeccaoAdmin(TabelaGrandeAdmin):
     """Configuração do admin para Reportes de Infecção"""
 
     list_display = ['sobrevivente_reportado', 'sobrevivente_reportador', 'data_reporte']
     list_filter = ['data_reporte']
-    search_fields = ['sobrevivente_reportado__nome', 'sobrevivente_reportador__nome']
+    list_select_related = ['sobrevivente_reportado', 'sobrevivente_reportador']
+    search_fields = ['^sobrevivente_reportado__nome', '^sobrevivente_reportador__nome']
     readonly_fields = ['data_reporte']
+    autocomplete_fields = ['sobrevivente_reportado', 'sobrevivente_reportador']
+
+
+@admin.register(SobreviventeArquivado)
+class SobreviventeArquivadoAdmin(TabelaGrandeAdmin):
+    """Configuração do admin para Sobreviventes Arquivados (somente leitura)"""
+
+    list_display = ['id', 'nome', 'idade', 'sexo', 'data_arquivamento']
+    search_fields = ['^nome']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # Excluir daqui deixaria o ResumoArquivo (e os relatórios) inconsistentes
+        return False
+
+
+@admin.register(Tarefa)
+class TarefaAdmin(TabelaGrandeAdmin):
+    """Configuração do admin para as Tarefas em segundo plano"""
+
+    list_display = ['id', 'nome', 'status', 'prioridade', 'tentativas', 'executar_apos', 'data_fim']
+    list_filter = ['status', 'nome']
+    readonly_fields = ['data_criacao', 'data_inicio', 'data_fim', 'trabalhador', 'erro', 'resultado']
+
+
+@admin.register(HistoricoRelatorio)
+class HistoricoRelatorioAdmin(TabelaGrandeAdmin):
+    """Configuração do admin para o Histórico de Relatórios (somente leitura)"""
+
+    list_display = ['inicio', 'granularidade', 'amostras', 'data_atualizacao']
+    list_filter = ['granularidade']
+    date_hierarchy = 'inicio'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class SobreviventeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Sobrevivente'
+
+    def ready(self):
+        from .metricas import instalar_wrapper_sql
+        # Importa os módulos que registram tarefas da fila (ver fila.py)
+        from . import (  # noqa: F401
+            arquivamento, escambo_circular, eventos, fila, grafo_reportes, historico, mixins, perfilador, relatorios
+        )
+
+        # Mede as consultas SQL de cada requisição (ver MetricasMiddleware)
+        connection_created.connect(instalar_wrapper_sql, dispatch_uid='zssn_metricas_sql')
@@ -0,0 +1,104 @@
+"""
+Arquivamento de sobreviventes infectados
+
+Infectados sem alterações há mais de ARQUIVAMENTO_DIAS saem das tabelas
+principais em lotes: cada lote, em uma transação, copia os sobreviventes
+para SobreviventeArquivado (inventário e reportes recebidos compactados em
+JSON), soma seus itens ao ResumoArquivo e remove as linhas originais.
+
+Os reportes feitos por um arquivado continuam valendo para quem foi
+reportado, com o reportador nulo. O detalhe por id consulta o arquivo
+quando o sobrevivente não está nas tabelas principais, e os relatórios
+somam o ResumoArquivo aos totais de infectados.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .fila import tarefa
+from .models import Sobreviventes, ItemInventario, ReporteInfeccao, SobreviventeArquivado, ResumoArquivo
+
+CAMPOS = ('id', 'nome', 'idade', 'sexo', 'latitude', 'longitude', 'data_criacao', 'data_atualizacao')
+
+
+@tarefa(intervalo=24 * 3600, prioridade=-5)
+def arquivar_infectados(dias=None, lote=None, limite=None):
+    """Arquiva os infectados antigos em lotes; retorna quantos foram arquivados"""
+    dias = getattr(settings, 'ARQUIVAMENTO_DIAS', 30) if dias is None else dias
+    lote = lote or getattr(settings, 'ARQUIVAMENTO_LOTE', 1000)
+    corte = timezone.now() - timedelta(days=dias)
+    arquivados = 0
+
+    while limite is None or arquivados < limite:
+        tamanho = lote if limite is None else min(lote, limite - arquivados)
+        with transaction.atomic():
+            ids = list(
+                Sobreviventes.objects.select_for_update(skip_locked=True)
+                .filter(infectado=True, data_atualizacao__lt=corte)
+                .order_by('id')
+                .values_list('id', flat=True)[:tamanho]
+            )
+            if not ids:
+                break
+            _arquivar_lote(ids)
+        arquivados += len(ids)
+
+    return arquivados
+
+
+def candidatos_arquivamento(dias=None):
+    """Quantos infectados seriam arquivados agora"""
+    dias = getattr(settings, 'ARQUIVAMENTO_DIAS', 30) if dias is None else dias
+    corte = timezone.now() - timedelta(days=dias)
+    return Sobreviventes.objects.filter(infectado=True, data_atualizacao__lt=corte).count()
+
+
+def _arquivar_lote(ids):
+    """Move um lote de sobreviventes (já travados) para o arquivo"""
+    inventarios = defaultdict(list)
+    totais_itens = defaultdict(int)
+    for sobrevivente_id, tipo_item, quantidade in (
+        ItemInventario.objects.filter(sobrevivente_id__in=ids).order_by('id')
+        .values_list('sobrevivente_id', 'tipo_item', 'quantidade')
+    ):
+        inventarios[sobrevivente_id].append([tipo_item, quantidade])
+        totais_itens[tipo_item] += quantidade
+
+    reportes = defaultdict(list)
+    for reportado_id, reportador_id, data_reporte in (
+        ReporteInfeccao.objects.filter(sobrevivente_reportado_id__in=ids).order_by('id')
+        .values_list('sobrevivente_reportado_id', 'sobrevivente_reportador_id', 'data_reporte')
+    ):
+        reportes[reportado_id].append([reportador_id, data_reporte])
+
+    SobreviventeArquivado.objects.bulk_create([
+        SobreviventeArquivado(**linha, inventario=inventarios[linha['id']], reportes=reportes[linha['id']])
+        for linha in Sobreviventes.objects.filter(id__in=ids).values(*CAMPOS)
+    ])
+
+    resumo, _ = ResumoArquivo.objects.select_for_update().get_or_create(pk=1)
+    resumo.sobreviventes += len(ids)
+    for tipo_item, quantidade in totais_itens.items():
+        resumo.itens[tipo_item] = resumo.itens.get(tipo_item, 0) + quantidade
+    resumo.save()
+
+    # O reportador é desvinculado antes para que os reportes feitos não sejam apagados em cascata
+    ReporteInfeccao.objects.filter(sobrevivente_reportador_id__in=ids).update(sobrevivente_reportador=None)
+    ReporteInfeccao.objects.filter(sobrevivente_reportado_id__in=ids).delete()
+    ItemInventario.objects.filter(sobrevivente_id__in=ids).delete()
+    Sobreviventes.objects.filter(id__in=ids).delete()
+
+
+def resumo_arquivo():
+    """(sobreviventes arquivados, totais de itens por tipo)"""
+    resumo = ResumoArquivo.objects.filter(pk=1).values_list('sobreviventes', 'itens').first()
+    return resumo or (0, {})
+
+
+async def aresumo_arquivo():
+    resumo = await ResumoArquivo.objects.filter(pk=1).values_list('sobreviventes', 'itens').afirst()
+    return resumo or (0, {})
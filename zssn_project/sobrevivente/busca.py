@@ -0,0 +1,107 @@
+"""
+Busca de sobreviventes pelo nome
+
+A busca compara o termo com ``Sobreviventes.nome_normalizado`` (sem acentos e
+em minúsculas) em duas fases:
+
+1. prefixo: ``nome_normalizado LIKE 'termo%'``, atendida pelo índice btree
+   (varchar_pattern_ops no PostgreSQL) já na ordem alfabética;
+2. aproximada, para termos com 3+ caracteres: semelhança de palavra do
+   pg_trgm (``termo <% nome_normalizado``), ordenada pela distância com o
+   índice GiST de trigramas. Sem o pg_trgm, procura o termo no início de
+   qualquer palavra do nome.
+
+Os resultados de prefixo vêm sempre antes dos aproximados. A paginação não
+conta o total de resultados: cada página busca uma linha a mais para saber
+se existe a próxima.
+"""
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, TextField, Value
+from django.db.models.functions import Cast
+
+from .models import Sobreviventes
+from .normalizacao import normalizar_nome
+
+CAMPOS = ('id', 'nome', 'idade', 'sexo', 'infectado')
+TAMANHO_MINIMO_APROXIMADA = 3
+RELEVANCIA_PREFIXO = 1.0
+RELEVANCIA_PALAVRA = 0.5
+
+_trigrama_por_banco = {}
+
+
+class ContemPalavraSemelhante(Func):
+    """``termo <% campo``: o campo tem uma palavra semelhante ao termo (pg_trgm)"""
+
+    template = '%(expressions)s'
+    arg_joiner = ' <%% '
+    output_field = BooleanField()
+
+
+class DistanciaPalavra(Func):
+    """``termo <<-> campo``: 1 - word_similarity, ordenável pelo índice GiST"""
+
+    template = '(%(expressions)s)'
+    arg_joiner = ' <<-> '
+    output_field = FloatField()
+
+
+def trigrama_disponivel(banco):
+    """Indica se o banco tem a extensão pg_trgm (verificado uma vez por banco)"""
+    if banco not in _trigrama_por_banco:
+        connection = connections[banco]
+        disponivel = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                disponivel = cursor.fetchone() is not None
+        _trigrama_por_banco[banco] = disponivel
+    return _trigrama_por_banco[banco]
+
+
+def buscar_sobreviventes(termo, pagina=1, tamanho=20):
+    """Retorna (resultados da página, tem_proxima) para o termo de busca"""
+    termo = normalizar_nome(termo)
+    inicio = (pagina - 1) * tamanho
+    necessarios = tamanho + 1
+
+    prefixo = Sobreviventes.objects.filter(nome_normalizado__startswith=termo).order_by('nome_normalizado', 'id')
+    resultados = [
+        {**linha, 'relevancia': RELEVANCIA_PREFIXO}
+        for linha in prefixo.values(*CAMPOS)[inicio:inicio + necessarios]
+    ]
+
+    if len(resultados) < necessarios and len(termo) >= TAMANHO_MINIMO_APROXIMADA:
+        # Página além dos resultados de prefixo: só então é preciso saber quantos são
+        total_prefixo = inicio + len(resultados) if resultados or inicio == 0 else prefixo.count()
+        deslocamento = max(0, inicio - total_prefixo)
+        resultados += _aproximados(termo, deslocamento, necessarios - len(resultados))
+
+    return resultados[:tamanho], len(resultados) > tamanho
+
+
+def _aproximados(termo, deslocamento, quantidade):
+    """Resultados que não começam pelo termo, do mais ao menos semelhante"""
+    queryset = Sobreviventes.objects.exclude(nome_normalizado__startswith=termo)
+
+    if not trigrama_disponivel(queryset.db):
+        linhas = (
+            queryset.filter(nome_normalizado__contains=f' {termo}')
+            .order_by('nome_normalizado', 'id')
+            .values(*CAMPOS)[deslocamento:deslocamento + quantidade]
+        )
+        return [{**linha, 'relevancia': RELEVANCIA_PALAVRA} for linha in linhas]
+
+    termo_sql = Cast(Value(termo), TextField())
+    linhas = (
+        queryset.filter(ContemPalavraSemelhante(termo_sql, F('nome_normalizado')))
+        .annotate(distancia=DistanciaPalavra(termo_sql, F('nome_normalizado')))
+        .order_by('distancia', 'id')
+        .values(*CAMPOS, 'distancia')[deslocamento:deslocamento + quantidade]
+    )
+    resultados = []
+    for linha in linhas:
+        distancia = linha.pop('distancia')
+        resultados.append({**linha, 'relevancia': round(1 - distancia, 3)})
+    return resultados
@@ -0,0 +1,263 @@
+"""
+Escambo circular entre vários sobreviventes
+
+O escambo direto só fecha quando duas pessoas querem exatamente o que a
+outra tem. Aqui cada sobrevivente saudável registra intenções
+(IntencaoEscambo: "ofereço 3 águas por 12 munições", de mesmo valor em
+PONTOS_ITENS) e o solucionador procura ciclos A → B → C → A em que cada
+participante deseja exatamente o lote que o seguinte oferece. Em um ciclo
+assim todos entregam e recebem o mesmo número de pontos.
+
+O grafo é montado sobre lotes ``(tipo, quantidade)``: cada intenção é uma
+aresta do lote oferecido para o lote desejado, agrupada com as demais
+intenções da mesma aresta. Os ciclos simples de até ``tamanho_maximo``
+arestas são enumerados nesse grafo de lotes (pequeno: lotes de valores
+diferentes nunca se ligam) e então preenchidos, do menor para o maior, com
+as intenções mais antigas de cada aresta, sem repetir sobreviventes. O custo
+é linear no número de intenções.
+
+Cada ciclo é liquidado em sua própria transação, com as linhas dos
+participantes, das intenções e dos itens travadas em ordem de id; se algo
+mudou desde a carga (intenção cancelada, infecção, inventário insuficiente)
+o ciclo é descartado sem afetar os demais.
+"""
+
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .eventos import publicar_evento
+from .fila import tarefa
+from .models import Sobreviventes, ItemInventario, IntencaoEscambo, TipoEvento
+
+Intencao = namedtuple('Intencao', [
+    'id', 'sobrevivente_id', 'tipo_oferecido', 'quantidade_oferecida', 'tipo_desejado', 'quantidade_desejada'
+])
+
+
+class CicloInvalido(ValueError):
+    """O ciclo não pode mais ser liquidado com o estado atual do banco"""
+
+
+def carregar_intencoes():
+    """Intenções ativas de sobreviventes saudáveis que ainda têm o lote oferecido"""
+    possui_lote = ItemInventario.objects.filter(
+        sobrevivente_id=OuterRef('sobrevivente_id'),
+        tipo_item=OuterRef('tipo_oferecido'),
+        quantidade__gte=OuterRef('quantidade_oferecida'),
+    )
+    consulta = (
+        IntencaoEscambo.objects.filter(ativa=True, sobrevivente__infectado=False)
+        .filter(Exists(possui_lote))
+        .order_by('id')
+        .values_list(*Intencao._fields)
+    )
+    return [Intencao(*linha) for linha in consulta.iterator(chunk_size=10000)]
+
+
+def encontrar_ciclos(intencoes, tamanho_maximo=4, limite=None):
+    """Ciclos disjuntos (em sobreviventes) de 2 a ``tamanho_maximo`` participantes
+
+    ``intencoes`` deve vir em ordem de chegada. Cada ciclo é uma lista de
+    intenções em que o participante ``i`` deseja o lote oferecido pelo
+    participante ``i + 1`` (o último, o do primeiro).
+    """
+    pontos = ItemInventario.PONTOS_ITENS
+    arestas = defaultdict(list)
+    for intencao in intencoes:
+        if intencao.tipo_oferecido == intencao.tipo_desejado:
+            continue
+        if intencao.quantidade_oferecida * pontos[intencao.tipo_oferecido] != \
+                intencao.quantidade_desejada * pontos[intencao.tipo_desejado]:
+            continue
+        oferecido = (intencao.tipo_oferecido, intencao.quantidade_oferecida)
+        desejado = (intencao.tipo_desejado, intencao.quantidade_desejada)
+        arestas[oferecido, desejado].append(intencao)
+
+    cursores = dict.fromkeys(arestas, 0)
+    ocupados = set()
+    ciclos = []
+    for ciclo_lotes in sorted(_ciclos_simples(arestas, tamanho_maximo), key=len):
+        # O participante i oferece o lote i e deseja o lote i + 1
+        chaves = [(ciclo_lotes[i], ciclo_lotes[(i + 1) % len(ciclo_lotes)]) for i in range(len(ciclo_lotes))]
+        while limite is None or len(ciclos) < limite:
+            escolhidas = _preencher(chaves, arestas, cursores, ocupados)
+            if escolhidas is None:
+                break
+            ocupados.update(intencao.sobrevivente_id for intencao in escolhidas)
+            ciclos.append(escolhidas)
+    return ciclos
+
+
+def _ciclos_simples(arestas, tamanho_maximo):
+    """Ciclos simples do grafo de lotes com até ``tamanho_maximo`` nós
+
+    Cada ciclo é gerado uma vez, a partir do seu menor nó: a busca a partir
+    de ``inicio`` só visita nós maiores que ele.
+    """
+    vizinhos = defaultdict(set)
+    for oferecido, desejado in arestas:
+        vizinhos[oferecido].add(desejado)
+    ordem = {lote: indice for indice, lote in enumerate(sorted(vizinhos))}
+
+    for inicio in sorted(vizinhos):
+        caminho = [inicio]
+        no_caminho = {inicio}
+        pilha = [iter(sorted(vizinhos[inicio]))]
+        while pilha:
+            proximo = next(pilha[-1], None)
+            if proximo is None:
+                pilha.pop()
+                no_caminho.discard(caminho.pop())
+            elif proximo == inicio:
+                yield list(caminho)
+            elif proximo not in no_caminho and ordem.get(proximo, -1) > ordem[inicio] \
+                    and len(caminho) < tamanho_maximo:
+                caminho.append(proximo)
+                no_caminho.add(proximo)
+                pilha.append(iter(sorted(vizinhos[proximo])))
+
+
+def _preencher(chaves, arestas, cursores, ocupados):
+    """Uma intenção livre por aresta do ciclo, sem repetir sobreviventes, ou None"""
+    escolhidas = []
+    no_ciclo = set()
+    for chave in chaves:
+        fila = arestas[chave]
+        # Intenções de sobreviventes já usados nunca voltam a servir: o cursor avança
+        indice = cursores[chave]
+        while indice < len(fila) and fila[indice].sobrevivente_id in ocupados:
+            indice += 1
+        cursores[chave] = indice
+        while indice < len(fila) and (fila[indice].sobrevivente_id in no_ciclo
+                                      or fila[indice].sobrevivente_id in ocupados):
+            indice += 1
+        if indice == len(fila):
+            return None
+        escolhidas.append(fila[indice])
+        no_ciclo.add(fila[indice].sobrevivente_id)
+    return escolhidas
+
+
+def liquidar_ciclo(intencao_ids):
+    """Executa as trocas de um ciclo (ids na ordem do ciclo) em uma transação
+
+    Cada participante entrega o lote oferecido a quem o deseja (o anterior no
+    ciclo) e recebe o lote oferecido pelo seguinte. Levanta CicloInvalido se
+    o ciclo não fecha mais.
+    """
+    with transaction.atomic():
+        sobrevivente_ids = sorted(
+            IntencaoEscambo.objects.filter(id__in=intencao_ids).values_list('sobrevivente_id', flat=True)
+        )
+        # Travas sempre na mesma ordem (sobreviventes, intenções, itens, por id) para evitar deadlocks
+        participantes = {
+            sobrevivente.id: sobrevivente
+            for sobrevivente in Sobreviventes.objects.select_for_update().filter(id__in=sobrevivente_ids).order_by('id')
+        }
+        intencoes = IntencaoEscambo.objects.select_for_update().filter(id__in=intencao_ids).order_by('id').in_bulk()
+
+        if len(intencoes) != len(intencao_ids) or len(set(sobrevivente_ids)) != len(intencao_ids):
+            raise CicloInvalido('Intenção removida ou sobrevivente repetido no ciclo.')
+        if len(participantes) != len(sobrevivente_ids):
+            raise CicloInvalido('Participante removido (arquivado?) desde a busca.')
+        ciclo = [intencoes[intencao_id] for intencao_id in intencao_ids]
+        for posicao, intencao in enumerate(ciclo):
+            seguinte = ciclo[(posicao + 1) % len(ciclo)]
+            if not intencao.ativa:
+                raise CicloInvalido(f'A intenção {intencao.id} não está mais ativa.')
+            if participantes[intencao.sobrevivente_id].infectado:
+                raise CicloInvalido(f'O sobrevivente {intencao.sobrevivente_id} está infectado.')
+            if (intencao.tipo_desejado, intencao.quantidade_desejada) != \
+                    (seguinte.tipo_oferecido, seguinte.quantidade_oferecida):
+                raise CicloInvalido(f'A intenção {seguinte.id} não oferece o que a {intencao.id} deseja.')
+
+        itens = {
+            (item.sobrevivente_id, item.tipo_item): item
+            for item in ItemInventario.objects.select_for_update().filter(sobrevivente_id__in=sobrevivente_ids).order_by('id')
+        }
+        saldos = defaultdict(int)
+        for posicao, intencao in enumerate(ciclo):
+            anterior = ciclo[posicao - 1]
+            saldos[intencao.sobrevivente_id, intencao.tipo_oferecido] -= intencao.quantidade_oferecida
+            saldos[anterior.sobrevivente_id, intencao.tipo_oferecido] += intencao.quantidade_oferecida
+
+        alterados, removidos, novos = [], [], []
+        for (sobrevivente_id, tipo_item), saldo in saldos.items():
+            item = itens.get((sobrevivente_id, tipo_item))
+            quantidade = (item.quantidade if item else 0) + saldo
+            if quantidade < 0:
+                raise CicloInvalido(f'O sobrevivente {sobrevivente_id} não possui {tipo_item} suficiente.')
+            if item is None:
+                if quantidade:
+                    novos.append(ItemInventario(sobrevivente_id=sobrevivente_id, tipo_item=tipo_item, quantidade=quantidade))
+            elif quantidade == 0:
+                removidos.append(item.id)
+            elif saldo:
+                item.quantidade = quantidade
+                alterados.append(item)
+        ItemInventario.objects.filter(id__in=removidos).delete()
+        ItemInventario.objects.bulk_update(alterados, ['quantidade'])
+        ItemInventario.objects.bulk_create(novos)
+
+        IntencaoEscambo.objects.filter(id__in=intencao_ids).update(ativa=False, data_conclusao=timezone.now())
+
+        participantes_ciclo = [intencao.sobrevivente_id for intencao in ciclo]
+        for posicao, intencao in enumerate(ciclo):
+            seguinte = ciclo[(posicao + 1) % len(ciclo)]
+            publicar_evento(TipoEvento.ESCAMBO, intencao.sobrevivente_id, {
+                'ciclo': participantes_ciclo,
+                'sobrevivente_destino_id': ciclo[posicao - 1].sobrevivente_id,
+                'itens_oferecidos': [{'tipo_item': intencao.tipo_oferecido, 'quantidade': intencao.quantidade_oferecida}],
+                'itens_recebidos': [{'tipo_item': seguinte.tipo_oferecido, 'quantidade': seguinte.quantidade_oferecida}],
+            })
+    return participantes_ciclo
+
+
+@tarefa(intervalo=600)
+def resolver_escambos(tamanho_maximo=None, limite=None, simular=False):
+    """Encontra os ciclos de escambo e liquida cada um; com ``simular`` apenas os lista"""
+    tamanho_maximo = tamanho_maximo or getattr(settings, 'ESCAMBO_CIRCULAR_TAMANHO_MAXIMO', 4)
+    limite = limite or getattr(settings, 'ESCAMBO_CIRCULAR_LIMITE', 1000)
+
+    inicio = time.perf_counter()
+    intencoes = carregar_intencoes()
+    carga_ms = (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    ciclos = encontrar_ciclos(intencoes, tamanho_maximo, limite)
+    busca_ms = (time.perf_counter() - inicio) * 1000
+
+    liquidados, falhas = [], []
+    for ciclo in ciclos:
+        descricao = {
+            'intencoes': [intencao.id for intencao in ciclo],
+            'participantes': [intencao.sobrevivente_id for intencao in ciclo],
+            'pontos': ciclo[0].quantidade_oferecida * ItemInventario.PONTOS_ITENS[ciclo[0].tipo_oferecido],
+        }
+        if simular:
+            liquidados.append(descricao)
+            continue
+        try:
+            liquidar_ciclo(descricao['intencoes'])
+            liquidados.append(descricao)
+        except CicloInvalido as erro:
+            falhas.append({**descricao, 'erro': str(erro)})
+
+    return {
+        'resumo': {
+            'intencoes': len(intencoes),
+            'ciclos': len(ciclos),
+            'liquidados': 0 if simular else len(liquidados),
+            'falhas': len(falhas),
+            'simulacao': simular,
+            'carga_ms': round(carga_ms, 1),
+            'busca_ms': round(busca_ms, 1),
+        },
+        'ciclos': liquidados,
+        'falhas': falhas,
+    }
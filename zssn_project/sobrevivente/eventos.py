@@ -0,0 +1,165 @@
+"""
+Feed de alterações (infecções, escambos e inventário)
+
+As escritas gravam um EventoOutbox na mesma transação (``publicar_evento``),
+então um evento só fica visível depois do commit. Um único leitor por
+processo consulta o outbox e distribui os eventos aos clientes conectados
+via Server-Sent Events; quem reconecta com ``Last-Event-ID`` recebe antes
+os eventos que perdeu.
+"""
+
+import asyncio
+import weakref
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .fila import tarefa
+from .models import EventoOutbox
+from .renderers import JSONRapidoRenderer
+
+
+def publicar_evento(tipo, sobrevivente_id, dados):
+    """Grava um evento no outbox; deve ser chamado dentro da transação da escrita"""
+    return EventoOutbox.objects.create(tipo=tipo, sobrevivente_id=sobrevivente_id, dados=dados)
+
+
+@tarefa(intervalo=3600, prioridade=-10)
+def limpar_eventos_antigos():
+    """Remove eventos mais antigos que EVENTOS_RETENCAO_DIAS; retorna quantos foram removidos"""
+    limite = timezone.now() - timedelta(days=getattr(settings, 'EVENTOS_RETENCAO_DIAS', 7))
+    removidos, _ = EventoOutbox.objects.filter(data_criacao__lt=limite).delete()
+    return removidos
+
+
+async def aler_eventos(depois_de, limite=500):
+    """Eventos com id maior que ``depois_de``, em ordem e sem pular lacunas recentes
+
+    Ids são reservados antes do commit, então uma transação mais lenta pode
+    ficar visível depois de outra com id maior. Ao encontrar uma lacuna, os
+    eventos seguintes são retidos por EVENTOS_ESPERA_LACUNA segundos para que
+    o evento atrasado não seja perdido; depois disso a lacuna (transação
+    desfeita) é ignorada.
+    """
+    eventos = [
+        evento async for evento in
+        EventoOutbox.objects.filter(id__gt=depois_de).order_by('id')[:limite]
+    ]
+
+    espera = timedelta(seconds=getattr(settings, 'EVENTOS_ESPERA_LACUNA', 2))
+    agora = timezone.now()
+    esperado = depois_de + 1
+    prontos = []
+    for evento in eventos:
+        if evento.id != esperado and agora - evento.data_criacao < espera:
+            break
+        prontos.append(evento)
+        esperado = evento.id + 1
+    return prontos
+
+
+async def aultimo_id():
+    """Id do evento mais recente (0 se o outbox estiver vazio)"""
+    evento = await EventoOutbox.objects.order_by('-id').only('id').afirst()
+    return evento.id if evento else 0
+
+
+def formatar_sse(evento):
+    """Formata um evento no protocolo Server-Sent Events"""
+    dados = JSONRapidoRenderer().render({
+        'id': evento.id,
+        'tipo': evento.tipo,
+        'sobrevivente_id': evento.sobrevivente_id,
+        'dados': evento.dados,
+        'data_criacao': evento.data_criacao,
+    }).decode('utf-8')
+    return f"id: {evento.id}\nevent: {evento.tipo}\ndata: {dados}\n\n"
+
+
+class Transmissor:
+    """Lê o outbox uma vez por intervalo e repassa os eventos a todos os assinantes"""
+
+    TAMANHO_FILA = 1000
+
+    def __init__(self):
+        self.assinantes = set()
+        self.ultimo_id = None
+        self.tarefa = None
+
+    def assinar(self):
+        fila = asyncio.Queue(maxsize=self.TAMANHO_FILA)
+        self.assinantes.add(fila)
+        if self.tarefa is None or self.tarefa.done():
+            self.tarefa = asyncio.create_task(self._executar())
+        return fila
+
+    def cancelar(self, fila):
+        self.assinantes.discard(fila)
+
+    async def _executar(self):
+        intervalo = getattr(settings, 'EVENTOS_INTERVALO_CONSULTA', 1)
+        if self.ultimo_id is None:
+            self.ultimo_id = await aultimo_id()
+
+        while self.assinantes:
+            for evento in await aler_eventos(self.ultimo_id):
+                self.ultimo_id = evento.id
+                for fila in list(self.assinantes):
+                    try:
+                        fila.put_nowait(evento)
+                    except asyncio.QueueFull:
+                        # Cliente lento: é removido e volta a ler direto do outbox
+                        self.assinantes.discard(fila)
+            await asyncio.sleep(intervalo)
+
+
+# Um transmissor por event loop (o runserver cria um loop por requisição assíncrona)
+_transmissores = weakref.WeakKeyDictionary()
+
+
+def obter_transmissor():
+    loop = asyncio.get_running_loop()
+    if loop not in _transmissores:
+        _transmissores[loop] = Transmissor()
+    return _transmissores[loop]
+
+
+async def fluxo_eventos(ultimo_enviado):
+    """Gera o fluxo SSE a partir do evento seguinte a ``ultimo_enviado``"""
+    transmissor = obter_transmissor()
+    heartbeat = getattr(settings, 'EVENTOS_HEARTBEAT', 15)
+
+    yield f"retry: {getattr(settings, 'EVENTOS_RETRY_MS', 3000)}\n\n"
+
+    fila = transmissor.assinar()
+    try:
+        while True:
+            if ultimo_enviado is not None:
+                # Recupera do outbox o que foi perdido antes de seguir ao vivo
+                while True:
+                    perdidos = await aler_eventos(ultimo_enviado)
+                    if not perdidos:
+                        break
+                    for evento in perdidos:
+                        ultimo_enviado = evento.id
+                        yield formatar_sse(evento)
+            elif transmissor.ultimo_id is not None:
+                ultimo_enviado = transmissor.ultimo_id
+            else:
+                ultimo_enviado = await aultimo_id()
+
+            while fila in transmissor.assinantes:
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if evento.id > ultimo_enviado:
+                    ultimo_enviado = evento.id
+                    yield formatar_sse(evento)
+
+            # Foi descartado por lentidão: assina de novo e recupera pelo outbox
+            fila = transmissor.assinar()
+    finally:
+        transmissor.cancelar(fila)
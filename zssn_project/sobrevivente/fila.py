@@ -0,0 +1,192 @@
+"""
+Fila de tarefas em segundo plano guardada no próprio banco (sem broker externo)
+
+Funções registradas com ``@tarefa`` podem ser chamadas normalmente ou
+enfileiradas com ``funcao.enfileirar(**argumentos)``, que grava uma linha em
+``Tarefa`` (na transação corrente, se houver). O comando
+``manage.py trabalhador`` reserva as tarefas prontas com
+``SELECT ... FOR UPDATE SKIP LOCKED``, por prioridade e horário, e as executa
+em um pool de processos.
+
+Uma tarefa que levanta exceção volta para a fila com espera exponencial
+(TAREFAS_ESPERA_RETENTATIVA * 2^(tentativa - 1) segundos) até esgotar
+``max_tentativas``. Tarefas com ``intervalo`` são reagendadas pelo próprio
+trabalhador depois de cada execução.
+"""
+
+import functools
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Tarefa, StatusTarefa
+
+_registro = {}
+
+
+class DefinicaoTarefa:
+    """Função registrada na fila, com os padrões de prioridade, tentativas e intervalo"""
+
+    def __init__(self, nome, funcao, prioridade, max_tentativas, intervalo):
+        functools.update_wrapper(self, funcao)
+        self.nome = nome
+        self.funcao = funcao
+        self.prioridade = prioridade
+        self.max_tentativas = max_tentativas
+        self.intervalo = intervalo
+
+    def __call__(self, *args, **kwargs):
+        return self.funcao(*args, **kwargs)
+
+    def enfileirar(self, prioridade=None, atraso=0, **argumentos):
+        return enfileirar(self.nome, argumentos, prioridade=prioridade, atraso=atraso)
+
+
+def tarefa(nome=None, *, prioridade=0, max_tentativas=3, intervalo=None):
+    """Registra a função como tarefa; ``intervalo`` (segundos) a torna periódica"""
+
+    def registrar(funcao):
+        definicao = DefinicaoTarefa(nome or funcao.__name__, funcao, prioridade, max_tentativas, intervalo)
+        _registro[definicao.nome] = definicao
+        return definicao
+
+    return registrar
+
+
+def obter_definicao(nome):
+    try:
+        return _registro[nome]
+    except KeyError:
+        raise LookupError(f'Tarefa não registrada: {nome}') from None
+
+
+def tarefas_registradas():
+    return dict(_registro)
+
+
+def enfileirar(nome, argumentos=None, prioridade=None, atraso=0):
+    """Cria a tarefa pendente e a retorna"""
+    definicao = obter_definicao(nome)
+    return Tarefa.objects.create(
+        nome=nome,
+        argumentos=argumentos or {},
+        prioridade=definicao.prioridade if prioridade is None else prioridade,
+        max_tentativas=definicao.max_tentativas,
+        executar_apos=timezone.now() + timedelta(seconds=atraso),
+    )
+
+
+def reservar_tarefas(limite, trabalhador):
+    """Marca até ``limite`` tarefas prontas como em execução e retorna seus ids"""
+    agora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Tarefa.objects.select_for_update(skip_locked=True)
+            .filter(status=StatusTarefa.PENDENTE, executar_apos__lte=agora)
+            .order_by('-prioridade', 'executar_apos', 'id')
+            .values_list('id', flat=True)[:limite]
+        )
+        if ids:
+            Tarefa.objects.filter(id__in=ids).update(
+                status=StatusTarefa.EXECUTANDO,
+                trabalhador=trabalhador,
+                tentativas=F('tentativas') + 1,
+                data_inicio=agora,
+                data_fim=None,
+            )
+    return ids
+
+
+def executar_tarefa(tarefa_id):
+    """Executa uma tarefa já reservada e grava o resultado ou a falha"""
+    close_old_connections()
+    try:
+        tarefa = Tarefa.objects.get(id=tarefa_id)
+        try:
+            resultado = obter_definicao(tarefa.nome).funcao(**tarefa.argumentos)
+        except Exception:
+            _registrar_falha(tarefa, traceback.format_exc())
+        else:
+            _registrar_conclusao(tarefa, resultado)
+    finally:
+        close_old_connections()
+    return tarefa_id
+
+
+def _registrar_conclusao(tarefa, resultado):
+    """Grava o resultado; a tarefa já rodou, então uma falha aqui não a devolve à fila"""
+    agora = timezone.now()
+    try:
+        with transaction.atomic():
+            Tarefa.objects.filter(id=tarefa.id).update(
+                status=StatusTarefa.CONCLUIDA, resultado=resultado, erro='', data_fim=agora
+            )
+    except Exception:
+        # Resultado não serializável em JSON ou falha do banco: conclui sem o resultado
+        close_old_connections()
+        Tarefa.objects.filter(id=tarefa.id).update(
+            status=StatusTarefa.CONCLUIDA, resultado=None, data_fim=agora,
+            erro='Tarefa concluída, mas o resultado não pôde ser gravado:\n' + traceback.format_exc(),
+        )
+
+
+def _registrar_falha(tarefa, erro):
+    agora = timezone.now()
+    if tarefa.tentativas < tarefa.max_tentativas:
+        espera = getattr(settings, 'TAREFAS_ESPERA_RETENTATIVA', 10) * 2 ** (tarefa.tentativas - 1)
+        Tarefa.objects.filter(id=tarefa.id).update(
+            status=StatusTarefa.PENDENTE, erro=erro, data_fim=agora,
+            executar_apos=agora + timedelta(seconds=espera),
+        )
+    else:
+        Tarefa.objects.filter(id=tarefa.id).update(status=StatusTarefa.FALHOU, erro=erro, data_fim=agora)
+
+
+def recuperar_tarefas_abandonadas():
+    """Devolve à fila as tarefas em execução há mais de TAREFAS_TEMPO_LIMITE_SEGUNDOS
+
+    Cobre trabalhadores que morreram no meio de uma tarefa. Retorna quantas
+    tarefas foram recuperadas ou dadas como falhas.
+    """
+    agora = timezone.now()
+    limite = agora - timedelta(seconds=getattr(settings, 'TAREFAS_TEMPO_LIMITE_SEGUNDOS', 3600))
+    abandonadas = Tarefa.objects.filter(status=StatusTarefa.EXECUTANDO, data_inicio__lt=limite)
+    erro = 'Tempo limite de execução excedido (trabalhador interrompido?).'
+    recuperadas = abandonadas.filter(tentativas__lt=F('max_tentativas')).update(
+        status=StatusTarefa.PENDENTE, erro=erro, executar_apos=agora
+    )
+    falhas = abandonadas.update(status=StatusTarefa.FALHOU, erro=erro, data_fim=agora)
+    return recuperadas + falhas
+
+
+def agendar_periodicas():
+    """Enfileira as tarefas periódicas que não têm execução pendente ou em andamento"""
+    agora = timezone.now()
+    agendadas = 0
+    for definicao in _registro.values():
+        if not definicao.intervalo:
+            continue
+        tarefas = Tarefa.objects.filter(nome=definicao.nome)
+        if tarefas.filter(status__in=[StatusTarefa.PENDENTE, StatusTarefa.EXECUTANDO]).exists():
+            continue
+        ultima = tarefas.exclude(data_fim=None).order_by('-data_fim').values_list('data_fim', flat=True).first()
+        atraso = 0
+        if ultima is not None:
+            atraso = max(0, (ultima + timedelta(seconds=definicao.intervalo) - agora).total_seconds())
+        enfileirar(definicao.nome, atraso=atraso)
+        agendadas += 1
+    return agendadas
+
+
+@tarefa(intervalo=24 * 3600, prioridade=-10)
+def limpar_tarefas_finalizadas():
+    """Remove tarefas concluídas ou falhas há mais de TAREFAS_RETENCAO_DIAS"""
+    limite = timezone.now() - timedelta(days=getattr(settings, 'TAREFAS_RETENCAO_DIAS', 7))
+    removidas, _ = Tarefa.objects.filter(
+        status__in=[StatusTarefa.CONCLUIDA, StatusTarefa.FALHOU], data_fim__lt=limite
+    ).delete()
+    return {'removidas': removidas}
@@ -0,0 +1,338 @@
+"""
+Análise do grafo de reportes de infecção (reportador → reportado)
+
+O grafo é carregado de uma vez, com um cursor direto, em estruturas CSR
+(``indptr``/``indices``, uma para as arestas de saída e outra para as de
+entrada) sobre índices densos de nós. Com NumPy os passos pesados são
+vetorizados; sem ele, as mesmas estruturas usam ``array`` da biblioteca
+padrão e laços em Python.
+
+A análise procura três sinais de conluio contra a regra dos 3 reportes:
+
+- clusters mútuos: componentes conexos de sobreviventes que se reportaram
+  uns aos outros (A → B e B → A);
+- anomalias de grau de saída: reportadores com muito mais reportes feitos
+  que o normal (z-score robusto, pela mediana e pelo MAD);
+- cliques suspeitos: grupos de 3+ reportadores em que cada par reportou
+  pelo menos ``min_alvos_comuns`` dos mesmos alvos.
+"""
+
+import heapq
+import statistics
+import time
+from array import array
+from collections import Counter, defaultdict
+from itertools import accumulate, combinations
+
+from django.db import connections, router
+
+from .fila import tarefa
+from .models import ReporteInfeccao
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele as estruturas usam array da biblioteca padrão
+    np = None
+
+# Alvos com mais reportadores que isso ficam fora da contagem de pares (custo quadrático)
+MAX_REPORTADORES_POR_ALVO = 50
+MAX_CLIQUES = 10000
+
+
+class GrafoReportes:
+    """Grafo dirigido reportador → reportado em formato CSR"""
+
+    def __init__(self, ids, origens, destinos):
+        """``ids[i]`` é o id do sobrevivente do nó ``i``; origens/destinos são índices de nós"""
+        self.ids = ids
+        self.n = len(ids)
+        self.m = len(origens)
+        self.indptr, self.indices = _csr(self.n, origens, destinos)
+        self.indptr_entrada, self.indices_entrada = _csr(self.n, destinos, origens)
+
+    @classmethod
+    def de_arestas(cls, reportadores, reportados):
+        """Monta o grafo a partir de duas sequências paralelas de ids de sobreviventes"""
+        if np is not None:
+            reportadores = np.asarray(reportadores, dtype=np.int64)
+            reportados = np.asarray(reportados, dtype=np.int64)
+            ids, inversa = np.unique(np.concatenate([reportadores, reportados]), return_inverse=True)
+            return cls(ids, inversa[:len(reportadores)], inversa[len(reportadores):])
+
+        nos = {}
+        ids = array('q')
+        origens, destinos = array('q'), array('q')
+        for sequencia, destino in ((reportadores, origens), (reportados, destinos)):
+            for sobrevivente_id in sequencia:
+                indice = nos.get(sobrevivente_id)
+                if indice is None:
+                    indice = nos[sobrevivente_id] = len(ids)
+                    ids.append(sobrevivente_id)
+                destino.append(indice)
+        return cls(ids, origens, destinos)
+
+    @classmethod
+    def carregar(cls, banco=None, lote=50000):
+        """Lê todos os reportes do banco (réplica, se houver) sem passar pelo ORM"""
+        banco = banco or router.db_for_read(ReporteInfeccao)
+        connection = connections[banco]
+        campos = ReporteInfeccao._meta
+        reportador = connection.ops.quote_name(campos.get_field('sobrevivente_reportador').column)
+        reportado = connection.ops.quote_name(campos.get_field('sobrevivente_reportado').column)
+        tabela = connection.ops.quote_name(campos.db_table)
+
+        reportadores, reportados = array('q'), array('q')
+        with connection.cursor() as cursor:
+            # Reportes de sobreviventes arquivados ficam sem reportador
+            cursor.execute(f'SELECT {reportador}, {reportado} FROM {tabela} WHERE {reportador} IS NOT NULL')
+            while linhas := cursor.fetchmany(lote):
+                for origem, destino in linhas:
+                    reportadores.append(origem)
+                    reportados.append(destino)
+        return cls.de_arestas(reportadores, reportados)
+
+    def grau_saida(self):
+        return _diferencas(self.indptr)
+
+    def grau_entrada(self):
+        return _diferencas(self.indptr_entrada)
+
+    def pares_mutuos(self):
+        """Pares de nós (u < v) com reportes nos dois sentidos"""
+        if not self.m:
+            return []
+        if np is not None:
+            origens = np.repeat(np.arange(self.n, dtype=np.int64), np.diff(self.indptr))
+            # As arestas já estão ordenadas por (origem, destino): as chaves saem ordenadas
+            chaves = origens * self.n + self.indices
+            reversas = self.indices * self.n + origens
+            posicoes = np.minimum(np.searchsorted(chaves, reversas), len(chaves) - 1)
+            mutuas = (chaves[posicoes] == reversas) & (origens < self.indices)
+            return list(zip(origens[mutuas].tolist(), self.indices[mutuas].tolist()))
+
+        arestas = set()
+        pares = []
+        for origem in range(self.n):
+            for destino in self.indices[self.indptr[origem]:self.indptr[origem + 1]]:
+                if (destino, origem) in arestas:
+                    pares.append((min(origem, destino), max(origem, destino)))
+                arestas.add((origem, destino))
+        return pares
+
+    def pares_coreportadores(self, min_alvos_comuns):
+        """Pares de reportadores (u < v) com pelo menos ``min_alvos_comuns`` alvos em comum"""
+        graus = self.grau_entrada()
+        if np is not None:
+            blocos = []
+            for grau in np.unique(graus).tolist():
+                if grau < 2 or grau > MAX_REPORTADORES_POR_ALVO:
+                    continue
+                inicios = self.indptr_entrada[:-1][graus == grau]
+                # Uma linha por alvo, com seus ``grau`` reportadores em ordem crescente
+                matriz = self.indices_entrada[inicios[:, None] + np.arange(grau)]
+                for i, j in combinations(range(grau), 2):
+                    blocos.append(matriz[:, i] * self.n + matriz[:, j])
+            if not blocos:
+                return []
+            chaves, contagens = np.unique(np.concatenate(blocos), return_counts=True)
+            chaves = chaves[contagens >= min_alvos_comuns]
+            return list(zip((chaves // self.n).tolist(), (chaves % self.n).tolist()))
+
+        contagens = Counter()
+        for alvo, grau in enumerate(graus):
+            if 2 <= grau <= MAX_REPORTADORES_POR_ALVO:
+                inicio = self.indptr_entrada[alvo]
+                contagens.update(combinations(self.indices_entrada[inicio:inicio + grau], 2))
+        return [par for par, total in contagens.items() if total >= min_alvos_comuns]
+
+    def alvos(self, no):
+        return self.indices[self.indptr[no]:self.indptr[no + 1]]
+
+
+def analisar(grafo, tamanho_minimo_cluster=3, limiar_anomalia=3.5, min_alvos_comuns=3, limite=50):
+    """Executa as três análises e retorna o resultado com ids de sobreviventes"""
+    inicio = time.perf_counter()
+    mutuos = grafo.pares_mutuos()
+    clusters = _clusters_mutuos(grafo, mutuos, tamanho_minimo_cluster)
+    anomalias = _anomalias_grau_saida(grafo, limiar_anomalia)
+    cliques, total_cliques = _cliques_suspeitos(grafo, min_alvos_comuns)
+
+    return {
+        'resumo': {
+            'sobreviventes': grafo.n,
+            'reportes': grafo.m,
+            'pares_mutuos': len(mutuos),
+            'clusters_mutuos': len(clusters),
+            'anomalias_grau_saida': len(anomalias),
+            'cliques_suspeitos': total_cliques,
+            'cliques_truncados': total_cliques > len(cliques),
+            'numpy': np is not None,
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+        },
+        'clusters_mutuos': clusters[:limite],
+        'anomalias_grau_saida': anomalias[:limite],
+        'cliques_suspeitos': cliques[:limite],
+    }
+
+
+@tarefa()
+def analisar_reportes(tamanho_minimo_cluster=3, limiar_anomalia=3.5, min_alvos_comuns=3, limite=50):
+    """Carrega o grafo de reportes e o analisa (também pode rodar pela fila de tarefas)"""
+    inicio = time.perf_counter()
+    grafo = GrafoReportes.carregar()
+    carga_ms = round((time.perf_counter() - inicio) * 1000, 1)
+    resultado = analisar(grafo, tamanho_minimo_cluster, limiar_anomalia, min_alvos_comuns, limite)
+    resultado['resumo']['carga_ms'] = carga_ms
+    return resultado
+
+
+def _clusters_mutuos(grafo, pares, tamanho_minimo):
+    """Componentes conexos do grafo de reportes mútuos (union-find)"""
+    pai = {}
+
+    def raiz(no):
+        pai.setdefault(no, no)
+        while pai[no] != no:
+            pai[no] = pai[pai[no]]
+            no = pai[no]
+        return no
+
+    for u, v in pares:
+        ru, rv = raiz(u), raiz(v)
+        if ru != rv:
+            pai[ru] = rv
+
+    membros = defaultdict(list)
+    for no in pai:
+        membros[raiz(no)].append(no)
+    arestas = Counter(raiz(u) for u, _ in pares)
+
+    clusters = [
+        {
+            'membros': sorted(int(grafo.ids[no]) for no in nos),
+            'tamanho': len(nos),
+            'reportes_mutuos': arestas[componente],
+        }
+        for componente, nos in membros.items() if len(nos) >= tamanho_minimo
+    ]
+    clusters.sort(key=lambda cluster: (-cluster['tamanho'], -cluster['reportes_mutuos'], cluster['membros'][0]))
+    return clusters
+
+
+def _anomalias_grau_saida(grafo, limiar):
+    """Reportadores com z-score robusto do grau de saída acima do limiar"""
+    graus = grafo.grau_saida()
+    reportadores = [(no, grau) for no, grau in enumerate(_como_lista(graus)) if grau > 0]
+    if len(reportadores) < 3:
+        return []
+
+    valores = [grau for _, grau in reportadores]
+    mediana = statistics.median(valores)
+    mad = statistics.median(abs(valor - mediana) for valor in valores)
+    if mad:
+        escala = mad / 0.6745
+    else:
+        # Mais da metade dos reportadores tem o mesmo grau: usa o desvio absoluto médio
+        escala = 1.253314 * statistics.fmean(abs(valor - mediana) for valor in valores)
+    if not escala:
+        return []
+
+    anomalias = [
+        {'sobrevivente': int(grafo.ids[no]), 'reportes_feitos': grau, 'pontuacao': round((grau - mediana) / escala, 2)}
+        for no, grau in reportadores
+        if (grau - mediana) / escala > limiar
+    ]
+    anomalias.sort(key=lambda anomalia: (-anomalia['pontuacao'], anomalia['sobrevivente']))
+    return anomalias
+
+
+def _cliques_suspeitos(grafo, min_alvos_comuns):
+    """Cliques maximais (3+) no grafo de pares de reportadores com alvos em comum
+
+    Retorna os MAX_CLIQUES melhores (maiores, depois com mais alvos em comum
+    por par) e o total de cliques encontrados.
+    """
+    vizinhos = defaultdict(set)
+    for u, v in grafo.pares_coreportadores(min_alvos_comuns):
+        vizinhos[u].add(v)
+        vizinhos[v].add(u)
+
+    alvos_por_no = {}
+
+    def alvos(no):
+        if no not in alvos_por_no:
+            alvos_por_no[no] = set(_como_lista(grafo.alvos(no)))
+        return alvos_por_no[no]
+
+    total = 0
+
+    def avaliar():
+        nonlocal total
+        for clique in _cliques_maximais(vizinhos):
+            if len(clique) < 3:
+                continue
+            total += 1
+            # A interseção de todos pode ser vazia mesmo com cada par dividindo min_alvos_comuns alvos
+            comuns = set.intersection(*(alvos(no) for no in clique))
+            yield {
+                'membros': sorted(int(grafo.ids[no]) for no in clique),
+                'tamanho': len(clique),
+                'min_alvos_comuns_por_par': min(len(alvos(u) & alvos(v)) for u, v in combinations(clique, 2)),
+                'alvos_em_comum': sorted(int(grafo.ids[alvo]) for alvo in comuns),
+            }
+
+    cliques = heapq.nlargest(MAX_CLIQUES, avaliar(), key=lambda clique: (
+        clique['tamanho'], clique['min_alvos_comuns_por_par'], len(clique['alvos_em_comum']), -clique['membros'][0]
+    ))
+    return cliques, total
+
+
+def _cliques_maximais(vizinhos):
+    """Bron–Kerbosch com pivô, iterativo, sobre um dicionário nó → conjunto de vizinhos"""
+    pilha = [(set(), set(vizinhos), set())]
+    while pilha:
+        clique, candidatos, excluidos = pilha.pop()
+        if not candidatos and not excluidos:
+            yield clique
+            continue
+        pivo = max(candidatos | excluidos, key=lambda no: len(vizinhos[no] & candidatos))
+        for no in list(candidatos - vizinhos[pivo]):
+            pilha.append((clique | {no}, candidatos & vizinhos[no], excluidos & vizinhos[no]))
+            candidatos = candidatos - {no}
+            excluidos = excluidos | {no}
+
+
+def _csr(n, origens, destinos):
+    """(indptr, indices) das arestas origem → destino, com os destinos ordenados em cada linha"""
+    if np is not None:
+        origens = np.asarray(origens, dtype=np.int64)
+        destinos = np.asarray(destinos, dtype=np.int64)
+        ordem = np.lexsort((destinos, origens))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(origens, minlength=n), out=indptr[1:])
+        return indptr, destinos[ordem]
+
+    contagem = [0] * (n + 1)
+    for origem in origens:
+        contagem[origem + 1] += 1
+    indptr = array('q', accumulate(contagem))
+    posicoes = list(indptr[:-1])
+    indices = array('q', [0]) * len(origens)
+    for origem, destino in zip(origens, destinos):
+        indices[posicoes[origem]] = destino
+        posicoes[origem] += 1
+    for no in range(n):
+        inicio, fim = indptr[no], indptr[no + 1]
+        if fim - inicio > 1:
+            indices[inicio:fim] = array('q', sorted(indices[inicio:fim]))
+    return indptr, indices
+
+
+def _diferencas(indptr):
+    if np is not None:
+        return np.diff(indptr)
+    return array('q', (indptr[i + 1] - indptr[i] for i in range(len(indptr) - 1)))
+
+
+def _como_lista(valores):
+    return valores.tolist() if hasattr(valores, 'tolist') else list(valores)
@@ -0,0 +1,149 @@
+"""
+Histórico dos relatórios em intervalos horários e diários
+
+A tarefa periódica ``registrar_historico`` tira uma amostra das métricas de
+``gerar_relatorio`` a cada 5 minutos e a acumula no intervalo horário
+corrente (soma, mínimo, máximo e último valor de cada métrica). O intervalo
+diário é recalculado em seguida a partir das horas do dia, sem voltar às
+amostras. As consultas de histórico leem apenas essas linhas agregadas: no
+máximo uma por hora ou uma por dia do período pedido.
+
+As horas são mantidas por HISTORICO_RETENCAO_HORARIO_DIAS dias e os dias por
+HISTORICO_RETENCAO_DIARIO_DIAS; os dias já consolidados continuam valendo
+depois que suas horas são removidas.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .fila import tarefa
+from .models import HistoricoRelatorio, GranularidadeHistorico
+from .relatorios import gerar_relatorio
+
+DURACOES = {
+    GranularidadeHistorico.HORA: timedelta(hours=1),
+    GranularidadeHistorico.DIA: timedelta(days=1),
+}
+
+
+def inicio_intervalo(momento, granularidade):
+    """Início do intervalo (no fuso local) que contém ``momento``"""
+    momento = timezone.localtime(momento).replace(minute=0, second=0, microsecond=0)
+    if granularidade == GranularidadeHistorico.DIA:
+        momento = momento.replace(hour=0)
+    return momento
+
+
+def metricas_do_relatorio(relatorio):
+    """Métricas numéricas do relatório guardadas no histórico"""
+    return {
+        **relatorio['resumo_geral'],
+        'porcentagem_infectados': relatorio['porcentagens']['porcentagem_infectados'],
+        **relatorio['medias_itens'],
+        'pontos_perdidos_infectados': relatorio['pontos_perdidos_infectados'],
+    }
+
+
+@tarefa(intervalo=300, prioridade=-5)
+def registrar_historico():
+    """Acumula uma amostra dos relatórios na hora corrente e reconsolida o dia"""
+    agora = timezone.now()
+    metricas = metricas_do_relatorio(gerar_relatorio())
+    hora = inicio_intervalo(agora, GranularidadeHistorico.HORA)
+    dia = inicio_intervalo(agora, GranularidadeHistorico.DIA)
+
+    with transaction.atomic():
+        intervalo, _ = HistoricoRelatorio.objects.select_for_update().get_or_create(
+            granularidade=GranularidadeHistorico.HORA, inicio=hora
+        )
+        for nome, valor in metricas.items():
+            intervalo.somas[nome] = intervalo.somas.get(nome, 0) + valor
+            intervalo.minimos[nome] = min(intervalo.minimos.get(nome, valor), valor)
+            intervalo.maximos[nome] = max(intervalo.maximos.get(nome, valor), valor)
+        intervalo.ultimos = metricas
+        intervalo.amostras += 1
+        intervalo.save()
+
+        consolidar_dia(dia)
+
+    return {'hora': hora, 'dia': dia, 'metricas': metricas}
+
+
+def consolidar_dia(dia):
+    """Recalcula o intervalo diário a partir dos intervalos horários do dia"""
+    horas = HistoricoRelatorio.objects.filter(
+        granularidade=GranularidadeHistorico.HORA,
+        inicio__gte=dia,
+        inicio__lt=dia + DURACOES[GranularidadeHistorico.DIA],
+    ).order_by('inicio')
+
+    diario, _ = HistoricoRelatorio.objects.select_for_update().get_or_create(
+        granularidade=GranularidadeHistorico.DIA, inicio=dia
+    )
+    diario.amostras = 0
+    diario.somas, diario.minimos, diario.maximos, diario.ultimos = {}, {}, {}, {}
+    for hora in horas:
+        diario.amostras += hora.amostras
+        for nome, soma in hora.somas.items():
+            diario.somas[nome] = diario.somas.get(nome, 0) + soma
+            diario.minimos[nome] = min(diario.minimos.get(nome, hora.minimos[nome]), hora.minimos[nome])
+            diario.maximos[nome] = max(diario.maximos.get(nome, hora.maximos[nome]), hora.maximos[nome])
+        diario.ultimos = hora.ultimos
+    diario.save()
+    return diario
+
+
+def consultar_historico(inicio, fim, granularidade):
+    """Intervalos agregados entre ``inicio`` e ``fim``, com média, mínimo, máximo e último valor"""
+    linhas = (
+        HistoricoRelatorio.objects.filter(
+            granularidade=granularidade,
+            inicio__gte=inicio_intervalo(inicio, granularidade),
+            inicio__lte=fim,
+        )
+        .order_by('inicio')
+        .values_list('inicio', 'amostras', 'somas', 'minimos', 'maximos', 'ultimos')
+    )
+
+    intervalos = []
+    for inicio_linha, amostras, somas, minimos, maximos, ultimos in linhas:
+        if not amostras:
+            continue
+        intervalos.append({
+            'inicio': inicio_linha,
+            'amostras': amostras,
+            'metricas': {
+                nome: {
+                    'media': round(soma / amostras, 2),
+                    'minimo': minimos[nome],
+                    'maximo': maximos[nome],
+                    'ultimo': ultimos.get(nome),
+                }
+                for nome, soma in somas.items()
+            },
+        })
+
+    return {
+        'granularidade': granularidade,
+        'inicio': inicio,
+        'fim': fim,
+        'intervalos': intervalos,
+    }
+
+
+@tarefa(intervalo=24 * 3600, prioridade=-10)
+def limpar_historico():
+    """Remove os intervalos horários e diários mais antigos que a retenção de cada um"""
+    agora = timezone.now()
+    removidos = 0
+    for granularidade, configuracao, padrao in (
+        (GranularidadeHistorico.HORA, 'HISTORICO_RETENCAO_HORARIO_DIAS', 14),
+        (GranularidadeHistorico.DIA, 'HISTORICO_RETENCAO_DIARIO_DIAS', 730),
+    ):
+        limite = agora - timedelta(days=getattr(settings, configuracao, padrao))
+        quantidade, _ = HistoricoRelatorio.objects.filter(granularidade=granularidade, inicio__lt=limite).delete()
+        removidos += quantidade
+    return {'removidos': removidos}
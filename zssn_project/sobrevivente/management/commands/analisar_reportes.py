@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from Sobrevivente.grafo_reportes import analisar_reportes
+
+
+class Command(BaseCommand):
+    """Analisa o grafo de reportes de infecção em busca de conluio"""
+
+    help = 'Procura clusters de reportes mútuos, reportadores anômalos e cliques com alvos em comum.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanho-minimo-cluster', type=int, default=3)
+        parser.add_argument('--limiar-anomalia', type=float, default=3.5, help='z-score robusto mínimo.')
+        parser.add_argument('--min-alvos-comuns', type=int, default=3, help='Alvos em comum por par de um clique.')
+        parser.add_argument('--limite', type=int, default=20, help='Itens exibidos por análise.')
+        parser.add_argument('--json', action='store_true', help='Imprime o resultado completo em JSON.')
+
+    def handle(self, *args, **options):
+        resultado = analisar_reportes(
+            tamanho_minimo_cluster=options['tamanho_minimo_cluster'],
+            limiar_anomalia=options['limiar_anomalia'],
+            min_alvos_comuns=options['min_alvos_comuns'],
+            limite=options['limite'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+
+        resumo = resultado['resumo']
+        self.stdout.write(
+            f"🕸️  {resumo['reportes']} reportes entre {resumo['sobreviventes']} sobreviventes "
+            f"(carga {resumo['carga_ms']:.0f} ms, análise {resumo['duracao_ms']:.0f} ms, "
+            f"NumPy: {'sim' if resumo['numpy'] else 'não'})\n"
+        )
+
+        self.stdout.write(f"Clusters de reportes mútuos: {resumo['clusters_mutuos']}")
+        for cluster in resultado['clusters_mutuos']:
+            self.stdout.write(f"  {cluster['tamanho']:>4} membros, {cluster['reportes_mutuos']} pares mútuos: {cluster['membros']}")
+
+        self.stdout.write(f"\nReportadores anômalos: {resumo['anomalias_grau_saida']}")
+        for anomalia in resultado['anomalias_grau_saida']:
+            self.stdout.write(
+                f"  #{anomalia['sobrevivente']:<10} {anomalia['reportes_feitos']:>6} reportes  z={anomalia['pontuacao']}"
+            )
+
+        truncados = ' (apenas os melhores foram avaliados)' if resumo['cliques_truncados'] else ''
+        self.stdout.write(f"\nCliques suspeitos: {resumo['cliques_suspeitos']}{truncados}")
+        for clique in resultado['cliques_suspeitos']:
+            self.stdout.write(
+                f"  {clique['membros']}: cada par com {clique['min_alvos_comuns_por_par']}+ alvos em comum, "
+                f"{len(clique['alvos_em_comum'])} comuns a todos: {clique['alvos_em_comum'][:10]}"
+            )
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Sobrevivente.arquivamento import arquivar_infectados, candidatos_arquivamento
+
+
+class Command(BaseCommand):
+    """Move sobreviventes infectados antigos para as tabelas de arquivo"""
+
+    help = 'Arquiva, em lotes, os infectados sem alterações há mais de ARQUIVAMENTO_DIAS dias.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Idade mínima, em dias, da última alteração (padrão: ARQUIVAMENTO_DIAS).')
+        parser.add_argument('--lote', type=int, help='Sobreviventes por transação (padrão: ARQUIVAMENTO_LOTE).')
+        parser.add_argument('--limite', type=int, help='Máximo de sobreviventes arquivados nesta execução.')
+        parser.add_argument('--simular', action='store_true', help='Só informa quantos seriam arquivados.')
+
+    def handle(self, *args, **options):
+        dias = options['dias'] if options['dias'] is not None else getattr(settings, 'ARQUIVAMENTO_DIAS', 30)
+
+        if options['simular']:
+            self.stdout.write(f'{candidatos_arquivamento(dias)} sobrevivente(s) infectado(s) seriam arquivados.')
+            return
+
+        arquivados = arquivar_infectados(dias=dias, lote=options['lote'], limite=options['limite'])
+        self.stdout.write(self.style.SUCCESS(f'{arquivados} sobrevivente(s) arquivado(s).'))
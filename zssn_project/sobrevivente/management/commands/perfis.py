@@ -0,0 +1,90 @@
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Sobrevivente.perfilador import diretorio_perfis
+
+
+class Command(BaseCommand):
+    """Lista e agrega os perfis de requisições capturados pelo PerfiladorMiddleware"""
+
+    help = 'Lista, agrega (em formato collapsed para flamegraphs) ou remove perfis capturados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('operacao', nargs='?', choices=['listar', 'agregar', 'sql', 'limpar'], default='listar')
+        parser.add_argument('--acao', help='Filtra pela ação (ex.: sobreviventes.escambo, async-sobreviventes-list).')
+        parser.add_argument('--caminho', help='Filtra pelo início do caminho da requisição.')
+        parser.add_argument('--limite', type=int, default=20, help='Quantidade de linhas exibidas.')
+        parser.add_argument('--saida', help='Arquivo de saída do agregado collapsed (padrão: stdout).')
+
+    def handle(self, *args, **options):
+        perfis = self._carregar(options['acao'], options['caminho'])
+        operacao = options['operacao']
+
+        if operacao == 'limpar':
+            for caminho, _ in perfis:
+                caminho.unlink()
+            self.stdout.write(self.style.SUCCESS(f'{len(perfis)} perfil(is) removido(s).'))
+            return
+
+        if not perfis:
+            raise CommandError(f'Nenhum perfil encontrado em {diretorio_perfis()}.')
+
+        if operacao == 'listar':
+            self._listar(perfis, options['limite'])
+        elif operacao == 'agregar':
+            self._agregar(perfis, options['saida'])
+        else:
+            self._sql(perfis, options['limite'])
+
+    def _carregar(self, acao, caminho):
+        perfis = []
+        for arquivo in sorted(diretorio_perfis().glob('*.json')):
+            with open(arquivo, encoding='utf-8') as entrada:
+                perfil = json.load(entrada)
+            if acao and perfil.get('acao') != acao:
+                continue
+            if caminho and not perfil['caminho'].startswith(caminho):
+                continue
+            perfis.append((arquivo, perfil))
+        return perfis
+
+    def _listar(self, perfis, limite):
+        self.stdout.write(f"{'id':<25} {'ação':<36} {'status':>6} {'ms':>9} {'sql':>5} {'sql ms':>9}  caminho")
+        for _, perfil in perfis[-limite:]:
+            tempo_sql = sum(consulta['duracao_ms'] for consulta in perfil['sql'])
+            self.stdout.write(
+                f"{perfil['id']:<25} {str(perfil['acao']):<36} {perfil['status']:>6} "
+                f"{perfil['duracao_ms']:>9.1f} {len(perfil['sql']):>5} {tempo_sql:>9.1f}  "
+                f"{perfil['metodo']} {perfil['caminho']}"
+            )
+
+    def _agregar(self, perfis, saida):
+        """Soma as pilhas de todos os perfis; a saída alimenta flamegraph.pl ou speedscope"""
+        pilhas = Counter()
+        for _, perfil in perfis:
+            pilhas.update(perfil['pilhas'])
+
+        linhas = [f'{pilha} {quantidade}' for pilha, quantidade in pilhas.most_common()]
+        if saida:
+            with open(saida, 'w', encoding='utf-8') as arquivo:
+                arquivo.write('\n'.join(linhas) + '\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(perfis)} perfil(is), {sum(pilhas.values())} amostras agregadas em {saida}.'
+            ))
+        else:
+            self.stdout.write('\n'.join(linhas))
+
+    def _sql(self, perfis, limite):
+        """Consultas que mais somaram tempo entre os perfis"""
+        totais = Counter()
+        execucoes = Counter()
+        for _, perfil in perfis:
+            for consulta in perfil['sql']:
+                totais[consulta['sql']] += consulta['duracao_ms']
+                execucoes[consulta['sql']] += 1
+
+        self.stdout.write(f"{'total ms':>10} {'vezes':>6}  sql")
+        for sql, total in totais.most_common(limite):
+            self.stdout.write(f'{total:>10.1f} {execucoes[sql]:>6}  {sql}')
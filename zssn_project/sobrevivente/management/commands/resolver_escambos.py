@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from Sobrevivente.escambo_circular import resolver_escambos
+
+
+class Command(BaseCommand):
+    """Encontra e liquida ciclos de escambo entre vários sobreviventes"""
+
+    help = 'Procura ciclos de intenções de escambo compatíveis e liquida cada um atomicamente.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanho-maximo', type=int, help='Participantes por ciclo (padrão: ESCAMBO_CIRCULAR_TAMANHO_MAXIMO).')
+        parser.add_argument('--limite', type=int, help='Ciclos por execução (padrão: ESCAMBO_CIRCULAR_LIMITE).')
+        parser.add_argument('--simular', action='store_true', help='Apenas lista os ciclos, sem liquidar.')
+        parser.add_argument('--json', action='store_true', help='Imprime o resultado completo em JSON.')
+
+    def handle(self, *args, **options):
+        resultado = resolver_escambos(
+            tamanho_maximo=options['tamanho_maximo'],
+            limite=options['limite'],
+            simular=options['simular'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+
+        resumo = resultado['resumo']
+        self.stdout.write(
+            f"🔁 {resumo['ciclos']} ciclo(s) entre {resumo['intencoes']} intenções "
+            f"(carga {resumo['carga_ms']:.0f} ms, busca {resumo['busca_ms']:.0f} ms)"
+        )
+        for ciclo in resultado['ciclos']:
+            self.stdout.write(f"  {len(ciclo['participantes'])} participantes, {ciclo['pontos']} pontos: {ciclo['participantes']}")
+        for falha in resultado['falhas']:
+            self.stdout.write(self.style.WARNING(f"  descartado {falha['participantes']}: {falha['erro']}"))
+
+        if resumo['simulacao']:
+            self.stdout.write('Simulação: nenhum ciclo foi liquidado.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{resumo['liquidados']} ciclo(s) liquidado(s)"))
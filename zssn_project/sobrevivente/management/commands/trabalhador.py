@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+# Os processos do pool são criados com "spawn" e importam este módulo antes
+# do django.setup(); por isso a fila (e os modelos) só é importada nas funções.
+
+
+def iniciar_processo():
+    import django
+
+    django.setup()
+
+
+def executar(tarefa_id):
+    from Sobrevivente.fila import executar_tarefa
+
+    return executar_tarefa(tarefa_id)
+
+
+class Command(BaseCommand):
+    """Executa as tarefas da fila em segundo plano com um pool de processos"""
+
+    help = 'Executa as tarefas pendentes da fila (Tarefa) em um pool de processos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processos', type=int, help='Tamanho do pool (padrão: TAREFAS_PROCESSOS).')
+        parser.add_argument('--intervalo', type=float, help='Segundos entre consultas à fila (padrão: TAREFAS_INTERVALO_CONSULTA).')
+        parser.add_argument('--uma-vez', action='store_true', help='Sai quando não houver mais tarefas prontas.')
+        parser.add_argument('--sem-periodicas', action='store_true', help='Não agenda as tarefas periódicas.')
+
+    def handle(self, *args, **options):
+        from Sobrevivente import fila
+
+        processos = options['processos'] or getattr(settings, 'TAREFAS_PROCESSOS', 2)
+        intervalo = options['intervalo'] or getattr(settings, 'TAREFAS_INTERVALO_CONSULTA', 1)
+        nome = f'{socket.gethostname()}:{os.getpid()}'
+        em_execucao = {}
+        proxima_manutencao = 0
+
+        self.stdout.write(f'👷 Trabalhador {nome} com {processos} processo(s)')
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto, initializer=iniciar_processo) as pool:
+            try:
+                while True:
+                    close_old_connections()
+                    if time.monotonic() >= proxima_manutencao:
+                        recuperadas = fila.recuperar_tarefas_abandonadas()
+                        if recuperadas:
+                            self.stdout.write(self.style.WARNING(f'{recuperadas} tarefa(s) abandonada(s) recuperada(s)'))
+                        if not options['sem_periodicas']:
+                            fila.agendar_periodicas()
+                        proxima_manutencao = time.monotonic() + 30
+
+                    self._coletar(em_execucao)
+
+                    livres = processos - len(em_execucao)
+                    ids = fila.reservar_tarefas(livres, nome) if livres > 0 else []
+                    for tarefa_id in ids:
+                        em_execucao[pool.submit(executar, tarefa_id)] = tarefa_id
+                        self.stdout.write(f'▶️  Tarefa #{tarefa_id}')
+
+                    if options['uma_vez'] and not ids and not em_execucao:
+                        break
+                    if em_execucao:
+                        wait(em_execucao, timeout=intervalo, return_when=FIRST_COMPLETED)
+                    elif not ids:
+                        time.sleep(intervalo)
+            except KeyboardInterrupt:
+                self.stdout.write('Encerrando: aguardando as tarefas em execução...')
+            except BrokenProcessPool as erro:
+                raise CommandError(f'Um processo do pool terminou inesperadamente: {erro}')
+
+    def _coletar(self, em_execucao):
+        for futuro in [futuro for futuro in em_execucao if futuro.done()]:
+            tarefa_id = em_execucao.pop(futuro)
+            erro = futuro.exception()
+            if isinstance(erro, BrokenProcessPool):
+                raise erro
+            if erro is not None:
+                # Falha fora da tarefa (ex.: banco indisponível); a recuperação de abandonadas a devolve à fila
+                self.stderr.write(f'Tarefa #{tarefa_id}: {erro!r}')
+            else:
+                self.stdout.write(f'⏹️  Tarefa #{tarefa_id}')
@@ -0,0 +1,202 @@
+"""
+Codificação MessagePack usada pelos dispositivos de campo
+
+Usa a biblioteca msgpack quando instalada e, na falta dela, uma
+implementação em Python puro que cobre os tipos usados pela API.
+"""
+
+import struct
+
+try:
+    import msgpack
+except ImportError:  # msgpack é opcional
+    msgpack = None
+
+
+class ErroMensagemCompacta(ValueError):
+    """Erro ao decodificar uma mensagem MessagePack"""
+
+
+def empacotar(dados, default=None):
+    """Codifica ``dados`` em MessagePack"""
+    if msgpack is not None:
+        return msgpack.packb(dados, default=default, use_bin_type=True)
+    partes = []
+    _empacotar(dados, partes.append, default)
+    return b''.join(partes)
+
+
+def desempacotar(conteudo):
+    """Decodifica uma mensagem MessagePack"""
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(conteudo, raw=False, strict_map_key=False)
+        except (ValueError, TypeError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            # TypeError: chave de mapa não hashable (ex.: um array)
+            raise ErroMensagemCompacta(str(exc)) from exc
+
+    leitor = _Leitor(conteudo)
+    try:
+        dados = leitor.ler()
+    except (IndexError, TypeError, RecursionError, struct.error, UnicodeDecodeError) as exc:
+        raise ErroMensagemCompacta('Mensagem MessagePack inválida.') from exc
+    if leitor.posicao != len(conteudo):
+        raise ErroMensagemCompacta('Dados extras após a mensagem MessagePack.')
+    return dados
+
+
+def _empacotar(obj, escrever, default):
+    """Implementação em Python puro do codificador"""
+    if obj is None:
+        escrever(b'\xc0')
+    elif obj is True:
+        escrever(b'\xc3')
+    elif obj is False:
+        escrever(b'\xc2')
+    elif isinstance(obj, int):
+        _empacotar_inteiro(obj, escrever)
+    elif isinstance(obj, float):
+        escrever(struct.pack('>Bd', 0xcb, obj))
+    elif isinstance(obj, str):
+        dados = obj.encode('utf-8')
+        tamanho = len(dados)
+        if tamanho < 32:
+            escrever(struct.pack('B', 0xa0 | tamanho))
+        elif tamanho < 0x100:
+            escrever(struct.pack('>BB', 0xd9, tamanho))
+        elif tamanho < 0x10000:
+            escrever(struct.pack('>BH', 0xda, tamanho))
+        else:
+            escrever(struct.pack('>BI', 0xdb, tamanho))
+        escrever(dados)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        dados = bytes(obj)
+        tamanho = len(dados)
+        if tamanho < 0x100:
+            escrever(struct.pack('>BB', 0xc4, tamanho))
+        elif tamanho < 0x10000:
+            escrever(struct.pack('>BH', 0xc5, tamanho))
+        else:
+            escrever(struct.pack('>BI', 0xc6, tamanho))
+        escrever(dados)
+    elif isinstance(obj, (list, tuple)):
+        _empacotar_cabecalho(len(obj), 0x90, 0xdc, escrever)
+        for valor in obj:
+            _empacotar(valor, escrever, default)
+    elif isinstance(obj, dict):
+        _empacotar_cabecalho(len(obj), 0x80, 0xde, escrever)
+        for chave, valor in obj.items():
+            _empacotar(chave, escrever, default)
+            _empacotar(valor, escrever, default)
+    elif default is not None:
+        _empacotar(default(obj), escrever, None)
+    else:
+        raise TypeError(f'Tipo não suportado pelo MessagePack: {type(obj).__name__}')
+
+
+def _empacotar_inteiro(valor, escrever):
+    if 0 <= valor < 0x80:
+        escrever(struct.pack('B', valor))
+    elif -32 <= valor < 0:
+        escrever(struct.pack('b', valor))
+    elif 0 <= valor < 0x100:
+        escrever(struct.pack('>BB', 0xcc, valor))
+    elif 0 <= valor < 0x10000:
+        escrever(struct.pack('>BH', 0xcd, valor))
+    elif 0 <= valor < 0x100000000:
+        escrever(struct.pack('>BI', 0xce, valor))
+    elif 0 <= valor < 0x10000000000000000:
+        escrever(struct.pack('>BQ', 0xcf, valor))
+    elif -0x80 <= valor < 0:
+        escrever(struct.pack('>Bb', 0xd0, valor))
+    elif -0x8000 <= valor < 0:
+        escrever(struct.pack('>Bh', 0xd1, valor))
+    elif -0x80000000 <= valor < 0:
+        escrever(struct.pack('>Bi', 0xd2, valor))
+    elif -0x8000000000000000 <= valor < 0:
+        escrever(struct.pack('>Bq', 0xd3, valor))
+    else:
+        raise OverflowError('Inteiro grande demais para MessagePack.')
+
+
+def _empacotar_cabecalho(tamanho, prefixo_fix, prefixo_16, escrever):
+    """Cabeçalho de array (0x90/0xdc) ou mapa (0x80/0xde)"""
+    if tamanho < 16:
+        escrever(struct.pack('B', prefixo_fix | tamanho))
+    elif tamanho < 0x10000:
+        escrever(struct.pack('>BH', prefixo_16, tamanho))
+    else:
+        escrever(struct.pack('>BI', prefixo_16 + 1, tamanho))
+
+
+class _Leitor:
+    """Implementação em Python puro do decodificador"""
+
+    # Formatos de tamanho fixo: código -> (formato struct, tamanho)
+    ESCALARES = {
+        0xca: ('>f', 4), 0xcb: ('>d', 8),
+        0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+        0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+    }
+    TAMANHOS = {
+        0xc4: ('>B', 1), 0xc5: ('>H', 2), 0xc6: ('>I', 4),
+        0xd9: ('>B', 1), 0xda: ('>H', 2), 0xdb: ('>I', 4),
+        0xdc: ('>H', 2), 0xdd: ('>I', 4),
+        0xde: ('>H', 2), 0xdf: ('>I', 4),
+    }
+
+    def __init__(self, conteudo):
+        self.conteudo = memoryview(conteudo)
+        self.posicao = 0
+
+    def _bytes(self, tamanho):
+        inicio = self.posicao
+        self.posicao += tamanho
+        if self.posicao > len(self.conteudo):
+            raise IndexError('Fim inesperado da mensagem.')
+        return self.conteudo[inicio:self.posicao]
+
+    def _struct(self, formato, tamanho):
+        return struct.unpack(formato, self._bytes(tamanho))[0]
+
+    def ler(self):
+        codigo = self._bytes(1)[0]
+
+        if codigo <= 0x7f:
+            return codigo
+        if codigo >= 0xe0:
+            return codigo - 0x100
+        if 0x80 <= codigo <= 0x8f:
+            return self._ler_mapa(codigo & 0x0f)
+        if 0x90 <= codigo <= 0x9f:
+            return self._ler_array(codigo & 0x0f)
+        if 0xa0 <= codigo <= 0xbf:
+            return str(self._bytes(codigo & 0x1f), 'utf-8')
+        if codigo == 0xc0:
+            return None
+        if codigo == 0xc2:
+            return False
+        if codigo == 0xc3:
+            return True
+        if codigo in self.ESCALARES:
+            return self._struct(*self.ESCALARES[codigo])
+        if codigo in self.TAMANHOS:
+            tamanho = self._struct(*self.TAMANHOS[codigo])
+            if codigo <= 0xc6:
+                return bytes(self._bytes(tamanho))
+            if codigo <= 0xdb:
+                return str(self._bytes(tamanho), 'utf-8')
+            if codigo <= 0xdd:
+                return self._ler_array(tamanho)
+            return self._ler_mapa(tamanho)
+        raise ErroMensagemCompacta(f'Código MessagePack não suportado: 0x{codigo:02x}')
+
+    def _ler_array(self, tamanho):
+        return [self.ler() for _ in range(tamanho)]
+
+    def _ler_mapa(self, tamanho):
+        mapa = {}
+        for _ in range(tamanho):
+            chave = self.ler()
+            mapa[chave] = self.ler()
+        return mapa
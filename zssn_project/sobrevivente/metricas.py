@@ -0,0 +1,252 @@
+"""
+Instrumentação por ação da API
+
+O MetricasMiddleware mede, para cada ação do DRF (``list``, ``escambo``,
+``relatorios``...), a latência, a quantidade e o tempo das consultas SQL, o
+tempo de serialização e o tamanho da resposta, sem depender de ``DEBUG``.
+Os valores ficam em memória no processo e são expostos em formato texto do
+Prometheus pela view ``metricas``; com vários workers, cada um expõe os
+seus e o Prometheus agrega.
+"""
+
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger('Sobrevivente.lentas')
+
+# Limites (em segundos) dos buckets do histograma de latência
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_medicao_atual = ContextVar('medicao_atual', default=None)
+
+
+class Medicao:
+    """Valores coletados durante uma requisição"""
+
+    __slots__ = ('consultas', 'tempo_sql', 'tempo_serializacao', 'sql', 'acao')
+
+    def __init__(self, registrar_sql=False):
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.tempo_serializacao = 0.0
+        self.sql = [] if registrar_sql else None
+        self.acao = None
+
+    def medir(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.consultas += 1
+            self.tempo_sql += duracao
+            if self.sql is not None:
+                self.sql.append((duracao, sql))
+
+
+def _wrapper_sql(execute, sql, params, many, context):
+    """Wrapper de execução SQL instalado em todas as conexões
+
+    Lê a medição da requisição por ContextVar, que o asgiref propaga para as
+    threads do ORM assíncrono, então funciona em views síncronas e assíncronas.
+    """
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    return medicao.medir(execute, sql, params, many, context)
+
+
+def instalar_wrapper_sql(sender, connection, **kwargs):
+    """Receptor de connection_created que instala o wrapper na nova conexão"""
+    if _wrapper_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_wrapper_sql)
+
+
+@contextmanager
+def cronometrar_serializacao():
+    """Soma o tempo do bloco ao tempo de serialização da requisição atual"""
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicao.tempo_serializacao += time.perf_counter() - inicio
+
+
+class _SerieAcao:
+    __slots__ = ('buckets', 'soma_latencia', 'requisicoes', 'consultas', 'tempo_sql', 'tempo_serializacao', 'bytes')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_LATENCIA) + 1)
+        self.soma_latencia = 0.0
+        self.requisicoes = {}
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.tempo_serializacao = 0.0
+        self.bytes = 0
+
+
+class RegistroMetricas:
+    """Acumula as medições por ação e gera o texto no formato do Prometheus"""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, acao, status_code, latencia, medicao, tamanho):
+        with self._lock:
+            serie = self._series.get(acao)
+            if serie is None:
+                serie = self._series[acao] = _SerieAcao()
+            serie.buckets[bisect_left(BUCKETS_LATENCIA, latencia)] += 1
+            serie.soma_latencia += latencia
+            serie.requisicoes[status_code] = serie.requisicoes.get(status_code, 0) + 1
+            serie.consultas += medicao.consultas
+            serie.tempo_sql += medicao.tempo_sql
+            serie.tempo_serializacao += medicao.tempo_serializacao
+            serie.bytes += tamanho
+
+    def exportar(self):
+        with self._lock:
+            series = sorted(self._series.items())
+            linhas = [
+                '# HELP zssn_requisicao_duracao_segundos Latência das requisições por ação.',
+                '# TYPE zssn_requisicao_duracao_segundos histogram',
+            ]
+            for acao, serie in series:
+                acumulado = 0
+                for limite, quantidade in zip(BUCKETS_LATENCIA + (float('inf'),), serie.buckets):
+                    acumulado += quantidade
+                    le = '+Inf' if limite == float('inf') else repr(limite)
+                    linhas.append(f'zssn_requisicao_duracao_segundos_bucket{{acao="{acao}",le="{le}"}} {acumulado}')
+                linhas.append(f'zssn_requisicao_duracao_segundos_sum{{acao="{acao}"}} {serie.soma_latencia}')
+                linhas.append(f'zssn_requisicao_duracao_segundos_count{{acao="{acao}"}} {acumulado}')
+
+            linhas += [
+                '# HELP zssn_requisicoes_total Requisições por ação e status HTTP.',
+                '# TYPE zssn_requisicoes_total counter',
+            ]
+            for acao, serie in series:
+                for status_code, quantidade in sorted(serie.requisicoes.items()):
+                    linhas.append(f'zssn_requisicoes_total{{acao="{acao}",status="{status_code}"}} {quantidade}')
+
+            contadores = (
+                ('zssn_sql_consultas_total', 'Consultas SQL executadas por ação.', 'consultas'),
+                ('zssn_sql_duracao_segundos_total', 'Tempo gasto em SQL por ação.', 'tempo_sql'),
+                ('zssn_serializacao_duracao_segundos_total', 'Tempo de serialização por ação.', 'tempo_serializacao'),
+                ('zssn_resposta_bytes_total', 'Bytes de resposta por ação.', 'bytes'),
+            )
+            for nome, descricao, atributo in contadores:
+                linhas += [f'# HELP {nome} {descricao}', f'# TYPE {nome} counter']
+                for acao, serie in series:
+                    linhas.append(f'{nome}{{acao="{acao}"}} {getattr(serie, atributo)}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+def nome_acao(request, view_func):
+    """Nome da ação que atende a requisição, prefixado pelo ViewSet ou pela rota
+
+    ``sobreviventes.retrieve`` e ``tarefa.retrieve`` para as ações dos
+    ViewSets (basename do router e ação do DRF); nas demais views, o nome da
+    rota (``async-sobreviventes-list``, ``lote``) ou, sem ele, o da função.
+    """
+    acoes = getattr(view_func, 'actions', None)
+    if acoes:
+        basename = getattr(view_func, 'initkwargs', {}).get('basename') or view_func.cls.__name__
+        return f"{basename}.{acoes.get(request.method.lower(), request.method.lower())}"
+    rota = getattr(request, 'resolver_match', None)
+    if rota is not None and rota.view_name:
+        return rota.view_name
+    return getattr(view_func, '__name__', 'desconhecida')
+
+
+class MetricasMiddleware:
+    """Mede cada requisição e registra por ação no registro de métricas"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        medicao, token, inicio = self._iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        self._finalizar(request, response, medicao, inicio)
+        return response
+
+    async def __acall__(self, request):
+        medicao, token, inicio = self._iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        self._finalizar(request, response, medicao, inicio)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.acao = nome_acao(request, view_func)
+
+    def _iniciar(self):
+        medicao = Medicao(registrar_sql=getattr(settings, 'METRICAS_LIMITE_LENTO_MS', None) is not None)
+        token = _medicao_atual.set(medicao)
+        return medicao, token, time.perf_counter()
+
+    def _finalizar(self, request, response, medicao, inicio):
+        latencia = time.perf_counter() - inicio
+        tamanho = 0 if response.streaming else len(response.content)
+        acao = medicao.acao or 'nao_roteada'
+        registro.registrar(acao, response.status_code, latencia, medicao, tamanho)
+
+        limite_ms = getattr(settings, 'METRICAS_LIMITE_LENTO_MS', None)
+        if limite_ms is not None and latencia * 1000 >= limite_ms:
+            logger.warning(
+                'Requisição lenta: %s %s (ação %s) levou %.1f ms, %d consultas SQL (%.1f ms)\n%s',
+                request.method, request.path, acao, latencia * 1000, medicao.consultas, medicao.tempo_sql * 1000,
+                '\n'.join(f'  [{duracao * 1000:.1f} ms] {sql}' for duracao, sql in medicao.sql),
+            )
+
+
+def metricas(request):
+    """Exporta as métricas no formato texto do Prometheus (staff, IPs ou token permitidos)"""
+    if not _acesso_metricas_permitido(request):
+        return HttpResponseForbidden('Acesso às métricas não permitido.\n', content_type='text/plain; charset=utf-8')
+    return HttpResponse(registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _acesso_metricas_permitido(request):
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_staff:
+        return True
+    # Só o endereço da conexão: X-Forwarded-For pode ser forjado pelo cliente
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICAS_IPS_PERMITIDOS', ()):
+        return True
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    autorizacao = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(autorizacao.encode(), f'Bearer {token}'.encode())
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('infeccao', 'Infecção'), ('escambo', 'Escambo'), ('inventario', 'Inventário')], max_length=20, verbose_name='Tipo do Evento')),
+                ('sobrevivente_id', models.BigIntegerField(verbose_name='ID do Sobrevivente')),
+                ('dados', models.JSONField(default=dict, verbose_name='Dados do Evento')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Data do Evento')),
+            ],
+            options={
+                'verbose_name': 'Evento do Outbox',
+                'verbose_name_plural': 'Eventos do Outbox',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0002_eventooutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=255, verbose_name='Chave de Idempotência')),
+                ('metodo', models.CharField(max_length=10, verbose_name='Método HTTP')),
+                ('caminho', models.CharField(max_length=255, verbose_name='Caminho')),
+                ('impressao', models.CharField(max_length=64, verbose_name='Hash da Requisição')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='Status da Resposta')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Content-Type da Resposta')),
+                ('corpo', models.BinaryField(default=bytes, verbose_name='Corpo da Resposta')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('expira_em', models.DateTimeField(db_index=True, verbose_name='Expira em')),
+            ],
+            options={
+                'verbose_name': 'Chave de Idempotência',
+                'verbose_name_plural': 'Chaves de Idempotência',
+                'unique_together': {('chave', 'caminho')},
+            },
+        ),
+    ]
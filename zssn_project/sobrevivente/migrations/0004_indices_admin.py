@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+# Índice para a busca por prefixo do admin (``^nome`` -> istartswith). No
+# PostgreSQL o Django gera ``UPPER("nome"::text) LIKE UPPER('x%')``; com
+# text_pattern_ops o índice atende o LIKE em qualquer collation.
+INDICE_NOME = 'sobrev_nome_upper_prefixo_idx'
+
+
+def criar_indice_nome(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabela = schema_editor.quote_name(apps.get_model('Sobrevivente', 'Sobreviventes')._meta.db_table)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDICE_NOME} ON {tabela} (UPPER("nome"::text) text_pattern_ops)'
+    )
+
+
+def remover_indice_nome(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDICE_NOME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0003_chaveidempotencia'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sobreviventes',
+            index=models.Index(fields=['-data_criacao', '-id'], name='sobrev_data_criacao_id_idx'),
+        ),
+        migrations.RunPython(criar_indice_nome, remover_indice_nome),
+    ]
@@ -0,0 +1,61 @@
+from django.db import DatabaseError, migrations, models, transaction
+
+from Sobrevivente.normalizacao import normalizar_nome
+
+INDICE_TRIGRAMA = 'sobrev_nome_norm_trgm_idx'
+
+
+def preencher_nome_normalizado(apps, schema_editor):
+    Sobreviventes = apps.get_model('Sobrevivente', 'Sobreviventes')
+    banco = schema_editor.connection.alias
+    ultimo_id = 0
+    while True:
+        lote = list(
+            Sobreviventes.objects.using(banco)
+            .filter(id__gt=ultimo_id).order_by('id').only('id', 'nome')[:5000]
+        )
+        if not lote:
+            break
+        for sobrevivente in lote:
+            sobrevivente.nome_normalizado = normalizar_nome(sobrevivente.nome)
+        Sobreviventes.objects.using(banco).bulk_update(lote, ['nome_normalizado'])
+        ultimo_id = lote[-1].id
+
+
+def criar_indice_trigrama(apps, schema_editor):
+    """Índice GiST de trigramas para a busca aproximada, se o pg_trgm puder ser instalado"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabela = schema_editor.quote_name(apps.get_model('Sobrevivente', 'Sobreviventes')._meta.db_table)
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError:
+        # Sem permissão para criar a extensão: a busca fica só por prefixo
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDICE_TRIGRAMA} ON {tabela} USING gist ("nome_normalizado" gist_trgm_ops)'
+    )
+
+
+def remover_indice_trigrama(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDICE_TRIGRAMA}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0004_indices_admin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sobreviventes',
+            name='nome_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Nome Normalizado'),
+        ),
+        migrations.RunPython(preencher_nome_normalizado, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice_trigrama, remover_indice_trigrama),
+    ]
@@ -0,0 +1,54 @@
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0006_tarefa'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reporteinfeccao',
+            name='sobrevivente_reportador',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reportes_feitos', to='Sobrevivente.sobreviventes', verbose_name='Sobrevivente que Reportou'),
+        ),
+        migrations.AddIndex(
+            model_name='sobreviventes',
+            index=models.Index(condition=models.Q(('infectado', True)), fields=['data_atualizacao'], name='sobrev_infectados_atualiz_idx'),
+        ),
+        migrations.CreateModel(
+            name='SobreviventeArquivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome do Sobrevivente')),
+                ('idade', models.IntegerField(verbose_name='Idade')),
+                ('sexo', models.CharField(choices=[('M', 'Masculino'), ('F', 'Feminino'), ('O', 'Outro')], max_length=1, verbose_name='Sexo')),
+                ('latitude', models.DecimalField(decimal_places=7, max_digits=10, verbose_name='Latitude da Localização')),
+                ('longitude', models.DecimalField(decimal_places=7, max_digits=10, verbose_name='Longitude da Localização')),
+                ('inventario', models.JSONField(default=list, verbose_name='Inventário')),
+                ('reportes', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Reportes Recebidos')),
+                ('data_criacao', models.DateTimeField(verbose_name='Data de Cadastro')),
+                ('data_atualizacao', models.DateTimeField(verbose_name='Última Atualização')),
+                ('data_arquivamento', models.DateTimeField(auto_now_add=True, verbose_name='Data de Arquivamento')),
+            ],
+            options={
+                'verbose_name': 'Sobrevivente Arquivado',
+                'verbose_name_plural': 'Sobreviventes Arquivados',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoArquivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sobreviventes', models.BigIntegerField(default=0, verbose_name='Sobreviventes Arquivados')),
+                ('itens', models.JSONField(default=dict, verbose_name='Itens Arquivados por Tipo')),
+            ],
+            options={
+                'verbose_name': 'Resumo do Arquivo',
+                'verbose_name_plural': 'Resumo do Arquivo',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0007_arquivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntencaoEscambo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_oferecido', models.CharField(choices=[('agua', 'Água'), ('comida', 'Comida'), ('medicamento', 'Medicamento'), ('municao', 'Munição')], max_length=20, verbose_name='Item Oferecido')),
+                ('quantidade_oferecida', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Quantidade Oferecida')),
+                ('tipo_desejado', models.CharField(choices=[('agua', 'Água'), ('comida', 'Comida'), ('medicamento', 'Medicamento'), ('municao', 'Munição')], max_length=20, verbose_name='Item Desejado')),
+                ('quantidade_desejada', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Quantidade Desejada')),
+                ('ativa', models.BooleanField(default=True, verbose_name='Ativa?')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Data de Conclusão')),
+                ('sobrevivente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intencoes_escambo', to='Sobrevivente.sobreviventes', verbose_name='Sobrevivente')),
+            ],
+            options={
+                'verbose_name': 'Intenção de Escambo',
+                'verbose_name_plural': 'Intenções de Escambo',
+                'indexes': [models.Index(condition=models.Q(('ativa', True)), fields=['id'], name='intencao_escambo_ativa_idx')],
+            },
+        ),
+    ]
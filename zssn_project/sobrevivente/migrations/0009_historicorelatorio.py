@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0008_intencaoescambo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoRelatorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularidade', models.CharField(choices=[('hora', 'Hora'), ('dia', 'Dia')], max_length=10, verbose_name='Granularidade')),
+                ('inicio', models.DateTimeField(verbose_name='Início do Intervalo')),
+                ('amostras', models.PositiveIntegerField(default=0, verbose_name='Amostras')),
+                ('somas', models.JSONField(default=dict, verbose_name='Somas')),
+                ('minimos', models.JSONField(default=dict, verbose_name='Mínimos')),
+                ('maximos', models.JSONField(default=dict, verbose_name='Máximos')),
+                ('ultimos', models.JSONField(default=dict, verbose_name='Últimos Valores')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Relatórios',
+                'verbose_name_plural': 'Histórico de Relatórios',
+                'unique_together': {('granularidade', 'inicio')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0009_historicorelatorio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chaveidempotencia',
+            name='cliente',
+            field=models.CharField(default='', max_length=255, verbose_name='Cliente'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='chaveidempotencia',
+            unique_together={('chave', 'caminho', 'cliente')},
+        ),
+    ]
@@ -0,0 +1,17 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sobrevivente', '0010_chaveidempotencia_cliente'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reporteinfeccao',
+            name='sobrevivente_reportador',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reportes_feitos', to='Sobrevivente.sobreviventes', verbose_name='Sobrevivente que Reportou'),
+        ),
+    ]
@@ -0,0 +1,137 @@
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .fila import tarefa
+from .models import ChaveIdempotencia
+from .routers import ativar_replica, desativar_replica
+from .throttling import identidade_cliente
+
+
+class LeituraEmReplicaMixin:
+    """Envia as ações de leitura do ViewSet para as réplicas
+
+    Depois de uma escrita bem-sucedida o cliente recebe um cookie que mantém
+    suas leituras no banco principal por ``REPLICA_FIXACAO_SEGUNDOS``,
+    cobrindo o atraso de replicação. Uma ação de leitura que escreve (ex.:
+    enfileirar uma tarefa) lê do principal dali em diante, só até o fim da
+    requisição (ver ativar_replica).
+    """
+
+    acoes_leitura_replica = ()
+    cookie_fixacao = 'zssn_primario_ate'
+
+    def initial(self, request, *args, **kwargs):
+        self._token_replica = None
+        super().initial(request, *args, **kwargs)
+        if self.action in self.acoes_leitura_replica and not self._fixado_no_primario(request):
+            self._token_replica = ativar_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, '_token_replica', None) is not None:
+            desativar_replica(self._token_replica)
+            self._token_replica = None
+
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            segundos = getattr(settings, 'REPLICA_FIXACAO_SEGUNDOS', 5)
+            response.set_cookie(self.cookie_fixacao, str(int(time.time() + segundos)), max_age=segundos)
+        return response
+
+    def _fixado_no_primario(self, request):
+        try:
+            return int(request.COOKIES.get(self.cookie_fixacao, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+class IdempotenciaMixin:
+    """Suporte ao cabeçalho Idempotency-Key nas escritas (POST/PATCH) do ViewSet
+
+    A primeira requisição com uma chave roda numa transação junto com o
+    registro da chave, e a resposta (inclusive erros 4xx) é gravada nessa
+    mesma transação. Repetições dentro de IDEMPOTENCIA_TTL_HORAS recebem a
+    resposta gravada, sem validar nem tocar no inventário de novo. Duplicatas
+    simultâneas esperam no lock da linha da chave e, quando a primeira
+    termina, também recebem a resposta gravada.
+
+    A chave vale por cliente (usuário autenticado ou IP, como no
+    ClienteThrottle): outro cliente com a mesma chave não recebe a resposta
+    gravada de ninguém.
+    """
+
+    metodos_idempotentes = ('POST', 'PATCH')
+    cabecalho_idempotencia = 'Idempotency-Key'
+
+    def dispatch(self, request, *args, **kwargs):
+        chave = request.headers.get(self.cabecalho_idempotencia)
+        if not chave or request.method not in self.metodos_idempotentes:
+            return super().dispatch(request, *args, **kwargs)
+
+        if len(chave) > ChaveIdempotencia._meta.get_field('chave').max_length:
+            return self._erro_idempotencia(f'{self.cabecalho_idempotencia} muito longa.', 400)
+
+        cliente = (identidade_cliente(request, getattr(request, 'user', None)) or '')[:255]
+        impressao = hashlib.sha256(
+            request.method.encode() + b' ' + request.get_full_path().encode() + b'\n' + request.body
+        ).hexdigest()
+        agora = timezone.now()
+        expira_em = agora + timedelta(hours=getattr(settings, 'IDEMPOTENCIA_TTL_HORAS', 24))
+
+        with transaction.atomic():
+            registro, criado = ChaveIdempotencia.objects.select_for_update().get_or_create(
+                chave=chave,
+                caminho=request.path,
+                cliente=cliente,
+                defaults={'metodo': request.method, 'impressao': impressao, 'expira_em': expira_em},
+            )
+
+            if not criado and registro.expira_em <= agora:
+                # Chave expirada: é reutilizada como se fosse nova
+                registro.metodo, registro.impressao, registro.expira_em = request.method, impressao, expira_em
+                registro.status_code = None
+                criado = True
+
+            if not criado:
+                if registro.impressao != impressao:
+                    return self._erro_idempotencia(
+                        f'{self.cabecalho_idempotencia} já usada com outro conteúdo de requisição.', 422
+                    )
+                return self._repetir(registro)
+
+            response = super().dispatch(request, *args, **kwargs)
+
+            if response.status_code >= 500 or response.status_code == 429:
+                # Falha do servidor ou throttle: desfaz tudo, inclusive a chave, para permitir nova tentativa
+                transaction.set_rollback(True)
+                return response
+
+            if hasattr(response, 'render'):
+                response.render()
+            registro.status_code = response.status_code
+            registro.content_type = response.get('Content-Type', '')
+            registro.corpo = response.content
+            registro.save()
+
+        return response
+
+    def _repetir(self, registro):
+        response = HttpResponse(bytes(registro.corpo), status=registro.status_code, content_type=registro.content_type)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def _erro_idempotencia(self, mensagem, status_code):
+        return JsonResponse({'erro': mensagem}, status=status_code, json_dumps_params={'ensure_ascii': False})
+
+
+@tarefa(intervalo=3600, prioridade=-10)
+def limpar_chaves_idempotencia_expiradas():
+    """Remove as respostas gravadas cuja validade já passou; retorna quantas foram removidas"""
+    removidas, _ = ChaveIdempotencia.objects.filter(expira_em__lte=timezone.now()).delete()
+    return removidas
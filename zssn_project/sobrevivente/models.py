@@ -1,6 +1,9 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .normalizacao import normalizar_nome
+
 
 class TipoItem(models.TextChoices):
     """Tipos de itens disponíveis no sistema"""
@@ -21,6 +24,14 @@ class Sobreviventes(models.Model):
     """Modelo que representa um sobrevivente no sistema"""
 
     nome = models.CharField(max_length=100, verbose_name="Nome do Sobrevivente")
+    # Nome sem acentos e em minúsculas, mantido por save(); usado pela busca
+    nome_normalizado = models.CharField(
+        max_length=255,
+        db_index=True,
+        editable=False,
+        default='',
+        verbose_name="Nome Normalizado"
+    )
     idade = models.IntegerField(
         validators=[MinValueValidator(0), MaxValueValidator(120)],
         verbose_name="Idade"
@@ -48,11 +59,28 @@ class Sobreviventes(models.Model):
         verbose_name = "Sobrevivente"
         verbose_name_plural = "Sobreviventes"
         ordering = ['-data_criacao']
+        indexes = [
+            # Ordenação padrão (e desempate por id) das listagens paginadas
+            models.Index(fields=['-data_criacao', '-id'], name='sobrev_data_criacao_id_idx'),
+            # Candidatos ao arquivamento (só os infectados entram no índice)
+            models.Index(
+                fields=['data_atualizacao'],
+                condition=models.Q(infectado=True),
+                name='sobrev_infectados_atualiz_idx',
+            ),
+        ]
 
     def __str__(self):
         status = "INFECTADO" if self.infectado else "SAUDÁVEL"
         return f"{self.nome} ({status})"
 
+    def save(self, *args, **kwargs):
+        self.nome_normalizado = normalizar_nome(self.nome)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nome' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nome_normalizado'}
+        super().save(*args, **kwargs)
+
     def pode_fazer_escambo(self):
         """Verifica se o sobrevivente pode participar de escambos"""
         return not self.infectado
@@ -77,9 +105,12 @@ class ReporteInfeccao(models.Model):
         related_name='reportes_recebidos',
         verbose_name="Sobrevivente Reportado"
     )
+    # Fica nulo quando o reportador é arquivado (o arquivamento o desvincula e
+    # o reporte continua valendo); excluir o reportador apaga seus reportes
     sobrevivente_reportador = models.ForeignKey(
         Sobreviventes,
         on_delete=models.CASCADE,
+        null=True,
         related_name='reportes_feitos',
         verbose_name="Sobrevivente que Reportou"
     )
@@ -91,7 +122,8 @@ class ReporteInfeccao(models.Model):
         unique_together = ['sobrevivente_reportado', 'sobrevivente_reportador']
 
     def __str__(self):
-        return f"{self.sobrevivente_reportador.nome} reportou {self.sobrevivente_reportado.nome}"
+        reportador = self.sobrevivente_reportador.nome if self.sobrevivente_reportador else "Sobrevivente arquivado"
+        return f"{reportador} reportou {self.sobrevivente_reportado.nome}"
 
 
 class ItemInventario(models.Model):
@@ -137,3 +169,225 @@ class ItemInventario(models.Model):
     def get_pontos_unitarios(self):
         """Retorna os pontos de uma unidade deste item"""
         return self.PONTOS_ITENS[self.tipo_item]
+
+
+class IntencaoEscambo(models.Model):
+    """Oferta de um lote de itens em troca de outro, de mesmo valor em pontos
+
+    As intenções ativas formam o grafo usado pelo escambo circular (ver
+    escambo_circular.py): quem deseja exatamente o lote que outro oferece
+    pode receber dele, e um ciclo fechado é liquidado de uma vez.
+    """
+
+    sobrevivente = models.ForeignKey(
+        Sobreviventes,
+        on_delete=models.CASCADE,
+        related_name='intencoes_escambo',
+        verbose_name="Sobrevivente"
+    )
+    tipo_oferecido = models.CharField(max_length=20, choices=TipoItem.choices, verbose_name="Item Oferecido")
+    quantidade_oferecida = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        verbose_name="Quantidade Oferecida"
+    )
+    tipo_desejado = models.CharField(max_length=20, choices=TipoItem.choices, verbose_name="Item Desejado")
+    quantidade_desejada = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        verbose_name="Quantidade Desejada"
+    )
+    ativa = models.BooleanField(default=True, verbose_name="Ativa?")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_conclusao = models.DateTimeField(null=True, blank=True, verbose_name="Data de Conclusão")
+
+    class Meta:
+        verbose_name = "Intenção de Escambo"
+        verbose_name_plural = "Intenções de Escambo"
+        indexes = [
+            # Carga do solucionador: só as intenções ativas, em ordem de chegada
+            models.Index(fields=['id'], condition=models.Q(ativa=True), name='intencao_escambo_ativa_idx'),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.sobrevivente.nome}: {self.quantidade_oferecida}x {self.get_tipo_oferecido_display()} "
+            f"por {self.quantidade_desejada}x {self.get_tipo_desejado_display()}"
+        )
+
+    def calcular_pontos(self):
+        """Pontos do lote oferecido (iguais aos do lote desejado)"""
+        return self.quantidade_oferecida * ItemInventario.PONTOS_ITENS[self.tipo_oferecido]
+
+
+class TipoEvento(models.TextChoices):
+    """Tipos de eventos publicados no feed de alterações"""
+    INFECCAO = 'infeccao', 'Infecção'
+    ESCAMBO = 'escambo', 'Escambo'
+    INVENTARIO = 'inventario', 'Inventário'
+
+
+class EventoOutbox(models.Model):
+    """Evento gravado na mesma transação da escrita que o originou (outbox transacional)
+
+    O id crescente é o ``id`` do Server-Sent Event, usado pelos clientes
+    para retomar o feed via ``Last-Event-ID``.
+    """
+
+    tipo = models.CharField(max_length=20, choices=TipoEvento.choices, verbose_name="Tipo do Evento")
+    sobrevivente_id = models.BigIntegerField(verbose_name="ID do Sobrevivente")
+    dados = models.JSONField(default=dict, verbose_name="Dados do Evento")
+    data_criacao = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Data do Evento")
+
+    class Meta:
+        verbose_name = "Evento do Outbox"
+        verbose_name_plural = "Eventos do Outbox"
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.get_tipo_display()} (sobrevivente {self.sobrevivente_id})"
+
+
+class ChaveIdempotencia(models.Model):
+    """Resposta armazenada de uma escrita feita com o cabeçalho Idempotency-Key"""
+
+    chave = models.CharField(max_length=255, verbose_name="Chave de Idempotência")
+    # Usuário ou IP de quem enviou a chave: a mesma chave de outro cliente não repete esta resposta
+    cliente = models.CharField(max_length=255, default='', verbose_name="Cliente")
+    metodo = models.CharField(max_length=10, verbose_name="Método HTTP")
+    caminho = models.CharField(max_length=255, verbose_name="Caminho")
+    impressao = models.CharField(max_length=64, verbose_name="Hash da Requisição")
+    status_code = models.PositiveSmallIntegerField(null=True, verbose_name="Status da Resposta")
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Content-Type da Resposta")
+    corpo = models.BinaryField(default=bytes, verbose_name="Corpo da Resposta")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    expira_em = models.DateTimeField(db_index=True, verbose_name="Expira em")
+
+    class Meta:
+        verbose_name = "Chave de Idempotência"
+        verbose_name_plural = "Chaves de Idempotência"
+        unique_together = ['chave', 'caminho', 'cliente']
+
+    def __str__(self):
+        return f"{self.chave} ({self.metodo} {self.caminho})"
+
+
+class StatusTarefa(models.TextChoices):
+    """Estados de uma tarefa da fila de segundo plano"""
+    PENDENTE = 'pendente', 'Pendente'
+    EXECUTANDO = 'executando', 'Executando'
+    CONCLUIDA = 'concluida', 'Concluída'
+    FALHOU = 'falhou', 'Falhou'
+
+
+class Tarefa(models.Model):
+    """Tarefa da fila de segundo plano, executada pelo comando ``manage.py trabalhador``"""
+
+    nome = models.CharField(max_length=100, verbose_name="Nome da Tarefa")
+    argumentos = models.JSONField(default=dict, encoder=DjangoJSONEncoder, verbose_name="Argumentos")
+    status = models.CharField(
+        max_length=20,
+        choices=StatusTarefa.choices,
+        default=StatusTarefa.PENDENTE,
+        verbose_name="Status"
+    )
+    prioridade = models.SmallIntegerField(default=0, verbose_name="Prioridade")
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    max_tentativas = models.PositiveSmallIntegerField(default=3, verbose_name="Máximo de Tentativas")
+    executar_apos = models.DateTimeField(verbose_name="Executar Após")
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Resultado")
+    erro = models.TextField(blank=True, verbose_name="Último Erro")
+    trabalhador = models.CharField(max_length=100, blank=True, verbose_name="Trabalhador")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    data_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Início da Execução")
+    data_fim = models.DateTimeField(null=True, blank=True, verbose_name="Fim da Execução")
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        indexes = [
+            # Próximas tarefas a executar: pendentes, por prioridade e horário
+            models.Index(fields=['status', '-prioridade', 'executar_apos', 'id'], name='tarefa_fila_idx'),
+            models.Index(fields=['nome', 'status'], name='tarefa_nome_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.nome} ({self.get_status_display()})"
+
+
+class SobreviventeArquivado(models.Model):
+    """Sobrevivente infectado movido das tabelas principais (ver arquivamento.py)
+
+    Guarda o mesmo id do registro original. Inventário e reportes recebidos
+    ficam compactados em colunas JSON: ``inventario`` como
+    ``[[tipo_item, quantidade], ...]`` e ``reportes`` como
+    ``[[reportador_id, data_reporte], ...]``.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    nome = models.CharField(max_length=100, verbose_name="Nome do Sobrevivente")
+    idade = models.IntegerField(verbose_name="Idade")
+    sexo = models.CharField(max_length=1, choices=SexoChoices.choices, verbose_name="Sexo")
+    latitude = models.DecimalField(max_digits=10, decimal_places=7, verbose_name="Latitude da Localização")
+    longitude = models.DecimalField(max_digits=10, decimal_places=7, verbose_name="Longitude da Localização")
+    inventario = models.JSONField(default=list, verbose_name="Inventário")
+    reportes = models.JSONField(default=list, encoder=DjangoJSONEncoder, verbose_name="Reportes Recebidos")
+    data_criacao = models.DateTimeField(verbose_name="Data de Cadastro")
+    data_atualizacao = models.DateTimeField(verbose_name="Última Atualização")
+    data_arquivamento = models.DateTimeField(auto_now_add=True, verbose_name="Data de Arquivamento")
+
+    class Meta:
+        verbose_name = "Sobrevivente Arquivado"
+        verbose_name_plural = "Sobreviventes Arquivados"
+
+    def __str__(self):
+        return f"{self.nome} (ARQUIVADO)"
+
+
+class ResumoArquivo(models.Model):
+    """Totais acumulados do arquivo (linha única), somados aos relatórios"""
+
+    sobreviventes = models.BigIntegerField(default=0, verbose_name="Sobreviventes Arquivados")
+    itens = models.JSONField(default=dict, verbose_name="Itens Arquivados por Tipo")
+
+    class Meta:
+        verbose_name = "Resumo do Arquivo"
+        verbose_name_plural = "Resumo do Arquivo"
+
+    def __str__(self):
+        return f"{self.sobreviventes} sobreviventes arquivados"
+
+
+class GranularidadeHistorico(models.TextChoices):
+    """Tamanho dos intervalos do histórico de relatórios"""
+    HORA = 'hora', 'Hora'
+    DIA = 'dia', 'Dia'
+
+
+class HistoricoRelatorio(models.Model):
+    """Métricas de ``relatorios`` agregadas em um intervalo (ver historico.py)
+
+    Cada métrica é guardada em quatro dicionários (soma, mínimo, máximo e
+    último valor das amostras do intervalo), o que permite recombinar os
+    intervalos horários em diários sem voltar às amostras.
+    """
+
+    granularidade = models.CharField(
+        max_length=10,
+        choices=GranularidadeHistorico.choices,
+        verbose_name="Granularidade"
+    )
+    inicio = models.DateTimeField(verbose_name="Início do Intervalo")
+    amostras = models.PositiveIntegerField(default=0, verbose_name="Amostras")
+    somas = models.JSONField(default=dict, verbose_name="Somas")
+    minimos = models.JSONField(default=dict, verbose_name="Mínimos")
+    maximos = models.JSONField(default=dict, verbose_name="Máximos")
+    ultimos = models.JSONField(default=dict, verbose_name="Últimos Valores")
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Histórico de Relatórios"
+        verbose_name_plural = "Histórico de Relatórios"
+        # Também atende às consultas por intervalo (granularidade + faixa de início)
+        unique_together = ['granularidade', 'inicio']
+
+    def __str__(self):
+        return f"{self.get_granularidade_display()} {self.inicio:%Y-%m-%d %H:%M} ({self.amostras} amostras)"
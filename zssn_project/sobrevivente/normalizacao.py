@@ -0,0 +1,14 @@
+import re
+import unicodedata
+
+_ESPACOS = re.compile(r'\s+')
+
+
+def normalizar_nome(nome):
+    """Forma de busca de um nome: sem acentos, em minúsculas e com espaços simples
+
+    ``'  José  da Conceição '`` vira ``'jose da conceicao'``.
+    """
+    decomposto = unicodedata.normalize('NFKD', nome or '')
+    sem_acentos = ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return _ESPACOS.sub(' ', sem_acentos).strip().casefold()
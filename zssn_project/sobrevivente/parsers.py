@@ -0,0 +1,20 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .mensagem_compacta import ErroMensagemCompacta, desempacotar
+
+
+class MessagePackParser(BaseParser):
+    """Parser para corpos de requisição em MessagePack"""
+
+    media_type = 'application/x-msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            dados = desempacotar(stream.read())
+        except ErroMensagemCompacta as exc:
+            raise ParseError(f'Erro ao interpretar MessagePack - {exc}')
+
+        if not isinstance(dados, dict):
+            raise ParseError('O corpo MessagePack deve ser um mapa.')
+        return dados
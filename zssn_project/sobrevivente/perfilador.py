@@ -0,0 +1,171 @@
+"""
+Perfilador de requisições por amostragem de pilhas
+
+O PerfiladorMiddleware perfila uma requisição quando um usuário staff pede
+``?__profile=1`` ou, aleatoriamente, na fração PERFILADOR_TAXA_AMOSTRAGEM
+das requisições. Uma thread amostra a pilha da requisição a cada
+PERFILADOR_INTERVALO_MS e o resultado (pilhas no formato "collapsed" dos
+flamegraphs e a linha do tempo do SQL) é gravado em um JSON por requisição
+em PERFILADOR_DIRETORIO. O comando ``manage.py perfis`` lista e agrega os
+perfis capturados, e a tarefa periódica ``limpar_perfis`` remove os mais
+antigos que PERFILADOR_MAX_IDADE_HORAS e os que passarem de
+PERFILADOR_MAX_ARQUIVOS.
+
+Só as requisições síncronas são perfiladas; as views assíncronas passam
+direto pelo middleware.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .fila import tarefa
+from .metricas import nome_acao
+
+
+def diretorio_perfis():
+    return Path(getattr(settings, 'PERFILADOR_DIRETORIO', Path(settings.BASE_DIR) / 'perfis'))
+
+
+@tarefa(intervalo=600, prioridade=-10)
+def limpar_perfis():
+    """Remove os perfis antigos e os excedentes (os mais antigos primeiro); retorna quantos foram removidos"""
+    max_arquivos = getattr(settings, 'PERFILADOR_MAX_ARQUIVOS', 1000)
+    limite = time.time() - getattr(settings, 'PERFILADOR_MAX_IDADE_HORAS', 72) * 3600
+
+    # O id do perfil começa pela data, então a ordem dos nomes é a ordem de criação
+    arquivos = sorted(diretorio_perfis().glob('*.json'))
+    excedentes = max(len(arquivos) - max_arquivos, 0)
+    removidos = 0
+    for posicao, arquivo in enumerate(arquivos):
+        try:
+            if posicao < excedentes or arquivo.stat().st_mtime < limite:
+                arquivo.unlink()
+                removidos += 1
+        except FileNotFoundError:
+            # Removido por outro processo (ou pelo comando perfis limpar)
+            pass
+    return {'removidos': removidos}
+
+
+class AmostradorPilhas(threading.Thread):
+    """Amostra periodicamente a pilha de outra thread"""
+
+    def __init__(self, thread_id, intervalo):
+        super().__init__(name='zssn-perfilador', daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.amostras = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            pilha = []
+            while frame is not None:
+                codigo = frame.f_code
+                pilha.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+                frame = frame.f_back
+            if pilha:
+                self.amostras[';'.join(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+class LinhaTempoSQL:
+    """Wrapper de execução SQL que registra início, duração e texto de cada consulta"""
+
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append({
+                'inicio_ms': round((inicio - self.inicio) * 1000, 3),
+                'duracao_ms': round((time.perf_counter() - inicio) * 1000, 3),
+                'banco': context['connection'].alias,
+                'sql': sql,
+            })
+
+
+class PerfiladorMiddleware:
+    """Perfila requisições sob demanda (staff) ou por amostragem"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        if not self._deve_perfilar(request):
+            return self.get_response(request)
+
+        intervalo = getattr(settings, 'PERFILADOR_INTERVALO_MS', 5) / 1000
+        inicio = time.perf_counter()
+        linha_tempo = LinhaTempoSQL(inicio)
+        amostrador = AmostradorPilhas(threading.get_ident(), intervalo)
+
+        with ExitStack() as pilha:
+            for alias in connections:
+                pilha.enter_context(connections[alias].execute_wrapper(linha_tempo))
+            amostrador.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                amostrador.parar()
+
+        self._gravar(request, response, time.perf_counter() - inicio, amostrador, linha_tempo)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perfilador_acao = nome_acao(request, view_func)
+
+    def _deve_perfilar(self, request):
+        if request.GET.get('__profile') == '1':
+            usuario = getattr(request, 'user', None)
+            return bool(usuario and usuario.is_staff)
+        taxa = getattr(settings, 'PERFILADOR_TAXA_AMOSTRAGEM', 0)
+        return taxa > 0 and random.random() < taxa
+
+    def _gravar(self, request, response, duracao, amostrador, linha_tempo):
+        agora = timezone.now()
+        perfil = {
+            'id': f'{agora:%Y%m%dT%H%M%S}_{uuid.uuid4().hex[:8]}',
+            'data': agora.isoformat(),
+            'metodo': request.method,
+            'caminho': request.path,
+            'acao': getattr(request, '_perfilador_acao', None),
+            'status': response.status_code,
+            'duracao_ms': round(duracao * 1000, 3),
+            'intervalo_ms': amostrador.intervalo * 1000,
+            'pilhas': dict(amostrador.amostras),
+            'sql': linha_tempo.consultas,
+        }
+
+        diretorio = diretorio_perfis()
+        diretorio.mkdir(parents=True, exist_ok=True)
+        with open(diretorio / f"{perfil['id']}.json", 'w', encoding='utf-8') as arquivo:
+            json.dump(perfil, arquivo, ensure_ascii=False)
@@ -0,0 +1,116 @@
+import asyncio
+
+from django.db.models import Sum
+
+from .arquivamento import aresumo_arquivo, resumo_arquivo
+from .fila import tarefa
+from .models import Sobreviventes, ItemInventario, TipoItem
+
+
+def _consulta_totais_itens(infectado):
+    """Soma das quantidades por tipo de item, para saudáveis ou infectados"""
+    return (
+        ItemInventario.objects.filter(sobrevivente__infectado=infectado)
+        .order_by()
+        .values('tipo_item')
+        .annotate(total=Sum('quantidade'))
+        .values_list('tipo_item', 'total')
+    )
+
+
+@tarefa(prioridade=5)
+def gerar_relatorio():
+    """Gera os relatórios estatísticos do sistema"""
+    total_sobreviventes = Sobreviventes.objects.count()
+    sobreviventes_infectados = Sobreviventes.objects.filter(infectado=True).count()
+    totais_saudaveis = dict(_consulta_totais_itens(False))
+    totais_infectados = dict(_consulta_totais_itens(True))
+    arquivados, totais_arquivados = resumo_arquivo()
+
+    return montar_relatorio(
+        total_sobreviventes + arquivados,
+        sobreviventes_infectados + arquivados,
+        totais_saudaveis,
+        _somar_totais(totais_infectados, totais_arquivados),
+    )
+
+
+async def agerar_relatorio():
+    """Versão assíncrona de gerar_relatorio, com as consultas independentes em paralelo"""
+
+    async def totais(infectado):
+        return {tipo_item: total async for tipo_item, total in _consulta_totais_itens(infectado)}
+
+    (
+        total_sobreviventes, sobreviventes_infectados, totais_saudaveis, totais_infectados,
+        (arquivados, totais_arquivados),
+    ) = await asyncio.gather(
+        Sobreviventes.objects.acount(),
+        Sobreviventes.objects.filter(infectado=True).acount(),
+        totais(False),
+        totais(True),
+        aresumo_arquivo(),
+    )
+
+    return montar_relatorio(
+        total_sobreviventes + arquivados,
+        sobreviventes_infectados + arquivados,
+        totais_saudaveis,
+        _somar_totais(totais_infectados, totais_arquivados),
+    )
+
+
+def _somar_totais(totais_infectados, totais_arquivados):
+    """Soma aos itens dos infectados os itens dos sobreviventes arquivados (todos infectados)"""
+    totais = dict(totais_infectados)
+    for tipo_item, quantidade in totais_arquivados.items():
+        totais[tipo_item] = (totais.get(tipo_item) or 0) + quantidade
+    return totais
+
+
+def montar_relatorio(total_sobreviventes, sobreviventes_infectados, totais_saudaveis, totais_infectados):
+    """Monta o relatório a partir dos contadores e das somas de itens por tipo"""
+    sobreviventes_saudaveis = total_sobreviventes - sobreviventes_infectados
+
+    # Calcula porcentagens
+    if total_sobreviventes > 0:
+        porcentagem_infectados = (sobreviventes_infectados / total_sobreviventes) * 100
+        porcentagem_saudaveis = (sobreviventes_saudaveis / total_sobreviventes) * 100
+    else:
+        porcentagem_infectados = 0
+        porcentagem_saudaveis = 0
+
+    # Calcula médias de itens por usuário (apenas sobreviventes saudáveis)
+    medias_itens = {}
+    for tipo_item, nome_item in TipoItem.choices:
+        if sobreviventes_saudaveis > 0:
+            media = (totais_saudaveis.get(tipo_item) or 0) / sobreviventes_saudaveis
+        else:
+            media = 0
+
+        medias_itens[f'media_{tipo_item}_por_usuario'] = round(media, 2)
+
+    # Calcula pontos perdidos por usuários infectados
+    pontos_perdidos = sum(
+        (total or 0) * ItemInventario.PONTOS_ITENS[tipo_item]
+        for tipo_item, total in totais_infectados.items()
+    )
+
+    return {
+        'resumo_geral': {
+            'total_sobreviventes': total_sobreviventes,
+            'sobreviventes_saudaveis': sobreviventes_saudaveis,
+            'sobreviventes_infectados': sobreviventes_infectados,
+        },
+        'porcentagens': {
+            'porcentagem_infectados': round(porcentagem_infectados, 2),
+            'porcentagem_nao_infectados': round(porcentagem_saudaveis, 2),
+        },
+        'medias_itens': medias_itens,
+        'pontos_perdidos_infectados': pontos_perdidos,
+        'observacoes': {
+            'nota_1': 'Apenas sobreviventes saudáveis são considerados nos cálculos de média.',
+            'nota_2': 'Pontos perdidos referem-se aos itens de sobreviventes infectados que ficaram inacessíveis.',
+            'nota_3': 'Sobreviventes infectados não aparecem na listagem principal.'
+        }
+    }
@@ -0,0 +1,95 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .mensagem_compacta import empacotar
+from .metricas import cronometrar_serializacao
+from .models import TipoItem
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o renderer padrão do DRF
+    orjson = None
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """Renderer JSON que usa orjson quando disponível
+
+    Gera os mesmos bytes do JSONRenderer do DRF (compacto e sem escapar
+    unicode). Tipos que o orjson não conhece são convertidos pelo encoder
+    do próprio DRF.
+    """
+
+    OPCOES_ORJSON = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with cronometrar_serializacao():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Saída indentada (API navegável, ?indent=) fica com o renderer padrão
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._converter, option=self.OPCOES_ORJSON)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Mesmo tratamento do DRF para os separadores de linha do JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    @staticmethod
+    def _converter(obj):
+        """Converte tipos não suportados pelo orjson usando o encoder do DRF"""
+        return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer MessagePack compacto para dispositivos de campo
+
+    O inventário vai em formato colunar: ``tipos`` é um bytes com um código
+    por item (ordem de TipoItem, anunciada no cabeçalho ``X-Tipos-Itens``) e
+    ``quantidades`` a lista de quantidades correspondente. Nomes e pontos
+    dos itens são derivados no cliente a partir do código.
+    """
+
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    CODIGOS_ITENS = {tipo.value: codigo for codigo, tipo in enumerate(TipoItem)}
+    CABECALHO_TIPOS = ','.join(tipo.value for tipo in TipoItem)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['X-Tipos-Itens'] = self.CABECALHO_TIPOS
+
+        with cronometrar_serializacao():
+            return empacotar(self._colunar(data), default=JSONRapidoRenderer._converter)
+
+    def _colunar(self, dados):
+        """Converte os inventários encontrados em ``dados`` para o formato colunar"""
+        if isinstance(dados, list):
+            return [self._colunar(valor) for valor in dados]
+        if isinstance(dados, dict):
+            return {
+                chave: self._inventario(valor) if chave == 'inventario' else self._colunar(valor)
+                for chave, valor in dados.items()
+            }
+        return dados
+
+    def _inventario(self, itens):
+        if not isinstance(itens, list) or not all(isinstance(item, dict) and 'tipo_item' in item for item in itens):
+            return self._colunar(itens)
+        return {
+            'tipos': bytes(self.CODIGOS_ITENS[item['tipo_item']] for item in itens),
+            'quantidades': [item['quantidade'] for item in itens],
+        }
@@ -0,0 +1,98 @@
+import functools
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRINCIPAL = 'default'
+
+
+class _EscopoReplica:
+    """Bloco cujas leituras podem ir para réplicas, até que ele faça uma escrita"""
+
+    __slots__ = ('primario', 'conexao', 'detector')
+
+    def __init__(self):
+        self.primario = False
+        self.conexao = connections[PRINCIPAL]
+        self.detector = functools.partial(_detectar_escrita, self)
+
+
+# Escopo de leitura em réplica do contexto atual (None: só o banco principal)
+_escopo_replica = ContextVar('escopo_replica', default=None)
+
+
+def ativar_replica():
+    """Permite que as leituras do contexto atual usem réplicas; retorna o token para desfazer
+
+    Uma escrita no banco principal dentro do escopo (qualquer comando que não
+    seja SELECT) fixa as leituras seguintes do mesmo escopo no principal,
+    para que o contexto enxergue o que acabou de gravar. A fixação termina
+    junto com o escopo.
+    """
+    escopo = _EscopoReplica()
+    # Removido por identidade na saída: outros wrappers (ex.: métricas) podem entrar depois deste
+    escopo.conexao.execute_wrappers.append(escopo.detector)
+    return escopo, _escopo_replica.set(escopo)
+
+
+def desativar_replica(token):
+    """Desfaz uma chamada anterior a ativar_replica"""
+    escopo, token = token
+    if escopo.detector in escopo.conexao.execute_wrappers:
+        escopo.conexao.execute_wrappers.remove(escopo.detector)
+    _escopo_replica.reset(token)
+
+
+@contextmanager
+def ler_de_replica():
+    """Executa o bloco com leituras direcionadas às réplicas"""
+    token = ativar_replica()
+    try:
+        yield
+    finally:
+        desativar_replica(token)
+
+
+def _detectar_escrita(escopo, execute, sql, params, many, context):
+    if not escopo.primario and sql.lstrip()[:6].upper() != 'SELECT':
+        escopo.primario = True
+    return execute(sql, params, many, context)
+
+
+class RoteadorReplicas:
+    """Roteador de banco que envia leituras seguras para réplicas
+
+    Só lê de réplica quem ativou explicitamente (ver ``ler_de_replica``) e
+    enquanto o escopo não tiver escrito nada. Os métodos só consultam o
+    estado; quem o altera são ativar_replica/desativar_replica.
+    """
+
+    PRINCIPAL = PRINCIPAL
+
+    def _replicas(self):
+        return getattr(settings, 'REPLICAS_LEITURA', [])
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        escopo = _escopo_replica.get()
+        if replicas and escopo is not None and not escopo.primario:
+            return random.choice(replicas)
+        return self.PRINCIPAL
+
+    def db_for_write(self, model, **hints):
+        return self.PRINCIPAL
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {self.PRINCIPAL, *self._replicas()}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Réplicas recebem o esquema pela replicação do banco principal
+        if db in self._replicas():
+            return False
+        return None
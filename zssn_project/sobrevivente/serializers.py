@@ -1,5 +1,17 @@
+import asyncio
+from collections import defaultdict
+from decimal import Context, Decimal
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Sobreviventes, ItemInventario, ReporteInfeccao, TipoItem
+from .historico import DURACOES
+from .metricas import cronometrar_serializacao
+from .models import (
+    Sobreviventes, ItemInventario, IntencaoEscambo, ReporteInfeccao, SobreviventeArquivado, Tarefa, TipoItem,
+    GranularidadeHistorico
+)
 
 
 class ItemInventarioSerializer(serializers.ModelSerializer):
@@ -56,6 +68,152 @@ class SobreviventeSerializer(serializers.ModelSerializer):
         return obj.reportes_recebidos.count()
 
 
+class SobreviventeLeituraRapidaSerializer:
+    """Serializer de leitura otimizado para listagem e detalhe de sobreviventes
+
+    Produz exatamente a mesma saída de SobreviventeSerializer, mas monta os
+    dicionários direto de linhas ``.values()``, com três consultas no total
+    (sobreviventes, inventários e contagem de reportes) e sem a maquinaria
+    de campos do DRF.
+    """
+
+    CAMPOS = ('id', 'nome', 'idade', 'sexo', 'latitude', 'longitude', 'infectado', 'data_criacao')
+    CAMPOS_ARQUIVO = ('id', 'nome', 'idade', 'sexo', 'latitude', 'longitude', 'data_criacao', 'inventario', 'reportes')
+
+    # Tabelas pré-calculadas por tipo de item
+    NOMES_ITENS = {tipo.value: tipo.label for tipo in TipoItem}
+    PONTOS_ITENS = {tipo.value: pontos for tipo, pontos in ItemInventario.PONTOS_ITENS.items()}
+
+    # Mesmo arredondamento de DecimalField(max_digits=10, decimal_places=7)
+    CASAS_DECIMAIS = Decimal('.1') ** 7
+    CONTEXTO_DECIMAL = Context(prec=10)
+
+    def serializar(self, queryset):
+        """Serializa um queryset de sobreviventes em uma lista de dicionários"""
+        linhas = list(queryset.values(*self.CAMPOS))
+        if not linhas:
+            return []
+
+        ids = queryset.values('pk')
+        return self._montar_todos(linhas, self._consulta_itens(ids), self._consulta_reportes(ids))
+
+    async def aserializar(self, queryset):
+        """Versão assíncrona de serializar, com as três consultas em paralelo"""
+        ids = queryset.values('pk')
+        linhas, itens, reportes = await asyncio.gather(
+            self._alistar(queryset.values(*self.CAMPOS)),
+            self._alistar(self._consulta_itens(ids)),
+            self._alistar(self._consulta_reportes(ids)),
+        )
+        return self._montar_todos(linhas, itens, reportes)
+
+    async def aserializar_um(self, queryset, pk):
+        """Serializa um único sobrevivente; levanta DoesNotExist se ele não existir"""
+        linha = await queryset.values(*self.CAMPOS).aget(pk=pk)
+        ids = [linha['id']]
+        itens, reportes = await asyncio.gather(
+            self._alistar(self._consulta_itens(ids)),
+            self._alistar(self._consulta_reportes(ids)),
+        )
+        return self._montar_todos([linha], itens, reportes)[0]
+
+    def serializar_arquivados(self, queryset):
+        """Serializa sobreviventes arquivados na mesma forma dos demais (sempre infectados)"""
+        return self._montar_arquivados(queryset.values(*self.CAMPOS_ARQUIVO))
+
+    async def aserializar_arquivado_um(self, pk):
+        """Serializa um sobrevivente arquivado; levanta DoesNotExist se ele não existir"""
+        linha = await SobreviventeArquivado.objects.values(*self.CAMPOS_ARQUIVO).aget(pk=pk)
+        return self._montar_arquivados([linha])[0]
+
+    def _montar_arquivados(self, linhas_arquivo):
+        linhas, itens, reportes = [], [], {}
+        for linha in linhas_arquivo:
+            sobrevivente_id = linha['id']
+            itens.extend((sobrevivente_id, tipo_item, quantidade) for tipo_item, quantidade in linha.pop('inventario'))
+            reportes[sobrevivente_id] = len(linha.pop('reportes'))
+            linhas.append({**linha, 'infectado': True})
+        if not linhas:
+            return []
+        return self._montar_todos(linhas, itens, reportes)
+
+    @staticmethod
+    async def _alistar(queryset):
+        # Não usa aiterator(): em values_list ele executa o SQL no event loop
+        return [linha async for linha in queryset]
+
+    def _consulta_itens(self, ids):
+        return ItemInventario.objects.filter(sobrevivente_id__in=ids).order_by('id').values_list(
+            'sobrevivente_id', 'tipo_item', 'quantidade'
+        )
+
+    def _consulta_reportes(self, ids):
+        return (
+            ReporteInfeccao.objects.filter(sobrevivente_reportado_id__in=ids)
+            .order_by()
+            .values('sobrevivente_reportado_id')
+            .annotate(total=Count('id'))
+            .values_list('sobrevivente_reportado_id', 'total')
+        )
+
+    def _montar_todos(self, linhas, itens, reportes):
+        """Monta a saída a partir das linhas de sobreviventes, itens e contagens de reportes"""
+        inventarios = defaultdict(list)
+        for sobrevivente_id, tipo_item, quantidade in itens:
+            pontos_unitarios = self.PONTOS_ITENS[tipo_item]
+            inventarios[sobrevivente_id].append({
+                'tipo_item': tipo_item,
+                'quantidade': quantidade,
+                'pontos_unitarios': pontos_unitarios,
+                'pontos_totais': quantidade * pontos_unitarios,
+                'nome_item': self.NOMES_ITENS[tipo_item],
+            })
+
+        reportes = dict(reportes)
+        with cronometrar_serializacao():
+            return [self._montar(linha, inventarios, reportes) for linha in linhas]
+
+    def _montar(self, linha, inventarios, reportes):
+        """Monta o dicionário de saída de um sobrevivente"""
+        sobrevivente_id = linha['id']
+        infectado = linha['infectado']
+        inventario = inventarios.get(sobrevivente_id, [])
+
+        return {
+            'id': sobrevivente_id,
+            'nome': linha['nome'],
+            'idade': linha['idade'],
+            'sexo': linha['sexo'],
+            'latitude': self._formatar_decimal(linha['latitude']),
+            'longitude': self._formatar_decimal(linha['longitude']),
+            'infectado': infectado,
+            'inventario': inventario,
+            'total_pontos': 0 if infectado else sum(item['pontos_totais'] for item in inventario),
+            'status': "INFECTADO" if infectado else "SAUDÁVEL",
+            'total_reportes': reportes.get(sobrevivente_id, 0),
+            'data_criacao': self._formatar_data(linha['data_criacao']),
+        }
+
+    def _formatar_decimal(self, valor):
+        """Formata um decimal como o DecimalField do DRF (string com 7 casas)"""
+        if valor is None:
+            return None
+        if not isinstance(valor, Decimal):
+            valor = Decimal(str(valor).strip())
+        return '{:f}'.format(valor.quantize(self.CASAS_DECIMAIS, context=self.CONTEXTO_DECIMAL))
+
+    def _formatar_data(self, valor):
+        """Formata uma data como o DateTimeField do DRF (ISO 8601)"""
+        if not valor:
+            return None
+        if settings.USE_TZ and timezone.is_aware(valor):
+            valor = valor.astimezone(timezone.get_current_timezone())
+        valor = valor.isoformat()
+        if valor.endswith('+00:00'):
+            valor = valor[:-6] + 'Z'
+        return valor
+
+
 class SobreviventeCreateSerializer(serializers.ModelSerializer):
     """Serializer para criação de sobreviventes"""
 
@@ -77,6 +235,147 @@ class AtualizarLocalizacaoSerializer(serializers.Serializer):
     longitude = serializers.DecimalField(max_digits=10, decimal_places=7)
 
 
+class AnaliseReportesSerializer(serializers.Serializer):
+    """Serializer para os parâmetros da análise do grafo de reportes"""
+
+    tamanho_minimo_cluster = serializers.IntegerField(min_value=2, default=3)
+    limiar_anomalia = serializers.FloatField(min_value=0, default=3.5)
+    min_alvos_comuns = serializers.IntegerField(min_value=1, default=3)
+    limite = serializers.IntegerField(min_value=1, max_value=500, default=50)
+    assincrono = serializers.BooleanField(default=False)
+
+
+class IntencaoEscamboSerializer(serializers.ModelSerializer):
+    """Serializer para registrar e listar intenções de escambo circular"""
+
+    pontos = serializers.SerializerMethodField()
+
+    class Meta:
+        model = IntencaoEscambo
+        fields = [
+            'id', 'tipo_oferecido', 'quantidade_oferecida', 'tipo_desejado', 'quantidade_desejada',
+            'pontos', 'ativa', 'data_criacao', 'data_conclusao'
+        ]
+        read_only_fields = ['id', 'ativa', 'data_criacao', 'data_conclusao']
+
+    def get_pontos(self, obj):
+        """Retorna o valor em pontos de cada lado da troca"""
+        return obj.calcular_pontos()
+
+    def validate(self, data):
+        """Valida se a intenção troca itens diferentes com saldo zero"""
+        if data['tipo_oferecido'] == data['tipo_desejado']:
+            raise serializers.ValidationError("Os itens oferecido e desejado devem ser diferentes.")
+
+        pontos_oferecidos = data['quantidade_oferecida'] * ItemInventario.PONTOS_ITENS[data['tipo_oferecido']]
+        pontos_desejados = data['quantidade_desejada'] * ItemInventario.PONTOS_ITENS[data['tipo_desejado']]
+        if pontos_oferecidos != pontos_desejados:
+            raise serializers.ValidationError(
+                f"A intenção deve ter saldo zero. "
+                f"Oferecidos: {pontos_oferecidos} pontos, "
+                f"Desejados: {pontos_desejados} pontos."
+            )
+        return data
+
+
+class CancelarIntencaoSerializer(serializers.Serializer):
+    """Serializer para o parâmetro do cancelamento de uma intenção de escambo"""
+
+    intencao_id = serializers.IntegerField(min_value=1)
+
+
+class EscamboCircularSerializer(serializers.Serializer):
+    """Serializer para os parâmetros do solucionador de escambo circular"""
+
+    tamanho_maximo = serializers.IntegerField(min_value=2, max_value=6, required=False)
+    limite = serializers.IntegerField(min_value=1, max_value=10000, required=False)
+    simular = serializers.BooleanField(default=False)
+    assincrono = serializers.BooleanField(default=False)
+
+
+class HistoricoRelatorioSerializer(serializers.Serializer):
+    """Serializer para os parâmetros do histórico de relatórios"""
+
+    # Intervalos retornados por consulta, no máximo
+    MAX_INTERVALOS = 1000
+
+    inicio = serializers.DateTimeField(required=False)
+    fim = serializers.DateTimeField(required=False)
+    granularidade = serializers.ChoiceField(
+        choices=GranularidadeHistorico.choices,
+        default=GranularidadeHistorico.HORA
+    )
+
+    def validate(self, data):
+        """Preenche o período padrão (últimas 24 horas ou últimos 30 dias) e limita seu tamanho"""
+        duracao = DURACOES[data['granularidade']]
+        data.setdefault('fim', timezone.now())
+        data.setdefault('inicio', data['fim'] - duracao * (24 if data['granularidade'] == GranularidadeHistorico.HORA else 30))
+
+        if data['inicio'] > data['fim']:
+            raise serializers.ValidationError("O início deve ser anterior ao fim.")
+        if (data['fim'] - data['inicio']) / duracao > self.MAX_INTERVALOS:
+            raise serializers.ValidationError(
+                f"Período longo demais para a granularidade '{data['granularidade']}' "
+                f"(máximo de {self.MAX_INTERVALOS} intervalos)."
+            )
+        return data
+
+
+class BuscaSerializer(serializers.Serializer):
+    """Serializer para os parâmetros da busca por nome"""
+
+    q = serializers.CharField(max_length=100)
+    pagina = serializers.IntegerField(min_value=1, default=1)
+    tamanho = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class ExportarSerializer(serializers.Serializer):
+    """Serializer para os parâmetros da exportação paginada por id"""
+
+    apos_id = serializers.IntegerField(min_value=0, default=0)
+    tamanho = serializers.IntegerField(min_value=1, max_value=1000, default=500)
+
+
+class TarefaSerializer(serializers.ModelSerializer):
+    """Serializer para consultar o andamento de uma tarefa da fila"""
+
+    class Meta:
+        model = Tarefa
+        fields = [
+            'id', 'nome', 'status', 'prioridade', 'tentativas', 'max_tentativas',
+            'resultado', 'erro', 'executar_apos', 'data_criacao', 'data_inicio', 'data_fim'
+        ]
+        read_only_fields = fields
+
+
+class OperacaoLoteSerializer(serializers.Serializer):
+    """Serializer para uma operação de um lote"""
+
+    metodo = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    caminho = serializers.CharField(max_length=255)
+    corpo = serializers.JSONField(required=False, allow_null=True, default=None)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and isinstance(data.get('metodo'), str):
+            data = {**data, 'metodo': data['metodo'].upper()}
+        return super().to_internal_value(data)
+
+
+class LoteSerializer(serializers.Serializer):
+    """Serializer para um lote de operações executadas em uma única requisição"""
+
+    transacional = serializers.BooleanField(default=False)
+    operacoes = OperacaoLoteSerializer(many=True, allow_empty=False)
+
+    def validate_operacoes(self, value):
+        """Limita o tamanho do lote"""
+        maximo = getattr(settings, 'LOTE_MAX_OPERACOES', 50)
+        if len(value) > maximo:
+            raise serializers.ValidationError(f"O lote aceita no máximo {maximo} operações.")
+        return value
+
+
 class ReporteInfeccaoSerializer(serializers.ModelSerializer):
     """Serializer para reportes de infecção"""
 
@@ -121,20 +420,19 @@ class RemoverItemSerializer(serializers.Serializer):
     quantidade = serializers.IntegerField(min_value=1)
 
 
+class ItemEscamboSerializer(serializers.Serializer):
+    """Serializer para um item oferecido ou desejado em um escambo"""
+
+    tipo_item = serializers.ChoiceField(choices=TipoItem.choices)
+    quantidade = serializers.IntegerField(min_value=1)
+
+
 class EscamboSerializer(serializers.Serializer):
     """Serializer para realizar escambo entre sobreviventes"""
 
     sobrevivente_destino_id = serializers.IntegerField()
-    itens_oferecidos = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.IntegerField()
-        )
-    )
-    itens_desejados = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.IntegerField()
-        )
-    )
+    itens_oferecidos = ItemEscamboSerializer(many=True)
+    itens_desejados = ItemEscamboSerializer(many=True)
 
     def validate(self, data):
         """Valida se o escambo é justo (mesmo número de pontos)"""
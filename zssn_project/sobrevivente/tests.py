@@ -0,0 +1,753 @@
+import io
+import os
+import tempfile
+import time
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.renderers import JSONRenderer
+
+from . import fila, mensagem_compacta, views
+from .fila import enfileirar, executar_tarefa, tarefa
+from .mixins import LeituraEmReplicaMixin
+from .arquivamento import arquivar_infectados
+from .escambo_circular import CicloInvalido, Intencao, encontrar_ciclos, liquidar_ciclo, resolver_escambos
+from .eventos import publicar_evento
+from .historico import consultar_historico, limpar_historico, registrar_historico
+from .models import (
+    EventoOutbox, GranularidadeHistorico, HistoricoRelatorio, IntencaoEscambo, ItemInventario, ReporteInfeccao, ResumoArquivo, SobreviventeArquivado, Sobreviventes,
+    StatusTarefa, Tarefa, TipoEvento, TipoItem
+)
+from .parsers import MessagePackParser
+from .perfilador import limpar_perfis
+from .routers import RoteadorReplicas, ler_de_replica
+from .serializers import SobreviventeSerializer
+from .throttling import verificar_limite
+
+
+class RoteamentoReplicasTests(TestCase):
+    """Roteamento das leituras entre o banco principal e a réplica
+
+    Roda com ``--settings=zssn_project.settings_testes``, que define a
+    réplica ``replica1`` como espelho do banco de testes.
+    """
+
+    databases = {'default', 'replica1'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sobrevivente = Sobreviventes.objects.create(
+            nome='Ana Souza', idade=30, sexo='F', latitude=-23.55, longitude=-46.63
+        )
+
+    @contextmanager
+    def registrar_leituras(self):
+        """Bancos escolhidos pelo roteador para as leituras da tabela de sobreviventes"""
+        bancos = []
+        original = RoteadorReplicas.db_for_read
+
+        def db_for_read(roteador, model, **hints):
+            banco = original(roteador, model, **hints)
+            if model is Sobreviventes:
+                bancos.append(banco)
+            return banco
+
+        with mock.patch.object(RoteadorReplicas, 'db_for_read', db_for_read):
+            yield bancos
+
+    def test_acoes_de_leitura_usam_a_replica(self):
+        rotas = [
+            ('sobreviventes-list', []),
+            ('sobreviventes-detail', [self.sobrevivente.id]),
+            ('sobreviventes-relatorios', []),
+            ('sobreviventes-exportar', []),
+        ]
+        for nome, args in rotas:
+            with self.subTest(rota=nome):
+                with self.registrar_leituras() as bancos:
+                    self.client.get(reverse(nome, args=args))
+                self.assertTrue(bancos)
+                self.assertEqual(set(bancos), {'replica1'})
+
+    def test_leitura_logo_depois_de_escrita_usa_o_principal(self):
+        resposta = self.client.post(reverse('sobreviventes-list'), {
+            'nome': 'Bruno Lima', 'idade': 41, 'sexo': 'M', 'latitude': '-22.9', 'longitude': '-43.2',
+        }, content_type='application/json')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertIn(LeituraEmReplicaMixin.cookie_fixacao, resposta.cookies)
+
+        with self.registrar_leituras() as bancos:
+            resposta = self.client.get(reverse('sobreviventes-list'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(bancos)
+        self.assertEqual(set(bancos), {'default'})
+
+    def test_escrita_fixa_no_principal_apenas_o_proprio_escopo(self):
+        roteador = RoteadorReplicas()
+        with ler_de_replica():
+            self.assertEqual(roteador.db_for_read(Sobreviventes), 'replica1')
+            # Consultar o banco de escrita não altera o roteamento
+            self.assertEqual(roteador.db_for_write(Sobreviventes), 'default')
+            self.assertEqual(roteador.db_for_read(Sobreviventes), 'replica1')
+
+            Sobreviventes.objects.filter(pk=self.sobrevivente.pk).update(idade=31)
+            self.assertEqual(roteador.db_for_read(Sobreviventes), 'default')
+
+        with ler_de_replica():
+            self.assertEqual(roteador.db_for_read(Sobreviventes), 'replica1')
+        self.assertEqual(roteador.db_for_read(Sobreviventes), 'default')
+
+
+@override_settings(ZSSN_THROTTLE={'cliente': {'*': '3/min'}})
+class BaldeFichasTests(TestCase):
+    """Balde de fichas (GCRA) dos limites de requisições"""
+
+    def setUp(self):
+        cache.clear()
+
+    def verificar(self, instante):
+        with mock.patch('time.time', return_value=instante):
+            return verificar_limite('cliente', 'list', 'teste')
+
+    def test_rajada_reposicao_e_espera(self):
+        inicio = 1_000_000.0
+        self.assertEqual([self.verificar(inicio) for _ in range(3)], [None, None, None])
+        # Balde vazio: a próxima ficha volta em 20 s e a recusada não consome
+        self.assertAlmostEqual(self.verificar(inicio), 20)
+        self.assertAlmostEqual(self.verificar(inicio + 5), 15)
+        self.assertIsNone(self.verificar(inicio + 20))
+        self.assertIsNotNone(self.verificar(inicio + 20))
+
+    def test_balde_ocioso_nao_acumula_alem_da_capacidade(self):
+        inicio = 2_000_000.0
+        self.assertIsNone(self.verificar(inicio))
+        depois = inicio + 3600
+        self.assertEqual([self.verificar(depois) for _ in range(3)], [None, None, None])
+        self.assertAlmostEqual(self.verificar(depois), 20)
+
+
+execucoes = []
+
+
+@tarefa('teste_resultado_invalido', max_tentativas=3)
+def tarefa_resultado_invalido():
+    execucoes.append(1)
+    return {'objeto': object()}
+
+
+class ExecucaoTarefasTests(TestCase):
+    """Gravação do resultado das tarefas da fila"""
+
+    def test_resultado_nao_gravavel_conclui_sem_reexecutar(self):
+        registro = enfileirar('teste_resultado_invalido')
+        Tarefa.objects.filter(id=registro.id).update(status=StatusTarefa.EXECUTANDO, tentativas=1)
+
+        # Fechar a conexão derrubaria a transação do TestCase
+        with mock.patch.object(fila, 'close_old_connections'):
+            executar_tarefa(registro.id)
+
+        registro.refresh_from_db()
+        self.assertEqual(registro.status, StatusTarefa.CONCLUIDA)
+        self.assertIsNone(registro.resultado)
+        self.assertIn('resultado não pôde ser gravado', registro.erro)
+        self.assertEqual(len(execucoes), 1)
+
+
+class AcessoMetricasTests(TestCase):
+    """Restrição de acesso ao endpoint /metrics"""
+
+    @override_settings(METRICAS_IPS_PERMITIDOS=[], METRICAS_TOKEN='segredo')
+    def test_apenas_staff_ips_ou_token(self):
+        url = reverse('metricas')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer errado'}).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer segredo'}).status_code, 200)
+
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(METRICAS_IPS_PERMITIDOS=['127.0.0.1'], METRICAS_TOKEN=None, REPLICAS_LEITURA=[])
+    def test_acoes_separadas_por_viewset_e_rota(self):
+        sobrevivente = Sobreviventes.objects.create(nome='Ana', idade=30, sexo='F', latitude=0, longitude=0)
+        self.client.get(reverse('sobreviventes-detail', args=[sobrevivente.id]))
+        self.client.get(reverse('tarefa-detail', args=[enfileirar('teste_resultado_invalido').id]))
+        self.client.get(reverse('async-sobreviventes-proximos'), {'latitude': 0, 'longitude': 0})
+
+        exportado = self.client.get(reverse('metricas')).content.decode()
+        for acao in ('sobreviventes.retrieve', 'tarefa.retrieve', 'async-sobreviventes-proximos'):
+            self.assertIn(f'zssn_requisicoes_total{{acao="{acao}",status="200"}}', exportado)
+        self.assertNotIn('acao="retrieve"', exportado)
+        self.assertNotIn('acao="sobreviventes_proximos"', exportado)
+
+    @override_settings(METRICAS_IPS_PERMITIDOS=['127.0.0.1'], METRICAS_TOKEN=None)
+    def test_ip_permitido(self):
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='10.0.0.8').status_code, 403)
+
+
+class SobreviventesProximosTests(TestCase):
+    """Validação dos parâmetros da busca por proximidade"""
+
+    databases = {'default', 'replica1'}
+
+    def test_raio_e_limite_acima_do_maximo(self):
+        url = reverse('async-sobreviventes-proximos')
+        for parametros in ({'raio_km': 100000}, {'limite': 10 ** 6}, {'raio_km': 'nan'}):
+            with self.subTest(**parametros):
+                resposta = self.client.get(url, {'latitude': 0, 'longitude': 0, **parametros})
+                self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(self.client.get(url, {'latitude': 0, 'longitude': 0}).status_code, 200)
+
+
+@override_settings(REPLICAS_LEITURA=[])
+class SerializadorLeituraRapidaTests(TestCase):
+    """A leitura rápida de list/retrieve produz a mesma saída de SobreviventeSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.com_itens = Sobreviventes.objects.create(
+            nome='Ana Souza', idade=30, sexo='F', latitude='-23.5505199', longitude='-46.6333094'
+        )
+        ItemInventario.objects.create(sobrevivente=cls.com_itens, tipo_item=TipoItem.AGUA, quantidade=3)
+        ItemInventario.objects.create(sobrevivente=cls.com_itens, tipo_item=TipoItem.MEDICAMENTO, quantidade=1)
+        cls.sem_reportes = Sobreviventes.objects.create(nome='Bruno', idade=0, sexo='M', latitude=0, longitude='-0.5')
+        cls.infectado = Sobreviventes.objects.create(
+            nome='Caio', idade=90, sexo='O', latitude='5', longitude='-35', infectado=True
+        )
+        ItemInventario.objects.create(sobrevivente=cls.infectado, tipo_item=TipoItem.MUNICAO, quantidade=7)
+        for reportador in (cls.com_itens, cls.sem_reportes):
+            ReporteInfeccao.objects.create(sobrevivente_reportado=cls.infectado, sobrevivente_reportador=reportador)
+        ReporteInfeccao.objects.create(sobrevivente_reportado=cls.com_itens, sobrevivente_reportador=cls.infectado)
+
+    def renderizar(self, dados):
+        return JSONRenderer().render(dados)
+
+    def renderizar_json(self, dados):
+        return json.loads(self.renderizar(dados))
+
+    def test_list(self):
+        esperado = SobreviventeSerializer(Sobreviventes.objects.filter(infectado=False), many=True).data
+        resposta = self.client.get(reverse('sobreviventes-list'), HTTP_ACCEPT='application/json')
+        self.assertEqual(self.renderizar(resposta.data), self.renderizar(esperado))
+        self.assertEqual(resposta.json(), self.renderizar_json(esperado))
+
+    def test_retrieve(self):
+        for sobrevivente in (self.com_itens, self.sem_reportes, self.infectado):
+            with self.subTest(nome=sobrevivente.nome):
+                esperado = SobreviventeSerializer(sobrevivente).data
+                resposta = self.client.get(reverse('sobreviventes-detail', args=[sobrevivente.id]))
+                self.assertEqual(self.renderizar(resposta.data), self.renderizar(esperado))
+                self.assertEqual(resposta.json(), self.renderizar_json(esperado))
+
+
+@override_settings(REPLICAS_LEITURA=[])
+class RotasAssincronasTests(TestCase):
+    """As rotas assíncronas devolvem os mesmos dados das rotas do ViewSet"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Sobreviventes.objects.create(nome='Ana', idade=30, sexo='F', latitude='-23.5', longitude='-46.6')
+        cls.bia = Sobreviventes.objects.create(nome='Bia', idade=40, sexo='F', latitude=0, longitude=0)
+        ItemInventario.objects.create(sobrevivente=cls.ana, tipo_item=TipoItem.AGUA, quantidade=3)
+        ReporteInfeccao.objects.create(sobrevivente_reportado=cls.ana, sobrevivente_reportador=cls.bia)
+
+    def test_mesma_saida_das_rotas_sincronas(self):
+        rotas = [
+            ('sobreviventes-list', 'async-sobreviventes-list', []),
+            ('sobreviventes-detail', 'async-sobreviventes-detail', [self.ana.id]),
+            ('sobreviventes-relatorios', 'async-sobreviventes-relatorios', []),
+        ]
+        for sincrona, assincrona, args in rotas:
+            with self.subTest(rota=assincrona):
+                resposta = self.client.get(reverse(assincrona, args=args))
+                self.assertEqual(resposta.status_code, 200)
+                self.assertEqual(resposta.json(), self.client.get(reverse(sincrona, args=args)).json())
+
+    def test_reportes_recebidos(self):
+        resposta = self.client.get(reverse('async-sobreviventes-reportes', args=[self.ana.id]))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(self.client.get(reverse('async-sobreviventes-reportes', args=[999999])).status_code, 404)
+
+
+@override_settings(REPLICAS_LEITURA=[])
+class ExportacaoTests(TestCase):
+    """Paginação por id da exportação, incluindo os arquivados
+
+    Lê do principal: a réplica espelho usa outra conexão e não enxerga os
+    dados criados dentro da transação do teste.
+    """
+
+    def test_paginas_em_ordem_de_id(self):
+        ids = [
+            Sobreviventes.objects.create(nome=nome, idade=30, sexo='F', latitude=0, longitude=0).id
+            for nome in ('Ana', 'Bia', 'Cris')
+        ]
+        agora = timezone.now()
+        arquivado = SobreviventeArquivado.objects.create(
+            id=ids[-1] + 1, nome='Duda', idade=50, sexo='M', latitude=0, longitude=0,
+            data_criacao=agora, data_atualizacao=agora,
+        )
+
+        exportados, apos_id = [], 0
+        while apos_id is not None:
+            resposta = self.client.get(reverse('sobreviventes-exportar'), {'apos_id': apos_id, 'tamanho': 2})
+            self.assertEqual(resposta.status_code, 200)
+            self.assertLessEqual(len(resposta.data['resultados']), 2)
+            exportados += [sobrevivente['id'] for sobrevivente in resposta.data['resultados']]
+            apos_id = resposta.data['proximo']
+
+        self.assertEqual(exportados, ids + [arquivado.id])
+
+    def test_tamanho_invalido(self):
+        resposta = self.client.get(reverse('sobreviventes-exportar'), {'tamanho': 5000})
+        self.assertEqual(resposta.status_code, 400)
+
+
+class MessagePackParserTests(TestCase):
+    """Corpos MessagePack malformados viram ParseError (400), com ou sem a biblioteca msgpack"""
+
+    CORPOS_INVALIDOS = {
+        'truncado': b'\x82\xa1a',
+        'chave_nao_hashable': b'\x81\x90\x00',
+        'aninhamento_profundo': b'\x91' * 5000 + b'\xc0',
+        'dados_extras': b'\x80\x00',
+    }
+
+    def interpretar(self, corpo):
+        return MessagePackParser().parse(io.BytesIO(corpo))
+
+    def test_corpos_invalidos(self):
+        for implementacao in ('msgpack', 'python'):
+            for nome, corpo in self.CORPOS_INVALIDOS.items():
+                with self.subTest(implementacao=implementacao, corpo=nome):
+                    with mock.patch.object(
+                        mensagem_compacta, 'msgpack', None if implementacao == 'python' else mensagem_compacta.msgpack
+                    ):
+                        with self.assertRaises(ParseError):
+                            self.interpretar(corpo)
+
+    def test_corpo_valido(self):
+        corpo = mensagem_compacta.empacotar({'tipo_item': 'agua', 'quantidade': 2})
+        self.assertEqual(self.interpretar(corpo), {'tipo_item': 'agua', 'quantidade': 2})
+
+
+class EscamboCircularTests(TestCase):
+    """Intenções, busca de ciclos e liquidação do escambo circular"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Ana deseja o lote de Bia, Bia o de Caio e Caio o de Ana (4 pontos cada)
+        cls.ana, cls.bia, cls.caio = [
+            Sobreviventes.objects.create(nome=nome, idade=30, sexo='F', latitude=0, longitude=0)
+            for nome in ('Ana', 'Bia', 'Caio')
+        ]
+        lotes = [
+            (cls.ana, TipoItem.AGUA, 1, TipoItem.MEDICAMENTO, 2),
+            (cls.bia, TipoItem.MEDICAMENTO, 2, TipoItem.MUNICAO, 4),
+            (cls.caio, TipoItem.MUNICAO, 4, TipoItem.AGUA, 1),
+        ]
+        cls.intencoes = []
+        for sobrevivente, oferecido, quantidade, desejado, quantidade_desejada in lotes:
+            ItemInventario.objects.create(sobrevivente=sobrevivente, tipo_item=oferecido, quantidade=quantidade)
+            cls.intencoes.append(IntencaoEscambo.objects.create(
+                sobrevivente=sobrevivente, tipo_oferecido=oferecido, quantidade_oferecida=quantidade,
+                tipo_desejado=desejado, quantidade_desejada=quantidade_desejada,
+            ))
+
+    def inventario(self, sobrevivente):
+        return dict(sobrevivente.inventario.values_list('tipo_item', 'quantidade'))
+
+    def test_encontrar_ciclos(self):
+        intencoes = [
+            Intencao(1, 10, 'agua', 1, 'medicamento', 2),
+            Intencao(2, 20, 'medicamento', 2, 'municao', 4),
+            Intencao(3, 30, 'municao', 4, 'agua', 1),
+            # Par direto, procurado antes do ciclo de três
+            Intencao(4, 40, 'comida', 4, 'agua', 3),
+            Intencao(5, 50, 'agua', 3, 'comida', 4),
+            # Segunda intenção de quem já está em um ciclo e intenção sem saldo zero: ignoradas
+            Intencao(6, 10, 'municao', 4, 'agua', 1),
+            Intencao(7, 60, 'agua', 1, 'comida', 1),
+        ]
+        ciclos = encontrar_ciclos(intencoes, tamanho_maximo=4)
+        self.assertEqual([[intencao.id for intencao in ciclo] for ciclo in ciclos], [[5, 4], [1, 2, 3]])
+        self.assertEqual(encontrar_ciclos(intencoes, tamanho_maximo=2), [ciclos[0]])
+        self.assertEqual(len(encontrar_ciclos(intencoes, limite=1)), 1)
+
+    def test_liquidar_ciclo(self):
+        resultado = resolver_escambos()
+        self.assertEqual(resultado['resumo']['liquidados'], 1)
+        self.assertEqual(resultado['ciclos'][0]['participantes'], [self.ana.id, self.bia.id, self.caio.id])
+
+        self.assertEqual(self.inventario(self.ana), {'medicamento': 2})
+        self.assertEqual(self.inventario(self.bia), {'municao': 4})
+        self.assertEqual(self.inventario(self.caio), {'agua': 1})
+        self.assertFalse(IntencaoEscambo.objects.filter(ativa=True).exists())
+        self.assertEqual(
+            sorted(EventoOutbox.objects.filter(tipo=TipoEvento.ESCAMBO).values_list('sobrevivente_id', flat=True)),
+            [self.ana.id, self.bia.id, self.caio.id]
+        )
+        self.assertEqual(resolver_escambos()['resumo']['ciclos'], 0)
+
+    def test_intencao_cancelada_depois_da_busca(self):
+        ciclo = [intencao.id for intencao in self.intencoes]
+        IntencaoEscambo.objects.filter(id=ciclo[1]).update(ativa=False)
+        with self.assertRaises(CicloInvalido):
+            liquidar_ciclo(ciclo)
+        self.assertEqual(self.inventario(self.ana), {'agua': 1})
+        self.assertTrue(IntencaoEscambo.objects.get(id=ciclo[0]).ativa)
+
+    def test_inventario_insuficiente_na_liquidacao(self):
+        ciclo = [intencao.id for intencao in self.intencoes]
+        self.caio.inventario.update(quantidade=3)
+        with self.assertRaises(CicloInvalido):
+            liquidar_ciclo(ciclo)
+        self.assertEqual(self.inventario(self.bia), {'medicamento': 2})
+        self.assertFalse(EventoOutbox.objects.exists())
+
+    def test_registrar_intencao(self):
+        url = reverse('sobreviventes-intencoes-escambo', args=[self.ana.id])
+        intencao = {'tipo_oferecido': 'agua', 'quantidade_oferecida': 1, 'tipo_desejado': 'municao'}
+        self.assertEqual(self.client.post(url, {**intencao, 'quantidade_desejada': 3}).status_code, 400)
+        self.assertEqual(self.client.post(url, {**intencao, 'quantidade_desejada': 4}).status_code, 201)
+        # Só pode oferecer o que tem no inventário
+        self.assertEqual(self.client.post(url, {**intencao, 'quantidade_oferecida': 2, 'quantidade_desejada': 8}).status_code, 400)
+        self.assertEqual(len(self.client.get(url).data), 2)
+
+    def test_cancelar_intencao(self):
+        intencao = self.intencoes[0]
+        url = reverse('sobreviventes-intencoes-escambo', args=[self.ana.id])
+
+        self.assertEqual(self.client.delete(f'{url}?intencao_id=abc').status_code, 400)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        # Intenção de outro sobrevivente
+        self.assertEqual(self.client.delete(f'{url}?intencao_id={self.intencoes[1].id}').status_code, 404)
+        self.assertEqual(self.client.delete(f'{url}?intencao_id={intencao.id}').status_code, 204)
+        self.assertFalse(IntencaoEscambo.objects.get(id=intencao.id).ativa)
+        self.assertEqual(self.client.delete(f'{url}?intencao_id={intencao.id}').status_code, 404)
+
+
+@override_settings(REPLICAS_LEITURA=[])
+class ArquivamentoTests(TestCase):
+    """Arquivamento de infectados antigos e exclusão de sobreviventes"""
+
+    def setUp(self):
+        self.ana, self.bia, self.caio = [
+            Sobreviventes.objects.create(nome=nome, idade=30, sexo='F', latitude=0, longitude=0)
+            for nome in ('Ana', 'Bia', 'Caio')
+        ]
+        ItemInventario.objects.create(sobrevivente=self.bia, tipo_item=TipoItem.AGUA, quantidade=2)
+        ItemInventario.objects.create(sobrevivente=self.bia, tipo_item=TipoItem.MUNICAO, quantidade=5)
+        ItemInventario.objects.create(sobrevivente=self.ana, tipo_item=TipoItem.COMIDA, quantidade=1)
+        for reportador in (self.ana, self.caio):
+            ReporteInfeccao.objects.create(sobrevivente_reportado=self.bia, sobrevivente_reportador=reportador)
+        ReporteInfeccao.objects.create(sobrevivente_reportado=self.caio, sobrevivente_reportador=self.bia)
+        Sobreviventes.objects.filter(id=self.bia.id).update(
+            infectado=True, data_atualizacao=timezone.now() - timedelta(days=60)
+        )
+
+    def test_arquivar_infectado_antigo(self):
+        self.assertEqual(arquivar_infectados(dias=30), 1)
+
+        self.assertFalse(Sobreviventes.objects.filter(id=self.bia.id).exists())
+        arquivado = SobreviventeArquivado.objects.get(id=self.bia.id)
+        self.assertEqual(arquivado.inventario, [['agua', 2], ['municao', 5]])
+        self.assertEqual(len(arquivado.reportes), 2)
+        # O reporte feito pelo arquivado continua valendo, sem o reportador
+        self.assertEqual(
+            list(self.caio.reportes_recebidos.values_list('sobrevivente_reportador', flat=True)), [None]
+        )
+
+        resumo = ResumoArquivo.objects.get(pk=1)
+        self.assertEqual((resumo.sobreviventes, resumo.itens), (1, {'agua': 2, 'municao': 5}))
+        self.assertEqual(arquivar_infectados(dias=30), 0)
+
+    def test_detalhe_exportacao_e_relatorios_incluem_arquivados(self):
+        antes = self.client.get(reverse('sobreviventes-relatorios')).data
+        detalhe = self.client.get(reverse('sobreviventes-detail', args=[self.bia.id])).data
+        exportados = self.client.get(reverse('sobreviventes-exportar')).data['resultados']
+
+        arquivar_infectados(dias=30)
+
+        self.assertEqual(self.client.get(reverse('sobreviventes-relatorios')).data, antes)
+        self.assertEqual(self.client.get(reverse('sobreviventes-detail', args=[self.bia.id])).data, detalhe)
+        self.assertEqual(self.client.get(reverse('sobreviventes-exportar')).data['resultados'], exportados)
+        self.assertEqual(antes['resumo_geral']['sobreviventes_infectados'], 1)
+        self.assertEqual(antes['pontos_perdidos_infectados'], 2 * 4 + 5 * 1)
+
+    def test_excluir_apaga_os_reportes_feitos(self):
+        resposta = self.client.delete(reverse('sobreviventes-detail', args=[self.ana.id]))
+        self.assertEqual(resposta.status_code, 204)
+        self.assertEqual(
+            list(self.bia.reportes_recebidos.values_list('sobrevivente_reportador', flat=True)), [self.caio.id]
+        )
+
+
+class FeedEventosTests(TestCase):
+    """Outbox transacional e retomada do feed SSE"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sobrevivente = Sobreviventes.objects.create(nome='Ana', idade=30, sexo='F', latitude=0, longitude=0)
+
+    def adicionar_agua(self):
+        return self.client.post(
+            reverse('sobreviventes-adicionar-item', args=[self.sobrevivente.id]),
+            {'tipo_item': 'agua', 'quantidade': 2}, content_type='application/json'
+        )
+
+    def test_evento_gravado_na_transacao_da_escrita(self):
+        self.assertEqual(self.adicionar_agua().status_code, 200)
+        evento = EventoOutbox.objects.get()
+        self.assertEqual((evento.tipo, evento.sobrevivente_id), (TipoEvento.INVENTARIO, self.sobrevivente.id))
+        self.assertEqual(evento.dados, {'tipo_item': 'agua', 'variacao': 2, 'quantidade_total': 2})
+
+        # Uma falha depois de publicar desfaz a escrita e o evento juntos
+        def publicar_e_falhar(*args):
+            publicar_evento(*args)
+            raise RuntimeError('falha depois de publicar')
+
+        with mock.patch.object(views, 'publicar_evento', publicar_e_falhar):
+            with self.assertRaises(RuntimeError):
+                self.adicionar_agua()
+        self.assertEqual(EventoOutbox.objects.count(), 1)
+        self.assertEqual(self.sobrevivente.inventario.get().quantidade, 2)
+
+    def test_escambo_direto_publica_para_os_dois_participantes(self):
+        destino = Sobreviventes.objects.create(nome='Bia', idade=30, sexo='F', latitude=0, longitude=0)
+        ItemInventario.objects.create(sobrevivente=self.sobrevivente, tipo_item=TipoItem.AGUA, quantidade=1)
+        ItemInventario.objects.create(sobrevivente=destino, tipo_item=TipoItem.MUNICAO, quantidade=4)
+        oferecidos = [{'tipo_item': 'agua', 'quantidade': 1}]
+        desejados = [{'tipo_item': 'municao', 'quantidade': 4}]
+
+        resposta = self.client.post(reverse('sobreviventes-escambo', args=[self.sobrevivente.id]), {
+            'sobrevivente_destino_id': destino.id, 'itens_oferecidos': oferecidos, 'itens_desejados': desejados,
+        }, content_type='application/json')
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+
+        eventos = {evento.sobrevivente_id: evento.dados for evento in EventoOutbox.objects.filter(tipo=TipoEvento.ESCAMBO)}
+        self.assertEqual(eventos, {
+            self.sobrevivente.id: {
+                'sobrevivente_destino_id': destino.id, 'itens_oferecidos': oferecidos, 'itens_recebidos': desejados,
+            },
+            destino.id: {
+                'sobrevivente_destino_id': self.sobrevivente.id, 'itens_oferecidos': desejados, 'itens_recebidos': oferecidos,
+            },
+        })
+
+    async def test_feed_retoma_a_partir_do_last_event_id(self):
+        eventos = [
+            await EventoOutbox.objects.acreate(
+                tipo=TipoEvento.INVENTARIO, sobrevivente_id=self.sobrevivente.id, dados={'n': n}
+            )
+            for n in range(3)
+        ]
+
+        resposta = await AsyncClient().get(reverse('async-eventos'), headers={'Last-Event-ID': str(eventos[0].id)})
+        self.assertEqual(resposta['Content-Type'], 'text/event-stream')
+        fluxo = aiter(resposta.streaming_content)
+        try:
+            self.assertTrue((await anext(fluxo)).startswith(b'retry:'))
+            recebidos = [await anext(fluxo) for _ in range(2)]
+        finally:
+            await fluxo.aclose()
+
+        for evento, mensagem in zip(eventos[1:], recebidos):
+            self.assertTrue(mensagem.startswith(f'id: {evento.id}\nevent: inventario\n'.encode()))
+            self.assertIn(f'"dados":{{"n":{evento.dados["n"]}}}'.encode(), mensagem)
+
+    async def test_last_event_id_invalido(self):
+        resposta = await AsyncClient().get(reverse('async-eventos'), headers={'Last-Event-ID': 'abc'})
+        self.assertEqual(resposta.status_code, 400)
+
+
+class IdempotenciaTests(TestCase):
+    """Cabeçalho Idempotency-Key nas escritas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sobrevivente = Sobreviventes.objects.create(nome='Ana', idade=30, sexo='F', latitude=0, longitude=0)
+
+    def adicionar(self, quantidade=2, chave='chave-1', **extra):
+        return self.client.post(
+            reverse('sobreviventes-adicionar-item', args=[self.sobrevivente.id]),
+            {'tipo_item': 'agua', 'quantidade': quantidade}, content_type='application/json',
+            headers={'Idempotency-Key': chave}, **extra
+        )
+
+    def quantidade_agua(self):
+        return self.sobrevivente.inventario.get(tipo_item=TipoItem.AGUA).quantidade
+
+    def test_repeticao_devolve_a_mesma_resposta(self):
+        primeira = self.adicionar()
+        repetida = self.adicionar()
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual((repetida.status_code, repetida.content), (200, primeira.content))
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', primeira)
+        self.assertEqual(self.quantidade_agua(), 2)
+
+    def test_outro_conteudo_com_a_mesma_chave(self):
+        self.adicionar()
+        self.assertEqual(self.adicionar(quantidade=5).status_code, 422)
+        self.assertEqual(self.quantidade_agua(), 2)
+
+    def test_chave_vale_por_cliente(self):
+        self.adicionar()
+        resposta = self.adicionar(REMOTE_ADDR='10.0.0.8')
+        self.assertNotIn('Idempotent-Replayed', resposta)
+        self.assertEqual(self.quantidade_agua(), 4)
+
+    def test_erro_do_servidor_libera_a_chave(self):
+        with mock.patch.object(views, 'publicar_evento', side_effect=APIException('falha')):
+            self.assertEqual(self.adicionar().status_code, 500)
+        self.assertFalse(self.sobrevivente.inventario.exists())
+
+        resposta = self.adicionar()
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', resposta)
+        self.assertEqual(self.quantidade_agua(), 2)
+
+
+class LoteTests(TestCase):
+    """Lote de operações, tudo ou nada no modo transacional"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sobrevivente = Sobreviventes.objects.create(nome='Ana', idade=30, sexo='F', latitude=0, longitude=0)
+
+    def executar(self, transacional):
+        caminho = f'sobreviventes/{self.sobrevivente.id}/'
+        return self.client.post(reverse('lote'), {
+            'transacional': transacional,
+            'operacoes': [
+                {'metodo': 'POST', 'caminho': caminho + 'adicionar_item/', 'corpo': {'tipo_item': 'agua', 'quantidade': 2}},
+                {'metodo': 'POST', 'caminho': caminho + 'remover_item/', 'corpo': {'tipo_item': 'agua', 'quantidade': 9}},
+                {'metodo': 'POST', 'caminho': caminho + 'adicionar_item/', 'corpo': {'tipo_item': 'comida', 'quantidade': 1}},
+            ],
+        }, content_type='application/json')
+
+    def test_transacional_desfaz_o_lote_inteiro(self):
+        resposta = self.executar(transacional=True)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.data['desfeito'])
+        self.assertFalse(resposta.data['sucesso'])
+        self.assertEqual([r['status'] for r in resposta.data['resultados']], [200, 400, None])
+        self.assertFalse(self.sobrevivente.inventario.exists())
+        self.assertFalse(EventoOutbox.objects.exists())
+
+    def test_sem_transacao_mantem_as_operacoes_bem_sucedidas(self):
+        resposta = self.executar(transacional=False)
+        self.assertFalse(resposta.data['desfeito'])
+        self.assertEqual([r['status'] for r in resposta.data['resultados']], [200, 400, 200])
+        self.assertEqual(
+            dict(self.sobrevivente.inventario.values_list('tipo_item', 'quantidade')), {'agua': 2, 'comida': 1}
+        )
+
+    def test_apenas_rotas_de_sobreviventes(self):
+        resposta = self.client.post(reverse('lote'), {
+            'operacoes': [{'metodo': 'GET', 'caminho': 'tarefas/1/'}],
+        }, content_type='application/json')
+        self.assertEqual(resposta.status_code, 400)
+
+
+@override_settings(REPLICAS_LEITURA=[])
+class HistoricoRelatoriosTests(TestCase):
+    """Acúmulo, consolidação, retenção e consulta do histórico dos relatórios"""
+
+    DIA = datetime(2026, 3, 10, tzinfo=dt_timezone.utc)
+
+    def registrar(self, momento):
+        with mock.patch('django.utils.timezone.now', return_value=momento):
+            registrar_historico()
+
+    def criar(self, nome, infectado=False):
+        return Sobreviventes.objects.create(
+            nome=nome, idade=30, sexo='F', latitude=0, longitude=0, infectado=infectado
+        )
+
+    def test_acumula_horas_e_consolida_o_dia(self):
+        self.criar('Ana')
+        self.registrar(self.DIA + timedelta(hours=10, minutes=5))
+        self.criar('Bia', infectado=True)
+        self.registrar(self.DIA + timedelta(hours=10, minutes=10))
+        self.registrar(self.DIA + timedelta(hours=11))
+
+        hora = HistoricoRelatorio.objects.get(
+            granularidade=GranularidadeHistorico.HORA, inicio=self.DIA + timedelta(hours=10)
+        )
+        self.assertEqual(hora.amostras, 2)
+        self.assertEqual(hora.somas['total_sobreviventes'], 3)
+        self.assertEqual((hora.minimos['total_sobreviventes'], hora.maximos['total_sobreviventes']), (1, 2))
+        self.assertEqual(hora.ultimos['sobreviventes_infectados'], 1)
+
+        dia = HistoricoRelatorio.objects.get(granularidade=GranularidadeHistorico.DIA)
+        self.assertEqual((dia.inicio, dia.amostras), (self.DIA, 3))
+        self.assertEqual(dia.somas['total_sobreviventes'], 5)
+        self.assertEqual(dia.maximos['porcentagem_infectados'], 50.0)
+        self.assertEqual(dia.minimos['porcentagem_infectados'], 0)
+
+        historico = consultar_historico(self.DIA, self.DIA + timedelta(days=1), GranularidadeHistorico.HORA)
+        self.assertEqual([intervalo['amostras'] for intervalo in historico['intervalos']], [2, 1])
+        self.assertEqual(historico['intervalos'][0]['metricas']['total_sobreviventes'], {
+            'media': 1.5, 'minimo': 1, 'maximo': 2, 'ultimo': 2,
+        })
+
+    @override_settings(HISTORICO_RETENCAO_HORARIO_DIAS=14, HISTORICO_RETENCAO_DIARIO_DIAS=730)
+    def test_retencao(self):
+        agora = timezone.now()
+        for granularidade in GranularidadeHistorico.values:
+            for dias in (1, 20, 800):
+                HistoricoRelatorio.objects.create(granularidade=granularidade, inicio=agora - timedelta(days=dias))
+
+        self.assertEqual(limpar_historico(), {'removidos': 3})
+        restantes = HistoricoRelatorio.objects.values_list('granularidade', 'inicio')
+        self.assertEqual(sorted((g, (agora - i).days) for g, i in restantes), [
+            (GranularidadeHistorico.DIA, 1), (GranularidadeHistorico.DIA, 20), (GranularidadeHistorico.HORA, 1),
+        ])
+
+    def test_validacao_da_consulta(self):
+        url = reverse('sobreviventes-historico-relatorios')
+        invalidos = [
+            {'granularidade': 'semana'},
+            {'inicio': '2026-03-10T12:00:00Z', 'fim': '2026-03-10T10:00:00Z'},
+            {'inicio': '2026-01-01T00:00:00Z', 'fim': '2026-03-10T00:00:00Z', 'granularidade': 'hora'},
+            {'inicio': 'ontem'},
+        ]
+        for parametros in invalidos:
+            with self.subTest(**parametros):
+                self.assertEqual(self.client.get(url, parametros).status_code, 400)
+
+        resposta = self.client.get(url, {'inicio': '2026-01-01T00:00:00Z', 'fim': '2026-03-10T00:00:00Z', 'granularidade': 'dia'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.data['intervalos'], [])
+
+
+class LimpezaPerfisTests(TestCase):
+    """Retenção dos perfis gravados pelo perfilador"""
+
+    def test_remove_antigos_e_excedentes(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            agora = time.time()
+            idades_horas = {'20260101T000000_a': 100, '20260102T000000_b': 1, '20260103T000000_c': 1,
+                            '20260104T000000_d': 1, '20260105T000000_e': 0}
+            for nome, idade in idades_horas.items():
+                caminho = os.path.join(diretorio, f'{nome}.json')
+                with open(caminho, 'w') as arquivo:
+                    arquivo.write('{}')
+                os.utime(caminho, (agora - idade * 3600,) * 2)
+
+            with self.settings(PERFILADOR_DIRETORIO=diretorio, PERFILADOR_MAX_ARQUIVOS=3, PERFILADOR_MAX_IDADE_HORAS=72):
+                self.assertEqual(limpar_perfis(), {'removidos': 2})
+            self.assertEqual(
+                sorted(os.listdir(diretorio)),
+                ['20260103T000000_c.json', '20260104T000000_d.json', '20260105T000000_e.json']
+            )
@@ -0,0 +1,144 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import BaseThrottle
+
+DURACOES = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+MICROSSEGUNDOS = 1000000
+
+
+def interpretar_taxa(taxa):
+    """Converte '30/min' em (30, 60)"""
+    quantidade, periodo = taxa.split('/')
+    return int(quantidade), DURACOES[periodo]
+
+
+def obter_taxa(escopo, acao):
+    """Taxa de ``ZSSN_THROTTLE[escopo]`` para a ação (ou a padrão '*'), ou None"""
+    limites = getattr(settings, 'ZSSN_THROTTLE', {}).get(escopo, {})
+    return limites.get(acao, limites.get('*'))
+
+
+def verificar_limite(escopo, acao, identidade):
+    """Consome uma ficha do balde (escopo, ação, identidade)
+
+    Retorna None se a requisição pode seguir, ou os segundos de espera até
+    haver uma ficha disponível.
+
+    O balde tem ``capacidade`` fichas repostas continuamente, uma a cada
+    ``periodo / capacidade`` segundos (algoritmo GCRA, equivalente ao balde de
+    fichas). O estado é um único inteiro no cache, o instante teórico (em
+    microssegundos) em que o balde estará cheio de novo: consumir uma ficha o
+    adianta em um intervalo, e a requisição passa enquanto ele não ficar mais
+    de ``periodo`` à frente do relógio. Não há janela fixa, então não dá para
+    gastar o dobro da capacidade em uma virada de janela.
+
+    No Redis a verificação é um único script Lua (uma ida ao servidor,
+    atômica, com a validade da chave gravada junto). Nos demais caches ela é
+    feita sob uma trava do processo, o que só é atômico para o LocMemCache;
+    em produção o cache dos limites deve ser o Redis (ver settings_producao).
+    """
+    taxa = obter_taxa(escopo, acao)
+    if taxa is None or identidade is None:
+        return None
+
+    capacidade, periodo = interpretar_taxa(taxa)
+    periodo_us = periodo * MICROSSEGUNDOS
+    intervalo = max(periodo_us // capacidade, 1)
+    cache = caches[getattr(settings, 'ZSSN_THROTTLE_CACHE', 'default')]
+    chave = f'zssn:balde:{escopo}:{acao}:{identidade}'
+    agora = int(time.time() * MICROSSEGUNDOS)
+
+    if isinstance(cache, RedisCache):
+        espera = _gcra_redis(cache, chave, agora, intervalo, periodo_us)
+    else:
+        espera = _gcra_local(cache, chave, agora, intervalo, periodo_us)
+    return espera / MICROSSEGUNDOS if espera > 0 else None
+
+
+# Retorna a espera em microssegundos (0 se a ficha foi consumida)
+_GCRA_LUA = """
+local agora = tonumber(ARGV[1])
+local intervalo = tonumber(ARGV[2])
+local periodo = tonumber(ARGV[3])
+local cheio_em = math.max(tonumber(redis.call('GET', KEYS[1]) or 0), agora) + intervalo
+if cheio_em - agora > periodo then
+    return cheio_em - agora - periodo
+end
+redis.call('SET', KEYS[1], string.format('%.0f', cheio_em), 'PX', math.ceil((cheio_em - agora) / 1000))
+return 0
+"""
+_script_gcra = None
+_trava_local = threading.Lock()
+
+
+def _gcra_redis(cache, chave, agora, intervalo, periodo_us):
+    global _script_gcra
+    chave = cache.make_and_validate_key(chave)
+    cliente = cache._cache.get_client(chave, write=True)
+    if _script_gcra is None:
+        # EVALSHA, com EVAL na primeira chamada a cada servidor
+        _script_gcra = cliente.register_script(_GCRA_LUA)
+    return int(_script_gcra(keys=[chave], args=[agora, intervalo, periodo_us], client=cliente))
+
+
+def _gcra_local(cache, chave, agora, intervalo, periodo_us):
+    with _trava_local:
+        cheio_em = max(cache.get(chave, 0), agora) + intervalo
+        if cheio_em - agora > periodo_us:
+            return cheio_em - agora - periodo_us
+        # A chave expira quando o balde volta a ficar cheio
+        cache.set(chave, cheio_em, timeout=math.ceil((cheio_em - agora) / MICROSSEGUNDOS))
+        return 0
+
+
+def identidade_cliente(request, usuario):
+    """Usuário autenticado ou endereço IP (respeitando NUM_PROXIES) da requisição"""
+    if usuario is not None and usuario.is_authenticated:
+        return f'usuario-{usuario.pk}'
+    return BaseThrottle().get_ident(request)
+
+
+class BaldeThrottle(BaseThrottle):
+    """Throttle de balde de fichas no cache do Django, por ação e por identidade
+
+    Os limites vêm de ``ZSSN_THROTTLE[escopo]``, um dicionário de ação para
+    taxa (ex.: ``{'relatorios': '10/min', '*': '600/min'}``); ver
+    ``verificar_limite``.
+    """
+
+    escopo = None
+
+    def allow_request(self, request, view):
+        self.espera = verificar_limite(
+            self.escopo, getattr(view, 'action', None), self.get_identidade(request, view)
+        )
+        return self.espera is None
+
+    def wait(self):
+        return self.espera
+
+    def get_identidade(self, request, view):
+        raise NotImplementedError('.get_identidade() must be overridden')
+
+
+class SobreviventeThrottle(BaldeThrottle):
+    """Limita por sobrevivente alvo (ações de detalhe, ex.: atualizar_localizacao)"""
+
+    escopo = 'sobrevivente'
+
+    def get_identidade(self, request, view):
+        return view.kwargs.get(view.lookup_url_kwarg or view.lookup_field)
+
+
+class ClienteThrottle(BaldeThrottle):
+    """Limita por cliente: usuário autenticado ou endereço IP"""
+
+    escopo = 'cliente'
+
+    def get_identidade(self, request, view):
+        return identidade_cliente(request, request.user)
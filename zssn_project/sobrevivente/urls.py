@@ -1,11 +1,26 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SobreviventeViewSet
+from . import views_async
+from .views_lote import LoteView
+from .views import SobreviventeViewSet, TarefaViewSet
 
 # Configuração do roteador do Django REST Framework
 router = DefaultRouter()
 router.register(r'sobreviventes', SobreviventeViewSet)
+router.register(r'tarefas', TarefaViewSet)
+
+# Leituras assíncronas (ASGI), servidas ao lado das rotas síncronas do ViewSet
+urls_async = [
+    path('sobreviventes/', views_async.listar_sobreviventes, name='async-sobreviventes-list'),
+    path('sobreviventes/relatorios/', views_async.relatorios, name='async-sobreviventes-relatorios'),
+    path('sobreviventes/proximos/', views_async.sobreviventes_proximos, name='async-sobreviventes-proximos'),
+    path('sobreviventes/<int:pk>/', views_async.detalhar_sobrevivente, name='async-sobreviventes-detail'),
+    path('sobreviventes/<int:pk>/reportes/', views_async.reportes_recebidos, name='async-sobreviventes-reportes'),
+    path('eventos/', views_async.feed_eventos, name='async-eventos'),
+]
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('lote/', LoteView.as_view(), name='lote'),
+    path('async/', include(urls_async)),
 ]
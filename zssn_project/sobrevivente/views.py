@@ -1,20 +1,44 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Count, Avg, Sum
-from .models import Sobreviventes, ItemInventario, ReporteInfeccao, TipoItem
+from django.http import Http404
+from django.urls import reverse
+from .busca import buscar_sobreviventes
+from .escambo_circular import resolver_escambos
+from .eventos import publicar_evento
+from .grafo_reportes import analisar_reportes
+from .historico import consultar_historico
+from .models import (
+    Sobreviventes, ItemInventario, ReporteInfeccao, SobreviventeArquivado, Tarefa, TipoItem, TipoEvento
+)
+from .mixins import IdempotenciaMixin, LeituraEmReplicaMixin
+from .parsers import MessagePackParser
+from .relatorios import gerar_relatorio
+from .renderers import JSONRapidoRenderer, MessagePackRenderer
 from .serializers import (
-    SobreviventeSerializer, SobreviventeCreateSerializer,
-    AtualizarLocalizacaoSerializer, ReporteInfeccaoSerializer,
-    AdicionarItemSerializer, RemoverItemSerializer, EscamboSerializer
+    SobreviventeSerializer, SobreviventeCreateSerializer, SobreviventeLeituraRapidaSerializer,
+    AtualizarLocalizacaoSerializer, AnaliseReportesSerializer, BuscaSerializer, ExportarSerializer,
+    HistoricoRelatorioSerializer, ReporteInfeccaoSerializer, CancelarIntencaoSerializer,
+    AdicionarItemSerializer, RemoverItemSerializer, EscamboSerializer, EscamboCircularSerializer,
+    IntencaoEscamboSerializer, TarefaSerializer
 )
+from .throttling import ClienteThrottle, SobreviventeThrottle
 
 
-class SobreviventeViewSet(viewsets.ModelViewSet):
+class SobreviventeViewSet(IdempotenciaMixin, LeituraEmReplicaMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar sobreviventes"""
 
     queryset = Sobreviventes.objects.all()
+    acoes_leitura_replica = (
+        'list', 'retrieve', 'relatorios', 'historico_relatorios', 'exportar', 'buscar', 'analise_reportes'
+    )
+    renderer_classes = [JSONRapidoRenderer, MessagePackRenderer, BrowsableAPIRenderer]
+    parser_classes = [JSONParser, MessagePackParser, FormParser, MultiPartParser]
+    throttle_classes = [SobreviventeThrottle, ClienteThrottle]
 
     def get_serializer_class(self):
         """Retorna o serializer apropriado para cada ação"""
@@ -28,6 +52,81 @@ class SobreviventeViewSet(viewsets.ModelViewSet):
             return Sobreviventes.objects.filter(infectado=False)
         return Sobreviventes.objects.all()
 
+    def list(self, request, *args, **kwargs):
+        """Lista sobreviventes saudáveis usando o serializer de leitura rápida"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(SobreviventeLeituraRapidaSerializer().serializar(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Detalha um sobrevivente usando o serializer de leitura rápida"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filtro = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        serializer = SobreviventeLeituraRapidaSerializer()
+        try:
+            dados = serializer.serializar(self.filter_queryset(self.get_queryset()).filter(**filtro))
+            if not dados:
+                # Infectados antigos saem das tabelas principais (ver arquivamento.py)
+                dados = serializer.serializar_arquivados(SobreviventeArquivado.objects.filter(**filtro))
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if not dados:
+            raise Http404
+        return Response(dados[0])
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exporta todos os sobreviventes, incluindo os infectados e os arquivados
+
+        Paginada por id (keyset): cada página traz até ``tamanho`` sobreviventes
+        com id maior que ``apos_id`` e, em ``proximo``, o ``apos_id`` da página
+        seguinte (None na última). Os arquivados guardam o id original, então
+        as duas tabelas formam uma única sequência de ids.
+        """
+        parametros = ExportarSerializer(data=request.query_params)
+        if not parametros.is_valid():
+            return Response(parametros.errors, status=status.HTTP_400_BAD_REQUEST)
+        apos_id = parametros.validated_data['apos_id']
+        tamanho = parametros.validated_data['tamanho']
+
+        # Os próximos ids de cada tabela; um a mais para saber se há outra página
+        ids_ativos = list(
+            Sobreviventes.objects.filter(id__gt=apos_id).order_by('id').values_list('id', flat=True)[:tamanho + 1]
+        )
+        ids_arquivados = list(
+            SobreviventeArquivado.objects.filter(id__gt=apos_id).order_by('id')
+            .values_list('id', flat=True)[:tamanho + 1]
+        )
+        ids = sorted(ids_ativos + ids_arquivados)
+        tem_proxima = len(ids) > tamanho
+        ultimo_id = ids[tamanho - 1] if tem_proxima else None
+
+        serializer = SobreviventeLeituraRapidaSerializer()
+        filtro = {'id__gt': apos_id, 'id__lte': ultimo_id} if tem_proxima else {'id__gt': apos_id}
+        dados = serializer.serializar(Sobreviventes.objects.filter(**filtro).order_by('id'))
+        dados += serializer.serializar_arquivados(SobreviventeArquivado.objects.filter(**filtro).order_by('id'))
+        dados.sort(key=lambda sobrevivente: sobrevivente['id'])
+        return Response({
+            'proximo': ultimo_id,
+            'resultados': dados,
+        })
+
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        """Busca sobreviventes pelo nome, por prefixo e aproximada, ignorando acentos"""
+        serializer = BuscaSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        pagina = serializer.validated_data['pagina']
+        tamanho = serializer.validated_data['tamanho']
+        resultados, tem_proxima = buscar_sobreviventes(serializer.validated_data['q'], pagina, tamanho)
+        return Response({
+            'pagina': pagina,
+            'tamanho': tamanho,
+            'tem_proxima': tem_proxima,
+            'resultados': resultados,
+        })
+
     @action(detail=True, methods=['patch'])
     def atualizar_localizacao(self, request, pk=None):
         """Atualiza a localização de um sobrevivente"""
@@ -75,18 +174,25 @@ class SobreviventeViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Cria o reporte
-            ReporteInfeccao.objects.create(
-                sobrevivente_reportado=sobrevivente_reportado,
-                sobrevivente_reportador=sobrevivente_reportador
-            )
-
-            # Verifica se o sobrevivente deve ser marcado como infectado (3+ reportes)
-            total_reportes = sobrevivente_reportado.reportes_recebidos.count()
-            if total_reportes >= 3 and not sobrevivente_reportado.infectado:
-                sobrevivente_reportado.infectado = True
-                sobrevivente_reportado.save()
+            with transaction.atomic():
+                # Cria o reporte
+                ReporteInfeccao.objects.create(
+                    sobrevivente_reportado=sobrevivente_reportado,
+                    sobrevivente_reportador=sobrevivente_reportador
+                )
 
+                # Verifica se o sobrevivente deve ser marcado como infectado (3+ reportes)
+                total_reportes = sobrevivente_reportado.reportes_recebidos.count()
+                infectou = total_reportes >= 3 and not sobrevivente_reportado.infectado
+                if infectou:
+                    sobrevivente_reportado.infectado = True
+                    sobrevivente_reportado.save()
+                    publicar_evento(TipoEvento.INFECCAO, sobrevivente_reportado.id, {
+                        'nome': sobrevivente_reportado.nome,
+                        'total_reportes': total_reportes,
+                    })
+
+            if infectou:
                 return Response({
                     'mensagem': f'{sobrevivente_reportado.nome} foi marcado como INFECTADO após {total_reportes} reportes.',
                     'total_reportes': total_reportes,
@@ -117,15 +223,21 @@ class SobreviventeViewSet(viewsets.ModelViewSet):
             tipo_item = serializer.validated_data['tipo_item']
             quantidade = serializer.validated_data['quantidade']
 
-            # Busca ou cria o item no inventário
-            item, created = ItemInventario.objects.get_or_create(
-                sobrevivente=sobrevivente,
-                tipo_item=tipo_item,
-                defaults={'quantidade': 0}
-            )
+            with transaction.atomic():
+                # Busca ou cria o item no inventário
+                item, created = ItemInventario.objects.get_or_create(
+                    sobrevivente=sobrevivente,
+                    tipo_item=tipo_item,
+                    defaults={'quantidade': 0}
+                )
 
-            item.quantidade += quantidade
-            item.save()
+                item.quantidade += quantidade
+                item.save()
+                publicar_evento(TipoEvento.INVENTARIO, sobrevivente.id, {
+                    'tipo_item': tipo_item,
+                    'variacao': quantidade,
+                    'quantidade_total': item.quantidade,
+                })
 
             return Response({
                 'mensagem': f'{quantidade}x {item.get_tipo_item_display()} adicionado(s) ao inventário.',
@@ -171,15 +283,24 @@ class SobreviventeViewSet(viewsets.ModelViewSet):
                 )
 
             item.quantidade -= quantidade
+            with transaction.atomic():
+                if item.quantidade == 0:
+                    item.delete()
+                else:
+                    item.save()
+                publicar_evento(TipoEvento.INVENTARIO, sobrevivente.id, {
+                    'tipo_item': tipo_item,
+                    'variacao': -quantidade,
+                    'quantidade_total': item.quantidade,
+                })
+
             if item.quantidade == 0:
-                item.delete()
                 return Response({
                     'mensagem': f'{quantidade}x {TipoItem(tipo_item).label} removido(s). Item removido do inventário.',
                     'item': tipo_item,
                     'quantidade_restante': 0
                 })
             else:
-                item.save()
                 return Response({
                     'mensagem': f'{quantidade}x {TipoItem(tipo_item).label} removido(s) do inventário.',
                     'item': tipo_item,
@@ -290,6 +411,20 @@ class SobreviventeViewSet(viewsets.ModelViewSet):
                     item_origem.quantidade += quantidade
                     item_origem.save()
 
+                # Um evento por participante, como no escambo circular
+                itens_oferecidos = serializer.validated_data['itens_oferecidos']
+                itens_desejados = serializer.validated_data['itens_desejados']
+                publicar_evento(TipoEvento.ESCAMBO, sobrevivente_origem.id, {
+                    'sobrevivente_destino_id': sobrevivente_destino.id,
+                    'itens_oferecidos': itens_oferecidos,
+                    'itens_recebidos': itens_desejados,
+                })
+                publicar_evento(TipoEvento.ESCAMBO, sobrevivente_destino.id, {
+                    'sobrevivente_destino_id': sobrevivente_origem.id,
+                    'itens_oferecidos': itens_desejados,
+                    'itens_recebidos': itens_oferecidos,
+                })
+
             return Response({
                 'mensagem': f'Escambo realizado com sucesso entre {sobrevivente_origem.nome} e {sobrevivente_destino.nome}!',
                 'sobrevivente_origem': sobrevivente_origem.nome,
@@ -300,62 +435,124 @@ class SobreviventeViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['get', 'post', 'delete'])
+    def intencoes_escambo(self, request, pk=None):
+        """Lista, registra ou cancela (``?intencao_id=``) intenções de escambo circular
+
+        Uma intenção oferece um lote de itens em troca de outro de mesmo valor
+        em pontos; o escambo circular junta intenções compatíveis de vários
+        sobreviventes em ciclos.
+        """
+        sobrevivente = self.get_object()
+
+        if request.method == 'GET':
+            intencoes = sobrevivente.intencoes_escambo.filter(ativa=True).order_by('id')
+            return Response(IntencaoEscamboSerializer(intencoes, many=True).data)
+
+        if request.method == 'DELETE':
+            parametros = CancelarIntencaoSerializer(data=request.query_params)
+            if not parametros.is_valid():
+                return Response(parametros.errors, status=status.HTTP_400_BAD_REQUEST)
+            canceladas = sobrevivente.intencoes_escambo.filter(
+                id=parametros.validated_data['intencao_id'], ativa=True
+            ).update(ativa=False)
+            if not canceladas:
+                return Response(
+                    {'erro': 'Intenção ativa não encontrada.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        if sobrevivente.infectado:
+            return Response(
+                {'erro': 'Sobreviventes infectados não podem realizar escambo.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = IntencaoEscamboSerializer(data=request.data)
+        if serializer.is_valid():
+            tipo_item = serializer.validated_data['tipo_oferecido']
+            quantidade = serializer.validated_data['quantidade_oferecida']
+            if not sobrevivente.inventario.filter(tipo_item=tipo_item, quantidade__gte=quantidade).exists():
+                return Response(
+                    {'erro': f'Você não possui {quantidade}x {TipoItem(tipo_item).label} no inventário.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            intencao = serializer.save(sobrevivente=sobrevivente)
+            return Response(IntencaoEscamboSerializer(intencao).data, status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'])
+    def escambo_circular(self, request):
+        """Encontra e liquida ciclos de escambo entre dois ou mais sobreviventes
+
+        Cada ciclo é liquidado atomicamente; com ``simular`` os ciclos são
+        apenas listados e com ``assincrono`` o solucionador roda pela fila de
+        tarefas (resposta 202).
+        """
+        serializer = EscamboCircularSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        parametros = dict(serializer.validated_data)
+        if parametros.pop('assincrono'):
+            return self._tarefa_aceita(request, resolver_escambos.enfileirar(**parametros))
+        return Response(resolver_escambos(**parametros))
+
     @action(detail=False, methods=['get'])
     def relatorios(self, request):
-        """Gera relatórios estatísticos do sistema"""
-
-        # Contadores básicos
-        total_sobreviventes = Sobreviventes.objects.count()
-        sobreviventes_infectados = Sobreviventes.objects.filter(infectado=True).count()
-        sobreviventes_saudaveis = total_sobreviventes - sobreviventes_infectados
-
-        # Calcula porcentagens
-        if total_sobreviventes > 0:
-            porcentagem_infectados = (sobreviventes_infectados / total_sobreviventes) * 100
-            porcentagem_saudaveis = (sobreviventes_saudaveis / total_sobreviventes) * 100
-        else:
-            porcentagem_infectados = 0
-            porcentagem_saudaveis = 0
-
-        # Calcula médias de itens por usuário (apenas sobreviventes saudáveis)
-        medias_itens = {}
-        for tipo_item, nome_item in TipoItem.choices:
-            if sobreviventes_saudaveis > 0:
-                total_item = ItemInventario.objects.filter(
-                    sobrevivente__infectado=False,
-                    tipo_item=tipo_item
-                ).aggregate(total=Sum('quantidade'))['total'] or 0
+        """Gera relatórios estatísticos do sistema
+
+        Com ``?assincrono=1`` o relatório é gerado pela fila de tarefas: a
+        resposta é 202 com o id da tarefa, consultável em /tarefas/{id}/.
+        """
+        if request.query_params.get('assincrono') in ('1', 'true'):
+            return self._tarefa_aceita(request, gerar_relatorio.enfileirar())
+        return Response(gerar_relatorio())
+
+    @action(detail=False, methods=['get'], url_path='relatorios/historico')
+    def historico_relatorios(self, request):
+        """Evolução das métricas dos relatórios por hora ou por dia
+
+        Parâmetros: ``inicio`` e ``fim`` (ISO 8601) e ``granularidade``
+        (``hora`` ou ``dia``). Lê apenas os intervalos já agregados pela
+        tarefa registrar_historico.
+        """
+        serializer = HistoricoRelatorioSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(consultar_historico(**serializer.validated_data))
 
-                media = total_item / sobreviventes_saudaveis
-            else:
-                media = 0
-
-            medias_itens[f'media_{tipo_item}_por_usuario'] = round(media, 2)
-
-        # Calcula pontos perdidos por usuários infectados
-        pontos_perdidos = 0
-        sobreviventes_infectados_obj = Sobreviventes.objects.filter(infectado=True)
-        for sobrevivente in sobreviventes_infectados_obj:
-            for item in sobrevivente.inventario.all():
-                pontos_perdidos += item.calcular_pontos()
-
-        relatorio = {
-            'resumo_geral': {
-                'total_sobreviventes': total_sobreviventes,
-                'sobreviventes_saudaveis': sobreviventes_saudaveis,
-                'sobreviventes_infectados': sobreviventes_infectados,
-            },
-            'porcentagens': {
-                'porcentagem_infectados': round(porcentagem_infectados, 2),
-                'porcentagem_nao_infectados': round(porcentagem_saudaveis, 2),
-            },
-            'medias_itens': medias_itens,
-            'pontos_perdidos_infectados': pontos_perdidos,
-            'observacoes': {
-                'nota_1': 'Apenas sobreviventes saudáveis são considerados nos cálculos de média.',
-                'nota_2': 'Pontos perdidos referem-se aos itens de sobreviventes infectados que ficaram inacessíveis.',
-                'nota_3': 'Sobreviventes infectados não aparecem na listagem principal.'
-            }
-        }
-
-        return Response(relatorio)
+    @action(detail=False, methods=['get'])
+    def analise_reportes(self, request):
+        """Procura sinais de conluio no grafo de reportes de infecção
+
+        Retorna clusters de reportes mútuos, reportadores com grau de saída
+        anômalo e cliques de reportadores com alvos em comum. Com
+        ``?assincrono=1`` a análise roda pela fila de tarefas (resposta 202).
+        """
+        serializer = AnaliseReportesSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        parametros = dict(serializer.validated_data)
+        if parametros.pop('assincrono'):
+            return self._tarefa_aceita(request, analisar_reportes.enfileirar(**parametros))
+        return Response(analisar_reportes(**parametros))
+
+    def _tarefa_aceita(self, request, tarefa):
+        """Resposta 202 para uma operação enviada à fila de tarefas"""
+        url = request.build_absolute_uri(reverse('tarefa-detail', args=[tarefa.id]))
+        return Response(
+            {'tarefa_id': tarefa.id, 'status': tarefa.status, 'url': url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url},
+        )
+
+
+class TarefaViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Consulta o status e o resultado das tarefas em segundo plano"""
+
+    queryset = Tarefa.objects.all()
+    serializer_class = TarefaSerializer
@@ -0,0 +1,226 @@
+"""
+Endpoints de leitura assíncronos (ASGI)
+
+Servem as mesmas respostas das ações de leitura do SobreviventeViewSet
+usando o ORM assíncrono do Django, sem prender uma thread por requisição
+enquanto o banco responde. As escritas continuam no ViewSet síncrono.
+Cada rota consome os mesmos baldes do escopo 'cliente' da ação equivalente
+do ViewSet (``relatorios``, ``list``...), então trocar de rota não dribla os
+limites de ZSSN_THROTTLE.
+"""
+
+import asyncio
+import functools
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .eventos import fluxo_eventos
+from .models import Sobreviventes, ReporteInfeccao, SobreviventeArquivado
+from .relatorios import agerar_relatorio
+from .renderers import JSONRapidoRenderer, MessagePackRenderer
+from .routers import ler_de_replica
+from .serializers import SobreviventeLeituraRapidaSerializer
+from .throttling import identidade_cliente, verificar_limite
+
+KM_POR_GRAU = 111.32
+RAIO_TERRA_KM = 6371.0
+# Limites da busca por proximidade: raios maiores viram uma varredura de toda a tabela
+MAX_RAIO_KM = 100
+MAX_LIMITE_PROXIMOS = 500
+
+
+def _responder(request, dados, status=200):
+    """Renderiza em MessagePack quando o cliente pede, senão em JSON"""
+    if MessagePackRenderer.media_type in request.headers.get('Accept', '') or request.GET.get('format') == 'msgpack':
+        renderer = MessagePackRenderer()
+    else:
+        renderer = JSONRapidoRenderer()
+    resposta = HttpResponse(status=status, content_type=renderer.media_type)
+    resposta.content = renderer.render(dados, renderer_context={'response': resposta})
+    return resposta
+
+
+def _nao_encontrado(request):
+    return _responder(request, {'detail': 'Not found.'}, status=404)
+
+
+def limitar(acao):
+    """Aplica o balde do escopo 'cliente' da ação (o mesmo das rotas síncronas)"""
+
+    def decorador(view):
+        @functools.wraps(view)
+        async def envoltorio(request, *args, **kwargs):
+            usuario = await request.auser() if hasattr(request, 'auser') else None
+            espera = await sync_to_async(verificar_limite)('cliente', acao, identidade_cliente(request, usuario))
+            if espera is not None:
+                resposta = _responder(
+                    request,
+                    {'detail': f'Requisição limitada. Tente novamente em {math.ceil(espera)} segundos.'},
+                    status=429
+                )
+                resposta['Retry-After'] = str(math.ceil(espera))
+                return resposta
+            return await view(request, *args, **kwargs)
+
+        return envoltorio
+
+    return decorador
+
+
+@require_GET
+@limitar('list')
+async def listar_sobreviventes(request):
+    """Lista sobreviventes saudáveis"""
+    with ler_de_replica():
+        dados = await SobreviventeLeituraRapidaSerializer().aserializar(
+            Sobreviventes.objects.filter(infectado=False)
+        )
+    return _responder(request, dados)
+
+
+@require_GET
+@limitar('retrieve')
+async def detalhar_sobrevivente(request, pk):
+    """Detalha um sobrevivente"""
+    serializer = SobreviventeLeituraRapidaSerializer()
+    with ler_de_replica():
+        try:
+            dados = await serializer.aserializar_um(Sobreviventes.objects.all(), pk)
+        except Sobreviventes.DoesNotExist:
+            try:
+                dados = await serializer.aserializar_arquivado_um(pk)
+            except SobreviventeArquivado.DoesNotExist:
+                return _nao_encontrado(request)
+    return _responder(request, dados)
+
+
+@require_GET
+@limitar('relatorios')
+async def relatorios(request):
+    """Gera relatórios estatísticos do sistema"""
+    with ler_de_replica():
+        dados = await agerar_relatorio()
+    return _responder(request, dados)
+
+
+@require_GET
+@limitar('reportes_recebidos')
+async def reportes_recebidos(request, pk):
+    """Lista os reportes de infecção recebidos por um sobrevivente"""
+    reportes = ReporteInfeccao.objects.filter(sobrevivente_reportado_id=pk).order_by('-data_reporte')
+
+    async def listar():
+        return [
+            {
+                'sobrevivente_reportador': reporte['sobrevivente_reportador_id'],
+                'nome_reportador': reporte['sobrevivente_reportador__nome'],
+                'data_reporte': reporte['data_reporte'],
+            }
+            async for reporte in reportes.values(
+                'sobrevivente_reportador_id', 'sobrevivente_reportador__nome', 'data_reporte'
+            ).aiterator()
+        ]
+
+    with ler_de_replica():
+        existe, total, lista = await asyncio.gather(
+            Sobreviventes.objects.filter(pk=pk).aexists(),
+            reportes.acount(),
+            listar(),
+        )
+
+    if not existe:
+        with ler_de_replica():
+            arquivado = await SobreviventeArquivado.objects.filter(pk=pk).values_list('reportes', flat=True).afirst()
+        if arquivado is None:
+            return _nao_encontrado(request)
+        lista = [
+            {'sobrevivente_reportador': reportador_id, 'nome_reportador': None, 'data_reporte': data_reporte}
+            for reportador_id, data_reporte in sorted(arquivado, key=lambda reporte: reporte[1], reverse=True)
+        ]
+        total = len(lista)
+
+    return _responder(request, {
+        'sobrevivente': pk,
+        'total_reportes': total,
+        'reportes': lista,
+    })
+
+
+@require_GET
+@limitar('proximos')
+async def sobreviventes_proximos(request):
+    """Lista sobreviventes saudáveis dentro de um raio (km) de uma coordenada"""
+    try:
+        latitude = float(request.GET['latitude'])
+        longitude = float(request.GET['longitude'])
+        raio_km = float(request.GET.get('raio_km', 10))
+        limite = int(request.GET.get('limite', 50))
+        if not all(map(math.isfinite, (latitude, longitude, raio_km))):
+            raise ValueError
+    except (KeyError, ValueError):
+        return _responder(
+            request,
+            {'erro': 'Informe latitude e longitude numéricas (raio_km e limite são opcionais).'},
+            status=400
+        )
+
+    if raio_km <= 0 or limite <= 0:
+        return _responder(request, {'erro': 'raio_km e limite devem ser positivos.'}, status=400)
+    if raio_km > MAX_RAIO_KM or limite > MAX_LIMITE_PROXIMOS:
+        return _responder(
+            request,
+            {'erro': f'raio_km deve ser no máximo {MAX_RAIO_KM} e limite no máximo {MAX_LIMITE_PROXIMOS}.'},
+            status=400
+        )
+
+    # Pré-filtra por uma caixa envolvente antes de calcular a distância exata
+    delta_latitude = raio_km / KM_POR_GRAU
+    delta_longitude = raio_km / (KM_POR_GRAU * max(math.cos(math.radians(latitude)), 1e-6))
+    candidatos = Sobreviventes.objects.filter(
+        infectado=False,
+        latitude__range=(latitude - delta_latitude, latitude + delta_latitude),
+        longitude__range=(longitude - delta_longitude, longitude + delta_longitude),
+    ).values('id', 'nome', 'latitude', 'longitude')
+
+    proximos = []
+    with ler_de_replica():
+        async for candidato in candidatos.aiterator():
+            distancia = _distancia_km(latitude, longitude, float(candidato['latitude']), float(candidato['longitude']))
+            if distancia <= raio_km:
+                candidato['distancia_km'] = round(distancia, 3)
+                proximos.append(candidato)
+
+    proximos.sort(key=lambda candidato: candidato['distancia_km'])
+    return _responder(request, proximos[:limite])
+
+
+@require_GET
+@limitar('eventos')
+async def feed_eventos(request):
+    """Feed Server-Sent Events de infecções, escambos e alterações de inventário
+
+    Sem ``Last-Event-ID`` (ou ``?ultimo_id=``) o feed começa pelos eventos
+    novos; com ele, reenvia antes tudo o que veio depois desse id.
+    """
+    ultimo_id = request.headers.get('Last-Event-ID') or request.GET.get('ultimo_id')
+    try:
+        ultimo_id = int(ultimo_id) if ultimo_id else None
+    except ValueError:
+        return _responder(request, {'erro': 'Last-Event-ID deve ser um número inteiro.'}, status=400)
+
+    resposta = StreamingHttpResponse(fluxo_eventos(ultimo_id), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
+
+
+def _distancia_km(latitude1, longitude1, latitude2, longitude2):
+    """Distância de haversine entre duas coordenadas"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,157 @@
+"""
+Endpoint de lote: várias operações do SobreviventeViewSet em uma requisição
+
+O cliente envia uma lista ordenada de operações (método, caminho e corpo) e
+cada uma é despachada no próprio processo para a view do ViewSet, passando
+pela mesma autenticação, validação e throttle de uma requisição avulsa. Com
+``"transacional": true`` o lote é tudo ou nada: a primeira operação com
+status >= 400 interrompe o lote e desfaz as anteriores.
+"""
+
+import io
+import json
+import logging
+import time
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .mixins import IdempotenciaMixin, LeituraEmReplicaMixin
+from .parsers import MessagePackParser
+from .renderers import JSONRapidoRenderer, MessagePackRenderer
+from .serializers import LoteSerializer
+from .views import SobreviventeViewSet
+
+logger = logging.getLogger('Sobrevivente.lote')
+
+# Cabeçalhos da requisição externa que não valem para as operações
+META_IGNORADOS = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'HTTP_IDEMPOTENCY_KEY', 'HTTP_ACCEPT')
+
+
+class LoteView(IdempotenciaMixin, APIView):
+    """Executa um lote de operações sobre /sobreviventes/ e retorna o resultado de cada uma"""
+
+    renderer_classes = [JSONRapidoRenderer, MessagePackRenderer]
+    parser_classes = [JSONParser, MessagePackParser]
+
+    def post(self, request):
+        serializer = LoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        transacional = serializer.validated_data['transacional']
+        operacoes = serializer.validated_data['operacoes']
+
+        prefixo = reverse('api-root')
+        destinos = []
+        erros = {}
+        for indice, operacao in enumerate(operacoes):
+            try:
+                destinos.append(self._resolver(prefixo, operacao['caminho']))
+            except ValueError as erro:
+                erros[indice] = str(erro)
+        if erros:
+            return Response({'operacoes': erros}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Com escritas no lote, as leituras seguintes precisam ver o banco principal
+        fixar_primario = transacional or any(operacao['metodo'] != 'GET' for operacao in operacoes)
+
+        resultados = []
+        cookies = []
+        desfeito = False
+        with transaction.atomic() if transacional else nullcontext():
+            for operacao, destino in zip(operacoes, destinos):
+                resposta = self._executar(request, operacao, destino, fixar_primario)
+                cookies.append(resposta.cookies)
+                resultados.append({'status': resposta.status_code, 'corpo': _corpo(resposta)})
+                if transacional and resposta.status_code >= 400:
+                    transaction.set_rollback(True)
+                    desfeito = True
+                    break
+
+        resultados += [{'status': None, 'corpo': None} for _ in range(len(operacoes) - len(resultados))]
+        response = Response({
+            'transacional': transacional,
+            'sucesso': all(r['status'] is not None and r['status'] < 400 for r in resultados),
+            'desfeito': desfeito,
+            'resultados': resultados,
+        })
+        if not desfeito:
+            for cookies_operacao in cookies:
+                response.cookies.update(cookies_operacao)
+        return response
+
+    def _resolver(self, prefixo, caminho):
+        """(view, args, kwargs, caminho, query string) de uma rota do SobreviventeViewSet"""
+        partes = urlsplit(caminho)
+        caminho = partes.path if partes.path.startswith('/') else prefixo + partes.path
+        try:
+            rota = resolve(caminho)
+        except Resolver404:
+            raise ValueError(f'Rota não encontrada: {caminho}') from None
+        if getattr(rota.func, 'cls', None) is not SobreviventeViewSet:
+            raise ValueError(f'Apenas rotas de sobreviventes são aceitas no lote: {caminho}')
+        return rota.func, rota.args, rota.kwargs, caminho, partes.query
+
+    def _executar(self, request, operacao, destino, fixar_primario):
+        view, args, kwargs, caminho, query = destino
+        sub = _montar_requisicao(request, operacao, caminho, query, fixar_primario)
+        # Cada operação roda em um savepoint: um erro nela não inutiliza a transação do lote
+        try:
+            with transaction.atomic():
+                resposta = view(sub, *args, **kwargs)
+                if resposta.status_code >= 400:
+                    transaction.set_rollback(True)
+        except Exception:
+            logger.exception('Erro na operação %s %s do lote', operacao['metodo'], caminho)
+            resposta = Response({'erro': 'Erro interno ao executar a operação.'}, status=500)
+        return resposta
+
+
+def _montar_requisicao(request, operacao, caminho, query, fixar_primario):
+    """Requisição Django equivalente a chamar a operação diretamente"""
+    original = request._request
+    corpo = b'' if operacao['corpo'] is None else json.dumps(operacao['corpo']).encode('utf-8')
+
+    sub = HttpRequest()
+    sub.method = operacao['metodo']
+    sub.path = sub.path_info = caminho
+    sub.META = {chave: valor for chave, valor in original.META.items() if chave not in META_IGNORADOS}
+    sub.META.update({
+        'REQUEST_METHOD': sub.method,
+        'PATH_INFO': caminho,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(corpo)),
+        'HTTP_ACCEPT': 'application/json',
+    })
+    sub.GET = QueryDict(query)
+    sub.COOKIES = dict(original.COOKIES)
+    if fixar_primario:
+        sub.COOKIES[LeituraEmReplicaMixin.cookie_fixacao] = str(int(time.time()) + 60)
+    sub._stream = io.BytesIO(corpo)
+    sub._read_started = False
+    # A requisição externa já passou pela autenticação e pelo CSRF
+    sub._dont_enforce_csrf_checks = True
+    for atributo in ('user', 'session'):
+        if hasattr(original, atributo):
+            setattr(sub, atributo, getattr(original, atributo))
+    return sub
+
+
+def _corpo(resposta):
+    if hasattr(resposta, 'data'):
+        return resposta.data
+    if not resposta.content:
+        return None
+    try:
+        return json.loads(resposta.content)
+    except ValueError:
+        return resposta.content.decode('utf-8', errors='replace')
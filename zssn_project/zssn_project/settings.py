@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,11 +43,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'Sobrevivente.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'Sobrevivente.perfilador.PerfiladorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,6 +88,112 @@ DATABASES = {
     }
 }
 
+# Read replicas
+# Hosts separated by commas in ZSSN_REPLICAS; each replica reuses the
+# credentials of the primary database. Tests mirror them to 'default'.
+DATABASES.update({
+    f'replica{indice}': {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    for indice, host in enumerate(filter(None, os.environ.get('ZSSN_REPLICAS', '').split(',')), start=1)
+})
+
+DATABASE_ROUTERS = ['Sobrevivente.routers.RoteadorReplicas']
+
+# Aliases used by read-only actions (list, retrieve, relatorios, exportar)
+REPLICAS_LEITURA = [alias for alias in DATABASES if alias != 'default']
+
+# Seconds a client keeps reading from the primary after a write
+REPLICA_FIXACAO_SEGUNDOS = 5
+
+
+# Change feed (Server-Sent Events fed by the transactional outbox)
+
+EVENTOS_INTERVALO_CONSULTA = 1  # seconds between outbox reads
+EVENTOS_ESPERA_LACUNA = 2  # seconds to wait for a late-committing event
+EVENTOS_HEARTBEAT = 15  # seconds between keep-alive comments
+EVENTOS_RETENCAO_DIAS = 7
+
+
+# Idempotency-Key support for POST/PATCH actions
+
+IDEMPOTENCIA_TTL_HORAS = 24
+
+
+# Batch endpoint (POST /Sobrevivente/lote/)
+
+LOTE_MAX_OPERACOES = 50
+
+
+# Background task queue (run with `manage.py trabalhador`)
+
+TAREFAS_PROCESSOS = 2  # worker pool size
+TAREFAS_INTERVALO_CONSULTA = 1  # seconds between queue polls when idle
+TAREFAS_ESPERA_RETENTATIVA = 10  # base retry delay in seconds, doubled per attempt
+TAREFAS_TEMPO_LIMITE_SEGUNDOS = 3600  # running tasks older than this are treated as abandoned
+TAREFAS_RETENCAO_DIAS = 7  # finished tasks are deleted after this
+
+
+# Archival of infected survivors (`manage.py arquivar_infectados`, also a daily task)
+
+ARQUIVAMENTO_DIAS = 30  # infected survivors unchanged for this long are archived
+ARQUIVAMENTO_LOTE = 1000  # survivors moved per transaction
+
+
+# Multi-party ring trades (`manage.py resolver_escambos`, also a task every 10 minutes)
+
+ESCAMBO_CIRCULAR_TAMANHO_MAXIMO = 4  # longest cycle searched, in participants
+ESCAMBO_CIRCULAR_LIMITE = 1000  # cycles settled per run
+
+
+# Report history (sampled every 5 minutes by the worker into hourly and daily rollups)
+
+HISTORICO_RETENCAO_HORARIO_DIAS = 14  # hourly rows are deleted after this
+HISTORICO_RETENCAO_DIARIO_DIAS = 730  # daily rows are deleted after this
+
+
+# Token-bucket throttling per action: rates are 'count/period' (s, min, hour, day).
+# Tokens refill continuously (one every period/count seconds) and a burst is capped
+# at count; there is no fixed window to reset. 'sobrevivente' buckets are keyed by
+# the survivor in the URL, 'cliente' buckets by user or IP (also for the async
+# routes); '*' applies to actions without their own rate.
+
+ZSSN_THROTTLE = {
+    'sobrevivente': {
+        'atualizar_localizacao': '12/min',
+    },
+    'cliente': {
+        'relatorios': '30/min',
+        'historico_relatorios': '30/min',
+        'exportar': '5/min',
+        'analise_reportes': '5/min',
+        'escambo': '60/min',
+        'escambo_circular': '5/min',
+        '*': '1200/min',
+    },
+}
+# Buckets live in this cache; it must be shared by all workers (Redis in settings_producao),
+# since the default LocMemCache keeps one bucket set per process.
+ZSSN_THROTTLE_CACHE = 'default'
+
+
+# Per-action metrics (exposed at /metrics)
+
+# Requests slower than this (ms) are logged with their SQL; None disables it
+METRICAS_LIMITE_LENTO_MS = None
+
+# Who may read /metrics besides staff users: connection addresses (REMOTE_ADDR,
+# never X-Forwarded-For) and a bearer token for the Prometheus scraper
+METRICAS_IPS_PERMITIDOS = ['127.0.0.1', '::1']
+METRICAS_TOKEN = os.environ.get('ZSSN_METRICAS_TOKEN')
+
+
+# Request profiler (staff users can add ?__profile=1 to any request)
+
+PERFILADOR_TAXA_AMOSTRAGEM = 0.0  # fraction of requests profiled automatically
+PERFILADOR_INTERVALO_MS = 5  # stack sampling interval
+PERFILADOR_DIRETORIO = BASE_DIR / 'perfis'
+PERFILADOR_MAX_ARQUIVOS = 1000  # the worker deletes the oldest profiles beyond this
+PERFILADOR_MAX_IDADE_HORAS = 72  # and any profile older than this
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
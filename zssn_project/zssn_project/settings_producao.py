@@ -0,0 +1,106 @@
+"""
+Production settings for zssn_project.
+
+Select with DJANGO_SETTINGS_MODULE=zssn_project.settings_producao.
+Everything that differs between environments comes from environment
+variables:
+
+    DJANGO_SECRET_KEY            secret key (required)
+    ZSSN_ALLOWED_HOSTS           comma-separated hosts
+    ZSSN_DB_NAME, ZSSN_DB_USER, ZSSN_DB_PASSWORD, ZSSN_DB_HOST, ZSSN_DB_PORT
+    ZSSN_DB_CONNECT_TIMEOUT      seconds to wait for a new connection (default 5)
+    ZSSN_DB_CONN_MAX_AGE         persistent connection lifetime in seconds (default 60)
+    ZSSN_DB_POOL                 1 to use psycopg 3 connection pooling instead
+    ZSSN_DB_POOL_MIN_SIZE        minimum pooled connections (default 2)
+    ZSSN_DB_POOL_MAX_SIZE        maximum pooled connections (default 10)
+    ZSSN_DB_POOL_TIMEOUT         seconds to wait for a free pooled connection (default 10)
+    ZSSN_REDIS_URL               shared cache for throttling buckets (required), e.g. redis://cache:6379/0
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, REPLICAS_LEITURA
+
+
+def _env(nome, padrao=None):
+    valor = os.environ.get(nome, padrao)
+    if valor is None:
+        raise ImproperlyConfigured(f'Set the {nome} environment variable.')
+    return valor
+
+
+def _env_int(nome, padrao):
+    return int(_env(nome, str(padrao)))
+
+
+SECRET_KEY = _env('DJANGO_SECRET_KEY')
+
+# DEBUG also makes Django keep every executed query in memory
+DEBUG = False
+
+ALLOWED_HOSTS = [host.strip() for host in _env('ZSSN_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+
+# Database
+
+DATABASES['default'].update({
+    'NAME': _env('ZSSN_DB_NAME', DATABASES['default']['NAME']),
+    'USER': _env('ZSSN_DB_USER', DATABASES['default']['USER']),
+    'PASSWORD': _env('ZSSN_DB_PASSWORD', DATABASES['default']['PASSWORD']),
+    'HOST': _env('ZSSN_DB_HOST', DATABASES['default']['HOST']),
+    'PORT': _env('ZSSN_DB_PORT', DATABASES['default']['PORT']),
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'connect_timeout': _env_int('ZSSN_DB_CONNECT_TIMEOUT', 5),
+    },
+})
+
+if _env('ZSSN_DB_POOL', '0') == '1':
+    # psycopg 3 pool (Django >= 5.1); pooling replaces persistent connections
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': _env_int('ZSSN_DB_POOL_MIN_SIZE', 2),
+        'max_size': _env_int('ZSSN_DB_POOL_MAX_SIZE', 10),
+        'timeout': _env_int('ZSSN_DB_POOL_TIMEOUT', 10),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = _env_int('ZSSN_DB_CONN_MAX_AGE', 60)
+
+# Replicas share the primary's connection settings, only the host differs
+for _alias in REPLICAS_LEITURA:
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},
+        'HOST': DATABASES[_alias]['HOST'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+
+# Cache
+
+# Throttling buckets must be shared by every worker process and survive restarts;
+# a per-process LocMemCache would multiply each rate by the number of workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': _env('ZSSN_REDIS_URL'),
+    },
+}
+
+
+# Logging
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        'django.db.backends': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
@@ -0,0 +1,13 @@
+"""
+Configurações dos testes: ``python manage.py test Sobrevivente --settings=zssn_project.settings_testes``
+
+Acrescenta a réplica ``replica1``, espelho do banco de testes principal,
+para exercitar o roteamento de leituras sem um servidor de réplica.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES['replica1'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+REPLICAS_LEITURA = ['replica1']
@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.urls import path, include
+from Sobrevivente.metricas import metricas
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('Sobrevivente/', include('Sobrevivente.urls')),
+    path('metrics', metricas, name='metricas'),
 ]
\ No newline at end of file